@@ -0,0 +1,199 @@
+"""Admin pages of the server build.
+
+The pages (``/admin/profiles`` and ``/admin/sessions``) and the render API's
+``/api/render/stats`` exist only when ``JUFDEA_ADMIN_TOKEN`` is set. Browsers
+sign in once at ``/admin/login``, which stores the token in an HTTP-only
+cookie; scripts send it in the ``X-Admin-Token`` header. The token never
+appears in a URL, so it does not end up in access logs or browser history.
+Without a matching token the pages answer ``404``.
+"""
+
+from __future__ import annotations
+
+import hmac
+import html
+import os
+
+from fastapi import FastAPI, Request, Response
+from fastapi.responses import FileResponse, HTMLResponse, RedirectResponse
+from nicegui import ui
+
+from profiling import RenderProfiler
+from sessions import SessionRegistry
+from traffic import TrafficMonitor, describe
+
+ADMIN_TOKEN_ENV = "JUFDEA_ADMIN_TOKEN"
+ADMIN_TOKEN_HEADER = "X-Admin-Token"
+ADMIN_COOKIE = "jufdea_admin"
+LOGIN_PAGE = """<!doctype html>
+<html lang="nl">
+<meta charset="utf-8">
+<title>Beheer</title>
+<form method="post" action="/admin/login">
+  <input type="hidden" name="next" value="{next}">
+  <label>Beheertoken <input type="password" name="token" autofocus></label>
+  <button>Aanmelden</button>
+  <p>{message}</p>
+</form>
+</html>
+"""
+
+
+def is_authorized(request: Request) -> bool:
+    """Whether ``request`` carries the admin token in its header or cookie."""
+
+    token = request.headers.get(ADMIN_TOKEN_HEADER) or request.cookies.get(
+        ADMIN_COOKIE, ""
+    )
+    return _matches(token)
+
+
+def _matches(token: str) -> bool:
+    expected = os.environ.get(ADMIN_TOKEN_ENV, "")
+    return bool(expected) and hmac.compare_digest(token, expected)
+
+
+def register(
+    server: FastAPI,
+    profiler: RenderProfiler,
+    sessions: SessionRegistry,
+    traffic: TrafficMonitor | None = None,
+) -> None:
+    @server.get("/admin/login", include_in_schema=False)
+    def login_form(next: str = "/admin/sessions") -> Response:
+        if not os.environ.get(ADMIN_TOKEN_ENV):
+            return Response(status_code=404)
+        return _login_page(next)
+
+    @server.post("/admin/login", include_in_schema=False)
+    async def login(request: Request) -> Response:
+        if not os.environ.get(ADMIN_TOKEN_ENV):
+            return Response(status_code=404)
+        form = await request.form()
+        token, target = str(form.get("token", "")), str(form.get("next", ""))
+        if not _matches(token):
+            return _login_page(target, "Onjuist token.", status_code=403)
+        response = RedirectResponse(
+            target if target.startswith("/admin/") else "/admin/sessions",
+            status_code=303,
+        )
+        response.set_cookie(
+            ADMIN_COOKIE,
+            token,
+            httponly=True,
+            samesite="strict",
+            secure=request.url.scheme == "https",
+        )
+        return response
+
+    @ui.page("/admin/profiles", title="Trage renders")
+    def profiles_page(request: Request) -> Response | None:
+        if not is_authorized(request):
+            return Response(status_code=404)
+
+        with ui.column().classes("w-full max-w-5xl mx-auto p-4 gap-4"):
+            ui.label("Trage renders").classes("text-2xl")
+            with ui.row().classes("items-center gap-4"):
+                ui.switch("Profileren").bind_value(profiler, "enabled")
+                ui.number(
+                    "Drempel (ms)",
+                    min=0,
+                    step=50,
+                    value=round(profiler.threshold_seconds * 1000),
+                    on_change=lambda event: setattr(
+                        profiler,
+                        "threshold_seconds",
+                        float(event.value or 0) / 1000,
+                    ),
+                ).classes("w-36")
+            ui.label(f"Profielen worden bewaard in {profiler.directory}.").classes(
+                "text-sm text-gray-600"
+            )
+
+            records = profiler.slowest
+            if not records:
+                ui.label("Nog geen trage renders opgeslagen.")
+                return None
+            with ui.grid(columns=5).classes("w-full items-center gap-2"):
+                for header in ("Duur", "Soort", "Rijen", "Tijdstip", "Bestanden"):
+                    ui.label(header).classes("font-bold")
+                for record in records:
+                    ui.label(f"{record.seconds * 1000:.0f} ms")
+                    ui.label(record.kind)
+                    ui.label(str(record.rows))
+                    ui.label(f"{record.created:%d-%m-%Y %H:%M:%S}")
+                    with ui.row().classes("gap-2"):
+                        for path in (record.profile_path, record.payload_path):
+                            ui.link(
+                                path.suffix.lstrip("."),
+                                f"/admin/profiles/{path.name}",
+                            )
+        return None
+
+    @ui.page("/admin/sessions", title="Sessies")
+    def sessions_page(request: Request) -> Response | None:
+        if not is_authorized(request):
+            return Response(status_code=404)
+
+        with ui.column().classes("w-full max-w-5xl mx-auto p-4 gap-4"):
+            ui.label("Sessies").classes("text-2xl")
+            session_table()
+        return None
+
+    @ui.refreshable
+    def session_table() -> None:
+        infos = sessions.sessions()
+        usages = [info.session.memory_usage() for info in infos]
+        total = sum(sum(usage.values()) for usage in usages)
+        with ui.row().classes("items-center gap-4"):
+            ui.label(
+                f"{len(infos)} open, samen ongeveer {_megabytes(total)}; "
+                f"{sessions.evicted} gesloten na "
+                f"{sessions.idle_seconds / 60:.0f} minuten zonder activiteit."
+            )
+            ui.button("Vernieuwen", icon="refresh", on_click=session_table.refresh)
+            ui.button(
+                "Inactieve sessies sluiten",
+                icon="cleaning_services",
+                on_click=lambda: (sessions.evict_idle(), session_table.refresh()),
+            )
+        if not infos:
+            return
+        headers = ("Sessie", "Inactief", "Rijen", "Layout", "Preview", "Elementen")
+        # Traffic is only counted with JUFDEA_METRICS or the traffic overlay.
+        monitor = traffic if traffic is not None and traffic.enabled else None
+        headers += ("Totaal", "Verkeer") if monitor is not None else ("Totaal",)
+        with ui.grid(columns=len(headers)).classes("w-full items-center gap-2"):
+            for header in headers:
+                ui.label(header).classes("font-bold")
+            for info, usage in zip(infos, usages, strict=True):
+                session_id = info.session.session_id
+                ui.label(session_id[:8])
+                ui.label(f"{info.idle_seconds / 60:.0f} min")
+                for key in ("rijen", "layout", "preview", "elementen"):
+                    ui.label(_megabytes(usage.get(key, 0)))
+                ui.label(_megabytes(sum(usage.values()))).classes("font-bold")
+                if monitor is not None:
+                    ui.label(describe(monitor.session(session_id))).classes("text-xs")
+
+    @server.get("/admin/profiles/{name}", include_in_schema=False)
+    def profile_file(name: str, request: Request) -> Response:
+        if not is_authorized(request):
+            return Response(status_code=404)
+        for record in profiler.slowest:
+            for path in (record.profile_path, record.payload_path):
+                if path.name == name and path.exists():
+                    return FileResponse(path, filename=name)
+        return Response(status_code=404)
+
+
+def _login_page(next: str, message: str = "", *, status_code: int = 200) -> Response:
+    return HTMLResponse(
+        LOGIN_PAGE.format(next=html.escape(next), message=html.escape(message)),
+        status_code=status_code,
+        headers={"Cache-Control": "no-store"},
+    )
+
+
+def _megabytes(size: int) -> str:
+    return f"{size / 1_000_000:.1f} MB"
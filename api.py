@@ -0,0 +1,556 @@
+"""JSON-in, PDF/PNG-out HTTP API for generating name cards without the UI.
+
+Renders run in a bounded queue that is separate from the editor sessions: the
+API never holds more than ``workers`` render threads, each client can only
+have ``per_client`` jobs queued or running, and once ``max_pending`` jobs are
+waiting new requests get ``429 Too Many Requests`` with a ``Retry-After``
+header. Large documents can be submitted as jobs and polled.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import concurrent.futures
+import functools
+import logging
+import math
+import time
+from collections.abc import AsyncIterator, Callable
+from dataclasses import dataclass, field
+from typing import Any
+from uuid import uuid4
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, Response, StreamingResponse
+from nicegui import background_tasks, run
+
+from admin import is_authorized
+from models import ImageCatalog, Person, validate_people
+from pdf_utils import (
+    DOWNLOAD_NAME,
+    PdfGenerator,
+    load_layout,
+    render_preview_png,
+    validate_layout,
+)
+from raster import DEFAULT_DPI, MAX_DPI, RASTER_FORMATS, parse_pages, rasterize_to_zip
+from scheduler import Priority, RenderScheduler
+
+log = logging.getLogger(__name__)
+
+JOB_RETENTION_SECONDS = 600.0
+# Finished jobs and result bytes kept at most; the oldest go first.
+MAX_RETAINED_JOBS = 1_000
+MAX_RETAINED_JOB_BYTES = 256 * 1024 * 1024
+# Pages times dpi one /api/render/images request may ask for, e.g. 40 pages
+# at 300 dpi or 80 at 150 dpi.
+MAX_IMAGE_PAGE_DPI = 12_000
+# Zip chunks buffered per image stream before rendering waits for the client,
+# and how long it waits before giving up on a client that stopped reading.
+IMAGE_STREAM_CHUNKS = 16
+IMAGE_STREAM_STALL_SECONDS = 60.0
+
+
+class RenderQueueFull(Exception):
+    """Raised when a render cannot be accepted right now."""
+
+    def __init__(self, message: str, retry_after: float) -> None:
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+@dataclass(slots=True)
+class RenderJob:
+    id: str
+    client_id: str
+    status: str = "queued"
+    result: bytes | None = None
+    media_type: str = "application/pdf"
+    error: str | None = None
+    created: float = field(default_factory=time.monotonic)
+    finished: float | None = None
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "id": self.id,
+            "status": self.status,
+            "error": self.error,
+            "result_url": f"/api/jobs/{self.id}/result"
+            if self.result is not None
+            else None,
+        }
+
+
+class RenderQueue:
+    """Bounded render queue with per-client limits.
+
+    With a ``scheduler``, admitted renders are queued as downloads in the shared
+    render scheduler, so they yield to interactive previews of the editor.
+    """
+
+    def __init__(
+        self,
+        *,
+        workers: int = 2,
+        max_pending: int = 16,
+        per_client: int = 2,
+        scheduler: RenderScheduler | None = None,
+    ) -> None:
+        self.workers = workers
+        self.scheduler = scheduler
+        self.max_pending = max_pending
+        self.per_client = per_client
+        self._slots = asyncio.Semaphore(workers)
+        self._pending = 0
+        self._per_client: dict[str, int] = {}
+        self._average_seconds = 1.0
+
+    @property
+    def pending(self) -> int:
+        return self._pending
+
+    def reserve(self, client_id: str) -> None:
+        """Claim a queue place or raise ``RenderQueueFull``."""
+
+        if self._per_client.get(client_id, 0) >= self.per_client:
+            raise RenderQueueFull(
+                "Too many renders in progress for this client.",
+                self._average_seconds,
+            )
+        if self._pending >= self.max_pending:
+            raise RenderQueueFull(
+                "The render queue is full.",
+                self._average_seconds * math.ceil(self._pending / self.workers),
+            )
+        self._pending += 1
+        self._per_client[client_id] = self._per_client.get(client_id, 0) + 1
+
+    def release(self, client_id: str) -> None:
+        self._pending -= 1
+        remaining = self._per_client[client_id] - 1
+        if remaining:
+            self._per_client[client_id] = remaining
+        else:
+            del self._per_client[client_id]
+
+    async def run(
+        self, client_id: str, function: Callable[..., Any], *args: Any
+    ) -> Any:
+        """Run a reserved render once a worker slot is free."""
+
+        try:
+            async with self._slots:
+                start = time.perf_counter()
+                if self.scheduler is None:
+                    result = await run.io_bound(function, *args)
+                else:
+                    result = await self.scheduler.submit(
+                        f"api:{client_id}", Priority.DOWNLOAD, function, *args
+                    )
+                elapsed = time.perf_counter() - start
+                self._average_seconds = 0.8 * self._average_seconds + 0.2 * elapsed
+                return result
+        finally:
+            self.release(client_id)
+            if self.scheduler is not None:
+                self.scheduler.expire("api:", JOB_RETENTION_SECONDS)
+
+
+class RenderApi:
+    """Route handlers for the render API, bound to one catalog and queue."""
+
+    def __init__(
+        self,
+        catalog: ImageCatalog,
+        *,
+        generator: PdfGenerator | None = None,
+        queue: RenderQueue | None = None,
+    ) -> None:
+        self.catalog = catalog
+        self.generator = generator or PdfGenerator()
+        self.queue = queue or RenderQueue()
+        self.jobs: dict[str, RenderJob] = {}
+
+    def register(self, app: FastAPI) -> None:
+        app.add_api_route("/api/render/pdf", self.render_pdf, methods=["POST"])
+        app.add_api_route("/api/render/png", self.render_png, methods=["POST"])
+        app.add_api_route("/api/render/images", self.render_images, methods=["POST"])
+        app.add_api_route("/api/jobs", self.create_job, methods=["POST"])
+        app.add_api_route("/api/jobs/{job_id}", self.job_status, methods=["GET"])
+        app.add_api_route("/api/jobs/{job_id}/result", self.job_result, methods=["GET"])
+        app.add_api_route("/api/render/stats", self.render_stats, methods=["GET"])
+        app.add_api_route("/api/documents/{key}", self.cached_document, methods=["GET"])
+
+    async def render_pdf(self, request: Request) -> Response:
+        try:
+            people, layout = self._parse_document(await request.json())
+        except ValueError as error:
+            return _error(422, str(error))
+        key = self.generator.document_key(people, self.catalog, layout)
+        if _matches_etag(request, key):
+            return Response(status_code=304, headers=_etag_headers(key))
+        response = await self._render(
+            request,
+            "application/pdf",
+            self.generator.document,
+            people,
+            self.catalog,
+            layout,
+        )
+        if response.status_code == 200:
+            response.headers.update(_etag_headers(key))
+        return response
+
+    async def cached_document(self, key: str, request: Request) -> Response:
+        """Serve a cached document by its content address.
+
+        Documents are deterministic, so a matching ``If-None-Match`` is answered
+        with ``304`` even after the document has been evicted.
+        """
+
+        if _matches_etag(request, key):
+            return Response(status_code=304, headers=_etag_headers(key))
+        cache = self.generator.cache
+        document = cache.get(key) if cache is not None else None
+        if document is None:
+            return _error(404, "Unknown or expired document.")
+        return Response(
+            document,
+            media_type="application/pdf",
+            headers=_etag_headers(key)
+            | {"Content-Disposition": f'attachment; filename="{DOWNLOAD_NAME}"'},
+        )
+
+    async def render_png(self, request: Request) -> Response:
+        try:
+            payload = await request.json()
+            people, layout = self._parse_document(
+                {"people": [payload.get("person")], "layout": payload.get("layout")}
+            )
+            zoom = float(payload.get("zoom", 1.5))
+        except (AttributeError, TypeError, ValueError) as error:
+            return _error(422, str(error))
+        if not 0.1 <= zoom <= 4:
+            return _error(422, "zoom must be between 0.1 and 4.")
+        return await self._render(
+            request,
+            "image/png",
+            self._preview_png,
+            people[0],
+            layout,
+            zoom,
+        )
+
+    async def render_images(self, request: Request) -> Response:
+        """Render a document and stream a zip with one image per page.
+
+        The document is rendered (or taken from the cache) first, so invalid
+        page selections and oversized requests still get a ``422``. The pages
+        are then rasterised one at a time in the render thread and sent as
+        soon as they are in the zip.
+        """
+
+        try:
+            payload = await request.json()
+            people, layout = self._parse_document(payload)
+            image_format = str(payload.get("format", "png"))
+            dpi = int(payload.get("dpi", DEFAULT_DPI))
+            pages = payload.get("pages")
+        except (TypeError, ValueError) as error:
+            return _error(422, str(error))
+        if image_format not in RASTER_FORMATS:
+            return _error(422, f"format must be one of {', '.join(RASTER_FORMATS)}.")
+        if not 1 <= dpi <= MAX_DPI:
+            return _error(422, f"dpi must be between 1 and {MAX_DPI}.")
+        if pages is not None and not isinstance(pages, str):
+            return _error(422, "pages must be a string such as '1-3,5'.")
+
+        client_id = _client_id(request)
+        try:
+            self.queue.reserve(client_id)
+            document = await self.queue.run(
+                client_id, self.generator.document, people, self.catalog, layout
+            )
+            page_count = _page_count(document)
+            selected = len(parse_pages(pages, page_count))
+        except RenderQueueFull as error:
+            return _busy(error)
+        except ValueError as error:
+            return _error(422, str(error))
+        if selected * dpi > MAX_IMAGE_PAGE_DPI:
+            return _error(
+                422,
+                f"{selected} pages at {dpi} dpi is too much; pages x dpi must "
+                f"stay below {MAX_IMAGE_PAGE_DPI}.",
+            )
+        try:
+            self.queue.reserve(client_id)
+        except RenderQueueFull as error:
+            return _busy(error)
+
+        chunks: asyncio.Queue[bytes] = asyncio.Queue(IMAGE_STREAM_CHUNKS)
+        sink = _ChunkSink(asyncio.get_running_loop(), chunks)
+        # One process: a pool per request would multiply the server's CPUs.
+        rasterize = functools.partial(
+            rasterize_to_zip,
+            document,
+            sink,
+            pages=pages,
+            image_format=image_format,
+            dpi=dpi,
+            workers=1,
+        )
+        render = asyncio.ensure_future(self.queue.run(client_id, rasterize))
+        render.add_done_callback(_log_failure)
+        return StreamingResponse(
+            _stream_images(render, chunks, sink), media_type="application/zip"
+        )
+
+    async def create_job(self, request: Request) -> Response:
+        try:
+            people, layout = self._parse_document(await request.json())
+        except ValueError as error:
+            return _error(422, str(error))
+        self._forget_old_jobs()
+        client_id = _client_id(request)
+        try:
+            self.queue.reserve(client_id)
+        except RenderQueueFull as error:
+            return _busy(error)
+
+        job = RenderJob(id=uuid4().hex, client_id=client_id)
+        self.jobs[job.id] = job
+        background_tasks.create(
+            self._run_job(job, people, layout),
+            name=f"render API job {job.id}",
+        )
+        return JSONResponse(
+            job.to_dict(),
+            status_code=202,
+            headers={"Location": f"/api/jobs/{job.id}"},
+        )
+
+    async def job_status(self, job_id: str) -> Response:
+        self._forget_old_jobs()
+        job = self.jobs.get(job_id)
+        if job is None:
+            return _error(404, "Unknown job.")
+        return JSONResponse(job.to_dict())
+
+    async def job_result(self, job_id: str) -> Response:
+        self._forget_old_jobs()
+        job = self.jobs.get(job_id)
+        if job is None:
+            return _error(404, "Unknown job.")
+        if job.status == "done" and job.result is None:
+            return _error(410, "Job result was already fetched.")
+        if job.status != "done" or job.result is None:
+            return _error(409, f"Job is {job.status}.")
+        # Results are fetched once; keeping them would only hold memory.
+        result, job.result = job.result, None
+        return Response(result, media_type=job.media_type)
+
+    async def render_stats(self, request: Request) -> Response:
+        if not is_authorized(request):
+            return Response(status_code=404)
+        stats: dict[str, Any] = {"api_pending": self.queue.pending}
+        scheduler = self.queue.scheduler
+        if scheduler is not None:
+            stats |= {
+                "concurrency": scheduler.concurrency,
+                "running": scheduler.running,
+                "queued": scheduler.queued,
+                "sessions": {
+                    session_id: waits.to_dict()
+                    for session_id, waits in scheduler.wait_times().items()
+                },
+            }
+        return JSONResponse(stats)
+
+    async def _render(
+        self,
+        request: Request,
+        media_type: str,
+        function: Callable[..., bytes],
+        *args: Any,
+    ) -> Response:
+        client_id = _client_id(request)
+        try:
+            self.queue.reserve(client_id)
+        except RenderQueueFull as error:
+            return _busy(error)
+        try:
+            content = await self.queue.run(client_id, function, *args)
+        except ValueError as error:
+            return _error(422, str(error))
+        return Response(content, media_type=media_type)
+
+    async def _run_job(
+        self,
+        job: RenderJob,
+        people: list[Person],
+        layout: dict[str, Any],
+    ) -> None:
+
+        def render(*args: Any) -> bytes:
+            # Called once the job has a render slot, not while it waits.
+            job.status = "running"
+            return self.generator.document(*args)
+
+        try:
+            job.result = await self.queue.run(
+                job.client_id,
+                render,
+                people,
+                self.catalog,
+                layout,
+            )
+        except Exception as error:
+            job.status = "failed"
+            job.error = str(error)
+        else:
+            job.status = "done"
+        job.finished = time.monotonic()
+        self._forget_old_jobs()
+        # Expire the job even when no further requests arrive.
+        asyncio.get_running_loop().call_later(
+            JOB_RETENTION_SECONDS, self.jobs.pop, job.id, None
+        )
+
+    def _preview_png(
+        self, person: Person, layout: dict[str, Any], zoom: float
+    ) -> bytes:
+        return render_preview_png(
+            self.generator.preview(person, self.catalog, layout),
+            zoom,
+        )
+
+    def _parse_document(self, payload: Any) -> tuple[list[Person], dict[str, Any]]:
+        if not isinstance(payload, dict):
+            raise ValueError("Request body must be a JSON object.")
+        rows = payload.get("people")
+        if not isinstance(rows, list) or not all(isinstance(row, dict) for row in rows):
+            raise ValueError("'people' must be a list of objects.")
+        people = [Person.from_dict(row) for row in rows]
+        errors = validate_people(people, self.catalog)
+        if errors:
+            raise ValueError(" ".join(errors))
+        layout = payload.get("layout") or load_layout()
+        validate_layout(layout)
+        return people, layout
+
+    def _forget_old_jobs(self) -> None:
+        cutoff = time.monotonic() - JOB_RETENTION_SECONDS
+        finished = [job for job in self.jobs.values() if job.finished is not None]
+        finished.sort(key=lambda job: job.finished or 0.0)
+        retained = len(finished)
+        retained_bytes = sum(len(job.result or b"") for job in finished)
+        for job in finished:
+            if (
+                (job.finished or 0.0) >= cutoff
+                and retained <= MAX_RETAINED_JOBS
+                and retained_bytes <= MAX_RETAINED_JOB_BYTES
+            ):
+                break
+            del self.jobs[job.id]
+            retained -= 1
+            retained_bytes -= len(job.result or b"")
+
+
+class _ChunkSink:
+    """Write-only file that hands zip bytes from a render thread to the loop.
+
+    ``zipfile`` writes to it as an unseekable stream. Writes wait while the
+    queue is full, so a slow client holds back the render instead of
+    filling memory; once the response is gone, writes fail and the render
+    stops.
+    """
+
+    def __init__(
+        self, loop: asyncio.AbstractEventLoop, chunks: asyncio.Queue[bytes]
+    ) -> None:
+        self._loop = loop
+        self._chunks = chunks
+        self._closed = False
+
+    def write(self, data: bytes) -> int:
+        if self._closed:
+            raise OSError("The client stopped reading the image stream.")
+        put = asyncio.run_coroutine_threadsafe(
+            self._chunks.put(bytes(data)), self._loop
+        )
+        try:
+            put.result(IMAGE_STREAM_STALL_SECONDS)
+        except concurrent.futures.TimeoutError:
+            put.cancel()
+            raise OSError("The client stopped reading the image stream.") from None
+        return len(data)
+
+    def flush(self) -> None:
+        pass
+
+    def close(self) -> None:
+        """Stop accepting writes and unblock a writer waiting for room."""
+
+        self._closed = True
+        while not self._chunks.empty():
+            self._chunks.get_nowait()
+
+
+async def _stream_images(
+    render: asyncio.Future[Any], chunks: asyncio.Queue[bytes], sink: _ChunkSink
+) -> AsyncIterator[bytes]:
+    try:
+        while True:
+            chunk = asyncio.ensure_future(chunks.get())
+            done, _ = await asyncio.wait(
+                {chunk, render}, return_when=asyncio.FIRST_COMPLETED
+            )
+            if chunk in done:
+                yield chunk.result()
+                continue
+            chunk.cancel()
+            while not chunks.empty():
+                yield chunks.get_nowait()
+            # Abort the response on failure so the client sees a broken zip.
+            render.result()
+            return
+    finally:
+        sink.close()
+
+
+def _page_count(document: bytes) -> int:
+    import fitz
+
+    with fitz.open(stream=document, filetype="pdf") as pdf:
+        return pdf.page_count
+
+
+def _log_failure(task: asyncio.Future[Any]) -> None:
+    if not task.cancelled() and task.exception() is not None:
+        log.warning("Image stream failed: %s", task.exception())
+
+
+def _client_id(request: Request) -> str:
+    # Not a client-supplied header: a caller could pick a fresh one per request.
+    return request.client.host if request.client else "anonymous"
+
+
+def _etag_headers(key: str) -> dict[str, str]:
+    return {"ETag": f'"{key}"', "Cache-Control": "private, no-cache"}
+
+
+def _matches_etag(request: Request, key: str) -> bool:
+    return f'"{key}"' in request.headers.get("if-none-match", "")
+
+
+def _busy(error: RenderQueueFull) -> Response:
+    return JSONResponse(
+        {"detail": str(error)},
+        status_code=429,
+        headers={"Retry-After": str(max(1, math.ceil(error.retry_after)))},
+    )
+
+
+def _error(status_code: int, detail: str) -> Response:
+    return JSONResponse({"detail": detail}, status_code=status_code)
@@ -2,11 +2,19 @@ from __future__ import annotations
 
 import asyncio
 import base64
+import functools
+import importlib.util
+import inspect
 import json
+import logging
+import os
 import sys
+import tempfile
+from collections.abc import Callable
 from datetime import date
 from pathlib import Path
 from typing import Any
+from uuid import uuid4
 
 IS_PYODIDE = sys.platform == "emscripten"
 
@@ -15,19 +23,34 @@ if IS_PYODIDE:
 
 from nicegui import background_tasks, events, run, ui  # noqa: E402
 
-from models import ImageCatalog, Person, validate_people  # noqa: E402
+from importer import IMPORT_SUFFIXES, import_people  # noqa: E402
+from metrics import metrics  # noqa: E402
+from models import (  # noqa: E402
+    DEFAULT_IMAGE_DIR,
+    CatalogWatcher,
+    ImageCatalog,
+    Person,
+    validate_people,
+)
 from pdf_utils import (  # noqa: E402
     DEFAULT_LAYOUT_PATH,
+    DOWNLOAD_NAME,
+    DocumentCache,
     PdfGenerator,
+    RenderProgress,
     load_layout,
     load_pdf_project,
+    render_cooperatively,
     render_preview_png,
     save_layout,
 )
+from profiling import render_profiler  # noqa: E402
+from scheduler import Priority, RenderScheduler  # noqa: E402
+from sessions import ELEMENT_BYTES, estimate_bytes, session_registry  # noqa: E402
+from traffic import describe, traffic  # noqa: E402
 
 BASE_DIR = Path(__file__).resolve().parent
-IMAGE_DIR = BASE_DIR / "GUI" / "images" / "ontwerpen"
-DOWNLOAD_NAME = "naamkaartjes.pdf"
+IMAGE_DIR = DEFAULT_IMAGE_DIR
 APP_VERSION = "v2026"
 LAYOUT_STORAGE_KEY = "jufdea-layout-v2026"
 COLOR_SWATCHES = {
@@ -39,6 +62,18 @@ COLOR_SWATCHES = {
     "roze": "#EC5FA0",
 }
 FALLBACK_SWATCH = "#9E9E9E"
+MAX_IMPORT_ERRORS = 10
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+RENDER_CONCURRENCY = int(os.environ.get("JUFDEA_RENDER_CONCURRENCY", "4"))
+SESSION_SWEEP_SECONDS = 60
+SESSION_CLOSED_MESSAGE = (
+    "Deze sessie was te lang inactief en is gesloten. "
+    "Laad de pagina opnieuw om verder te werken."
+)
+CATALOG_POLL_SECONDS = float(os.environ.get("JUFDEA_CATALOG_POLL_SECONDS", "5"))
+PDF_OPTIMIZE = os.environ.get("JUFDEA_PDF_OPTIMIZE", "fast")
+
+log = logging.getLogger(__name__)
 
 
 async def _io_bound(function: Any, *args: Any) -> Any:
@@ -46,13 +81,112 @@ async def _io_bound(function: Any, *args: Any) -> Any:
 
     Pyodide runs in a browser sandbox without the thread helper used by the
     server build, so it executes the same function in the local interpreter.
+    Cooperative renders return a coroutine there, which is awaited so the page
+    stays responsive between steps. Jobs for remote render workers are
+    coroutines as well and only wait on the network.
     """
 
+    if inspect.iscoroutinefunction(function):
+        return await function(*args)
     if IS_PYODIDE:
-        return function(*args)
+        result = function(*args)
+        return await result if inspect.isawaitable(result) else result
     return await run.io_bound(function, *args)
 
 
+_pymupdf_install = asyncio.Lock()
+
+
+async def _ensure_pymupdf() -> None:
+    """Install PyMuPDF in the browser the first time a PDF is rasterised or read.
+
+    The static build leaves it out of the startup packages so the editor is
+    usable before the large wasm module has been downloaded.
+    """
+
+    if not IS_PYODIDE:
+        return
+    async with _pymupdf_install:
+        if importlib.util.find_spec("fitz") is not None:
+            return
+        import micropip  # type: ignore[import-not-found]
+        from js import window  # type: ignore[import-not-found]
+
+        window.console.log("JufDea: installing PyMuPDF")
+        await micropip.install("PyMuPDF")
+        window.console.log("JufDea: PyMuPDF installed")
+
+
+def _png_data_url(png: bytes) -> str:
+    with metrics.time(stage="base64"):
+        encoded = base64.b64encode(png).decode("ascii")
+    return f"data:image/png;base64,{encoded}"
+
+
+async def _fetch_designs(catalog: ImageCatalog, people: list[Person]) -> None:
+    """Download the designs ``people`` need that the browser has not fetched yet.
+
+    The static build ships only the design manifest; each image is fetched
+    from the same relative path on first use and kept in the browser's file
+    system (and in the service-worker cache for later visits).
+    """
+
+    if not IS_PYODIDE:
+        return
+    from pyodide.http import pyfetch  # type: ignore[import-not-found]
+
+    async def fetch(path: Path) -> None:
+        response = await pyfetch(f"./{path.relative_to(BASE_DIR).as_posix()}")
+        if not response.ok:
+            raise ValueError(f"Ontwerp {path.name} kon niet worden geladen.")
+        path.write_bytes(await response.bytes())
+
+    await asyncio.gather(*map(fetch, catalog.missing_images(people)))
+
+
+document_cache = DocumentCache()
+render_scheduler = RenderScheduler(
+    _io_bound,
+    concurrency=1 if IS_PYODIDE else RENDER_CONCURRENCY,
+)
+parse_pool: Any = None
+render_workers: Any = None
+
+
+@functools.cache
+def catalog_watcher() -> CatalogWatcher:
+    """Holds the design catalog of all sessions; hashing the images is costly."""
+
+    return CatalogWatcher(ImageCatalog(IMAGE_DIR))
+
+
+def shared_catalog() -> ImageCatalog:
+    """The current catalog version; new designs appear without a restart."""
+
+    return catalog_watcher().current
+
+
+async def _load_uploaded_project(path: Path, catalog: ImageCatalog) -> Any:
+    """Load an uploaded PDF in a sandboxed worker process where available."""
+
+    if render_workers is None and parse_pool is None:
+        await _ensure_pymupdf()
+        return await _io_bound(load_pdf_project, path, catalog)
+    # The load runs in another process whose own timing never reaches this
+    # server's /metrics, so time it here.
+    with metrics.time(stage="load_pdf_project"):
+        if render_workers is not None:
+            project = await render_workers.load(path)
+        else:
+            project = await parse_pool.load(path, catalog=catalog.fingerprint)
+    # The worker may have read another catalog version; a design removed since
+    # must not slip through.
+    errors = validate_people(project.people, catalog)
+    if errors:
+        raise ValueError(f"De opgeslagen gegevens zijn ongeldig: {errors[0]}")
+    return project
+
+
 def _load_active_layout() -> dict[str, Any]:
     layout = load_layout()
     if not IS_PYODIDE:
@@ -94,8 +228,9 @@ class AppPage:
     """One independent editor session in the browser."""
 
     def __init__(self) -> None:
-        self.catalog = ImageCatalog(IMAGE_DIR)
-        self.generator = PdfGenerator()
+        self.session_id = uuid4().hex
+        self.client = ui.context.client
+        self.generator = PdfGenerator(cache=document_cache, optimize=PDF_OPTIMIZE)
         self.layout = _load_active_layout()
         self.people = [self.catalog.new_person()]
         self.selected_person = self.people[0]
@@ -108,7 +243,75 @@ class AppPage:
         self.preview_caption: ui.label
         self.preview_spinner: ui.spinner
         self.count_label: ui.label
+        self.traffic_label: ui.label | None = None
+        self._deleting = False
+        traffic.attach(self.session_id, self.client)
         self._build()
+        session_registry.register(self)
+        self.client.on_disconnect(self._cancel_preview)
+        self.client.on_connect(self._resume_preview)
+        self.client.on_delete(self._client_deleted)
+
+    @property
+    def catalog(self) -> ImageCatalog:
+        # Every render picks up the newest catalog version.
+        return shared_catalog()
+
+    @property
+    def connected(self) -> bool:
+        return self.client.has_socket_connection and not self.client.is_deleted
+
+    def memory_usage(self) -> dict[str, int]:
+        """Estimate the bytes this session keeps; the catalog is shared."""
+
+        return {
+            "rijen": estimate_bytes(self.people),
+            "layout": estimate_bytes(self.layout),
+            "preview": len(self.preview.source or ""),
+            "elementen": len(self.client.elements) * ELEMENT_BYTES,
+        }
+
+    def close(self) -> None:
+        """Cancel pending renders and drop this session's rows and widgets."""
+
+        self._cancel_preview()
+        render_scheduler.forget(self.session_id)
+        traffic.forget(self.session_id)
+        document_cache.release(self.session_id)
+        self.people = []
+        self.preview_buttons.clear()
+        self.row_elements.clear()
+        if self._deleting or self.client.is_deleted:
+            return
+        if not self.connected:
+            self.client.delete()
+            return
+        # An idle tab that is still open keeps only a notice; reloading starts
+        # a new session.
+        for element in list(self.client.layout):
+            if element is not self.client.page_container:
+                element.delete()
+        self.client.content.clear()
+        with self.client.content:
+            ui.label(SESSION_CLOSED_MESSAGE).classes("text-lg")
+            ui.button("Opnieuw laden", icon="refresh", on_click=ui.navigate.reload)
+
+    def _client_deleted(self) -> None:
+        # NiceGUI runs delete handlers before it marks the client deleted.
+        self._deleting = True
+        session_registry.close(self.session_id)
+
+    def _cancel_preview(self) -> None:
+        # Only the preview: a download queued before a network blip still
+        # runs and is offered once the tab reconnects.
+        if self.preview_task and not self.preview_task.done():
+            self.preview_task.cancel()
+
+    def _resume_preview(self) -> None:
+        # A disconnect cancels the pending preview; redo it after reconnecting.
+        pending = self.preview_task is not None and not self.preview_task.done()
+        if self.people and self.preview_spinner.visible and not pending:
+            self._schedule_preview(delay=0)
 
     def _build(self) -> None:
         ui.colors(primary="#356859", secondary="#FD5523", accent="#F4B942")
@@ -127,6 +330,11 @@ class AppPage:
                 icon="folder_open",
                 on_click=self._open_pdf_dialog,
             ).props("flat no-caps rounded color=white")
+            ui.button(
+                "Leerlingen importeren",
+                icon="upload_file",
+                on_click=self._open_import_dialog,
+            ).props("flat no-caps rounded color=white")
             ui.button("Instellingen", icon="tune", on_click=self._open_settings).props(
                 "flat no-caps rounded color=white"
             )
@@ -175,8 +383,20 @@ class AppPage:
                     .props("no-spinner no-transition fit=contain")
                 )
 
+        if traffic.overlay and not IS_PYODIDE:
+            self.traffic_label = ui.label("").classes(
+                "fixed bottom-2 right-2 z-50 rounded bg-black/70 px-2 py-1 "
+                "font-mono text-xs text-white"
+            )
+            traffic.attribute(self.session_id, self.traffic_label.id, "overlay")
+            ui.timer(1.0, self._update_traffic_overlay)
+
         self._render_rows()
-        self._update_preview_now()
+        if IS_PYODIDE:
+            # Show the editor right away; the preview waits for PyMuPDF.
+            self._schedule_preview(delay=0)
+        else:
+            self._update_preview_now()
 
     def _render_rows(self) -> None:
         self.rows.clear()
@@ -184,163 +404,172 @@ class AppPage:
         self.row_elements.clear()
         with self.rows:
             for index, person in enumerate(self.people):
-                row = ui.row().classes(
-                    "person-row no-wrap w-full items-center gap-3 p-3 bg-white"
+                self._render_row(index, person)
+        self._update_count_label()
+        self._sync_preview_selection()
+
+    def _append_rows(self, people: list[Person]) -> None:
+        """Add rows for new people without rebuilding the existing rows."""
+
+        start = len(self.people)
+        self.people.extend(people)
+        with self.rows:
+            for index, person in enumerate(people, start=start):
+                self._render_row(index, person)
+        self._update_count_label()
+        self._sync_preview_selection()
+
+    def _render_row(self, index: int, person: Person) -> None:
+        row = ui.row().classes(
+            "person-row no-wrap w-full items-center gap-3 p-3 bg-white"
+        )
+        self.row_elements[id(person)] = row
+        with row:
+            with ui.column().classes("items-center gap-0 shrink-0"):
+                preview_button = (
+                    ui.button(
+                        "Toon",
+                        icon="visibility",
+                        on_click=lambda person=person: self._select_person(person),
+                    )
+                    .props("dense no-caps")
+                    .mark(f"preview-{index}")
+                    .tooltip("Toon deze rij in de preview")
                 )
-                self.row_elements[id(person)] = row
-                with row:
-                    with ui.column().classes("items-center gap-0 shrink-0"):
-                        preview_button = (
-                            ui.button(
-                                "Toon",
-                                icon="visibility",
-                                on_click=lambda person=person: self._select_person(
-                                    person
-                                ),
-                            )
-                            .props("dense no-caps")
-                            .mark(f"preview-{index}")
-                            .tooltip("Toon deze rij in de preview")
-                        )
-                        ui.label(f"Rij {index + 1}").classes("text-xs text-grey-6")
-                    self.preview_buttons[id(person)] = preview_button
-                    with ui.row().classes("grow items-center gap-2"):
-                        name_input = (
-                            ui.input(
-                                "Voornaam",
-                                value=person.name,
-                                on_change=lambda event, person=person: self._set_value(
-                                    person, "name", event.value
-                                ),
-                            )
-                            .props("dense outlined debounce=350")
-                            .classes("grow")
-                            .style("min-width: 130px")
-                            .mark(f"name-{index}")
-                        )
-                        family_input = (
-                            ui.input(
-                                "Familienaam",
-                                value=person.family_name,
-                                on_change=lambda event, person=person: self._set_value(
-                                    person, "family_name", event.value
-                                ),
-                            )
-                            .props("dense outlined debounce=350")
-                            .classes("grow")
-                            .style("min-width: 130px")
-                        )
-                        color_select = (
-                            ui.select(
-                                self.catalog.colors,
-                                label="Kleur",
-                                value=person.color,
-                            )
-                            .props("dense outlined")
-                            .classes("w-32")
-                        )
-                        with color_select.add_slot("prepend"):
-                            color_dot = ui.element("span").classes("color-dot")
-                        color_dot.style(
-                            f"background: "
-                            f"{COLOR_SWATCHES.get(person.color, FALLBACK_SWATCH)}"
-                        )
-                        color_select.on_value_change(
-                            lambda event,
-                            person=person,
-                            color_dot=color_dot: self._set_color(
-                                person,
-                                color_dot,
-                                event.value,
-                            )
-                        )
-                        scene_select = (
-                            ui.select(
-                                self.catalog.scenes,
-                                label="Afbeelding",
-                                value=person.scene,
-                                on_change=lambda event, person=person: self._set_value(
-                                    person, "scene", event.value
-                                ),
-                            )
-                            .props("dense outlined")
-                            .classes("w-32")
-                        )
-                        birth_input = (
-                            ui.input("Geboortedatum", value=person.birth_date)
-                            .props('dense outlined debounce=350 mask="##-##-####"')
-                            .classes("w-36")
-                            .mark(f"birth-date-{index}")
-                        )
-                        with birth_input:
-                            with ui.menu().props("no-parent-event") as calendar_menu:
-                                birth_picker = (
-                                    ui.date(
-                                        value=self._valid_birth_date(person.birth_date),
-                                        mask="DD-MM-YYYY",
-                                    )
-                                    .props("first-day-of-week=1")
-                                    .mark(f"birth-date-picker-{index}")
-                                )
-                            with birth_input.add_slot("append"):
-                                (
-                                    ui.icon("calendar_month")
-                                    .classes("cursor-pointer")
-                                    .on("click", calendar_menu.open)
-                                    .tooltip("Kies een datum")
-                                )
-                        birth_input.on_value_change(
-                            lambda event,
-                            person=person,
-                            birth_picker=birth_picker: self._type_birth_date(
-                                person,
-                                birth_picker,
-                                event.value,
-                            )
-                        )
-                        birth_picker.on_value_change(
-                            lambda event,
-                            person=person,
-                            birth_input=birth_input,
-                            calendar_menu=calendar_menu: self._pick_birth_date(
-                                person,
-                                birth_input,
-                                calendar_menu,
-                                event.value,
+                ui.label(f"Rij {index + 1}").classes("text-xs text-grey-6")
+            self.preview_buttons[id(person)] = preview_button
+            with ui.row().classes("grow items-center gap-2"):
+                name_input = (
+                    ui.input(
+                        "Voornaam",
+                        value=person.name,
+                        on_change=lambda event, person=person: self._set_value(
+                            person, "name", event.value
+                        ),
+                    )
+                    .props("dense outlined debounce=350")
+                    .classes("grow")
+                    .style("min-width: 130px")
+                    .mark(f"name-{index}")
+                )
+                family_input = (
+                    ui.input(
+                        "Familienaam",
+                        value=person.family_name,
+                        on_change=lambda event, person=person: self._set_value(
+                            person, "family_name", event.value
+                        ),
+                    )
+                    .props("dense outlined debounce=350")
+                    .classes("grow")
+                    .style("min-width: 130px")
+                )
+                color_select = (
+                    ui.select(
+                        self.catalog.colors,
+                        label="Kleur",
+                        value=person.color,
+                    )
+                    .props("dense outlined")
+                    .classes("w-32")
+                )
+                with color_select.add_slot("prepend"):
+                    color_dot = ui.element("span").classes("color-dot")
+                color_dot.style(
+                    f"background: {COLOR_SWATCHES.get(person.color, FALLBACK_SWATCH)}"
+                )
+                color_select.on_value_change(
+                    lambda event, person=person, color_dot=color_dot: self._set_color(
+                        person,
+                        color_dot,
+                        event.value,
+                    )
+                )
+                scene_select = (
+                    ui.select(
+                        self.catalog.scenes,
+                        label="Afbeelding",
+                        value=person.scene,
+                        on_change=lambda event, person=person: self._set_value(
+                            person, "scene", event.value
+                        ),
+                    )
+                    .props("dense outlined")
+                    .classes("w-32")
+                )
+                birth_input = (
+                    ui.input("Geboortedatum", value=person.birth_date)
+                    .props('dense outlined debounce=350 mask="##-##-####"')
+                    .classes("w-36")
+                    .mark(f"birth-date-{index}")
+                )
+                with birth_input:
+                    with ui.menu().props("no-parent-event") as calendar_menu:
+                        birth_picker = (
+                            ui.date(
+                                value=self._valid_birth_date(person.birth_date),
+                                mask="DD-MM-YYYY",
                             )
+                            .props("first-day-of-week=1")
+                            .mark(f"birth-date-picker-{index}")
                         )
-                        group_select = (
-                            ui.select(
-                                [1, 2],
-                                label="Groep",
-                                value=person.group,
-                                on_change=lambda event, person=person: self._set_value(
-                                    person, "group", int(event.value)
-                                ),
-                            )
-                            .props("dense outlined")
-                            .classes("w-24")
+                    with birth_input.add_slot("append"):
+                        (
+                            ui.icon("calendar_month")
+                            .classes("cursor-pointer")
+                            .on("click", calendar_menu.open)
+                            .tooltip("Kies een datum")
                         )
-                    ui.button(
-                        icon="delete_outline",
-                        on_click=lambda person=person: self._remove_person(person),
-                    ).props("flat round color=negative").classes("shrink-0").tooltip(
-                        "Verwijder rij"
+                birth_input.on_value_change(
+                    lambda event,
+                    person=person,
+                    birth_picker=birth_picker: self._type_birth_date(
+                        person,
+                        birth_picker,
+                        event.value,
                     )
-                    for control in (
-                        name_input,
-                        family_input,
-                        color_select,
-                        scene_select,
+                )
+                birth_picker.on_value_change(
+                    lambda event,
+                    person=person,
+                    birth_input=birth_input,
+                    calendar_menu=calendar_menu: self._pick_birth_date(
+                        person,
                         birth_input,
-                        group_select,
-                    ):
-                        control.on(
-                            "focus",
-                            lambda person=person: self._select_person(person),
-                        )
-        self._update_count_label()
-        self._sync_preview_selection()
+                        calendar_menu,
+                        event.value,
+                    )
+                )
+                group_select = (
+                    ui.select(
+                        [1, 2],
+                        label="Groep",
+                        value=person.group,
+                        on_change=lambda event, person=person: self._set_value(
+                            person, "group", int(event.value)
+                        ),
+                    )
+                    .props("dense outlined")
+                    .classes("w-24")
+                )
+            ui.button(
+                icon="delete_outline",
+                on_click=lambda person=person: self._remove_person(person),
+            ).props("flat round color=negative").classes("shrink-0").tooltip(
+                "Verwijder rij"
+            )
+            for control in (
+                name_input,
+                family_input,
+                color_select,
+                scene_select,
+                birth_input,
+                group_select,
+            ):
+                control.on(
+                    "focus",
+                    lambda person=person: self._select_person(person),
+                )
 
     def _update_count_label(self) -> None:
         total = len(self.people)
@@ -356,6 +585,7 @@ class AppPage:
         self._set_value(person, "color", value)
 
     def _set_value(self, person: Person, field: str, value: Any) -> None:
+        traffic.action(self.session_id, "type")
         setattr(person, field, value)
         self._set_selected_person(person)
         self._schedule_preview()
@@ -395,6 +625,7 @@ class AppPage:
     def _select_person(self, person: Person) -> None:
         if person is self.selected_person:
             return
+        traffic.action(self.session_id, "select")
         self._set_selected_person(person)
         self._schedule_preview(delay=0)
 
@@ -438,16 +669,17 @@ class AppPage:
                 )
 
     def _add_person(self) -> None:
+        traffic.action(self.session_id, "add_row")
         person = self.catalog.new_person()
-        self.people.append(person)
         self.selected_person = person
-        self._render_rows()
+        self._append_rows([person])
         self._schedule_preview(delay=0)
 
     def _remove_person(self, person: Person) -> None:
         if len(self.people) == 1:
             ui.notify("Er moet minstens één rij blijven staan.", type="warning")
             return
+        traffic.action(self.session_id, "remove_row")
         index = next(
             i for i, candidate in enumerate(self.people) if candidate is person
         )
@@ -458,14 +690,93 @@ class AppPage:
         self._schedule_preview(delay=0)
 
     def _preview_source(self) -> str:
-        pdf = self.generator.preview(
-            self.selected_person,
-            self.catalog,
-            self.layout,
+        person = self.selected_person
+        with render_profiler.profile("preview", [person], self.layout):
+            pdf = self.generator.preview(person, self.catalog, self.layout)
+            return _png_data_url(render_preview_png(pdf))
+
+    async def _preview_remote(self) -> str:
+        """Variant of ``_preview_source`` for out-of-process render workers."""
+
+        png = await render_workers.preview_png(
+            self.selected_person, self.layout, catalog=self.catalog.fingerprint
         )
-        png = render_preview_png(pdf)
-        encoded = base64.b64encode(png).decode("ascii")
-        return f"data:image/png;base64,{encoded}"
+        return _png_data_url(png)
+
+    async def _preview_in_steps(self, cancelled: Callable[[], bool]) -> str:
+        """Browser variant of ``_preview_source`` that yields after every card."""
+
+        pdf = await render_cooperatively(
+            self.generator.preview_steps(
+                self.selected_person, self.catalog, self.layout
+            ),
+            cancelled=cancelled,
+        )
+        return _png_data_url(render_preview_png(pdf))
+
+    def _render_document(
+        self, people: list[Person], catalog: ImageCatalog, layout: dict[str, Any]
+    ) -> bytes:
+        with render_profiler.profile("document", people, layout):
+            return self.generator.document(people, catalog, layout)
+
+    async def _document_remote(
+        self, people: list[Person], catalog: ImageCatalog, layout: dict[str, Any]
+    ) -> bytes:
+        """Render on a worker and keep the result for ``/api/documents``."""
+
+        key = self.generator.document_key(people, catalog, layout)
+        pdf = document_cache.get(key)
+        if pdf is None:
+            pdf = await render_workers.document(
+                people,
+                layout,
+                optimize=self.generator.optimize,
+                catalog=catalog.fingerprint,
+            )
+            document_cache.put(key, pdf)
+        return pdf
+
+    async def _document_in_steps(
+        self, people: list[Person], catalog: ImageCatalog, layout: dict[str, Any]
+    ) -> bytes:
+        """Browser variant of ``_render_document`` with progress and cancel."""
+
+        stopped = False
+
+        def stop() -> None:
+            nonlocal stopped
+            stopped = True
+
+        notification = ui.notification(
+            "PDF wordt gemaakt…",
+            spinner=True,
+            timeout=None,
+            close_button="Annuleren",
+            on_dismiss=stop,
+        )
+
+        def show(progress: RenderProgress) -> None:
+            notification.message = f"PDF wordt gemaakt… {progress.fraction:.0%}"
+
+        try:
+            return await render_cooperatively(
+                self.generator.document_steps(people, catalog, layout),
+                on_progress=show,
+                cancelled=lambda: stopped,
+            )
+        finally:
+            if not stopped:
+                notification.dismiss()
+
+    def _update_traffic_overlay(self) -> None:
+        assert self.traffic_label is not None
+        # The overlay's own updates are left out so an idle page stays quiet.
+        actions = traffic.session(self.session_id)
+        actions.pop("overlay", None)
+        text = describe(actions)
+        if text != self.traffic_label.text:
+            self.traffic_label.set_text(text)
 
     def _update_preview_now(self) -> None:
         try:
@@ -477,6 +788,7 @@ class AppPage:
         self.preview_error.set_visibility(False)
 
     def _schedule_preview(self, *, delay: float = 0.35) -> None:
+        session_registry.touch(self.session_id)
         if self.preview_task and not self.preview_task.done():
             self.preview_task.cancel()
         self.preview_spinner.set_visibility(True)
@@ -488,7 +800,20 @@ class AppPage:
     async def _update_preview_after(self, delay: float) -> None:
         try:
             await asyncio.sleep(delay)
-            source = await _io_bound(self._preview_source)
+            await _fetch_designs(self.catalog, [self.selected_person])
+            await _ensure_pymupdf()
+            render = (
+                functools.partial(
+                    self._preview_in_steps, cancelled=asyncio.current_task().done
+                )
+                if IS_PYODIDE
+                else self._preview_remote
+                if render_workers is not None
+                else self._preview_source
+            )
+            source = await render_scheduler.submit(
+                self.session_id, Priority.PREVIEW, render
+            )
         except asyncio.CancelledError:
             return
         except Exception as error:
@@ -496,36 +821,76 @@ class AppPage:
             self.preview_error.set_visibility(True)
             self.preview_spinner.set_visibility(False)
             return
+        traffic.action(self.session_id, "preview")
         self.preview.set_source(source)
         self.preview_error.set_visibility(False)
         self.preview_spinner.set_visibility(False)
 
-    def _download_pdf(self) -> None:
-        errors = validate_people(self.people, self.catalog)
+    async def _download_pdf(self) -> None:
+        session_registry.touch(self.session_id)
+        traffic.action(self.session_id, "download")
+        # Edits and catalog reloads during the render must not change what
+        # this download serves.
+        people, catalog, layout = list(self.people), self.catalog, self.layout
+        errors = validate_people(people, catalog)
         if errors:
             ui.notify(errors[0], type="negative", multi_line=True)
             return
 
         try:
-            pdf = self.generator.document(self.people, self.catalog, self.layout)
+            await _fetch_designs(catalog, people)
+            pdf = await render_scheduler.submit(
+                self.session_id,
+                Priority.DOWNLOAD,
+                self._document_renderer(),
+                people,
+                catalog,
+                layout,
+            )
+        except asyncio.CancelledError:
+            ui.notify("Het maken van de PDF is geannuleerd.")
+            return
         except Exception as error:
             ui.notify(f"PDF kon niet worden gemaakt: {error}", type="negative")
             return
 
-        ui.download.content(pdf, DOWNLOAD_NAME, "application/pdf")
+        if IS_PYODIDE:
+            ui.download.content(pdf, DOWNLOAD_NAME, "application/pdf")
+        else:
+            key = self.generator.document_key(people, catalog, layout)
+            # The cache may skip or evict the document before the browser asks.
+            document_cache.hold(self.session_id, key, pdf)
+            ui.download.from_url(f"/api/documents/{key}", DOWNLOAD_NAME)
         ui.notify("PDF is klaar.", type="positive")
 
+    def _document_renderer(
+        self,
+    ) -> Callable[[list[Person], ImageCatalog, dict[str, Any]], Any]:
+        if IS_PYODIDE:
+            return self._document_in_steps
+        if render_workers is not None:
+            return self._document_remote
+        return self._render_document
+
     def _open_pdf_dialog(self) -> None:
+        traffic.action(self.session_id, "open_pdf")
         dialog = ui.dialog()
 
         async def open_pdf(event: events.UploadEventArguments) -> None:
+            # Spool the upload to disk so concurrent uploads do not each keep a
+            # full copy in memory; PyMuPDF reads the file from there on demand.
+            with tempfile.NamedTemporaryFile(suffix=".pdf", delete=False) as file:
+                path = Path(file.name)
             try:
-                data = await event.file.read()
-                project = await _io_bound(load_pdf_project, data, self.catalog)
+                await event.file.save(path)
+                project = await _load_uploaded_project(path, self.catalog)
             except Exception as error:
                 ui.notify(f"PDF kon niet worden geopend: {error}", type="negative")
                 return
+            finally:
+                path.unlink(missing_ok=True)
 
+            traffic.action(self.session_id, "open_pdf")
             self.people = project.people
             self.layout = project.layout
             self.selected_person = self.people[0]
@@ -557,7 +922,69 @@ class AppPage:
                 ui.button("Sluiten", on_click=dialog.close).props("flat")
         dialog.open()
 
+    def _open_import_dialog(self) -> None:
+        traffic.action(self.session_id, "import")
+        dialog = ui.dialog()
+
+        async def import_file(event: events.UploadEventArguments) -> None:
+            try:
+                data = await event.file.read()
+                result = await _io_bound(
+                    lambda: import_people(data, self.catalog, filename=event.file.name)
+                )
+            except Exception as error:
+                ui.notify(f"Bestand kon niet worden gelezen: {error}", type="negative")
+                return
+
+            if result.errors:
+                errors.set_text("\n".join(result.errors[:MAX_IMPORT_ERRORS]))
+                if len(result.errors) > MAX_IMPORT_ERRORS:
+                    errors.set_text(
+                        f"{errors.text}\n… en nog "
+                        f"{len(result.errors) - MAX_IMPORT_ERRORS} fouten."
+                    )
+                errors.set_visibility(True)
+                return
+
+            traffic.action(self.session_id, "import")
+            self.selected_person = result.people[0]
+            if self.people == [self.catalog.new_person()]:
+                self.people = result.people
+                self._render_rows()
+            else:
+                self._append_rows(result.people)
+            self._schedule_preview(delay=0)
+            dialog.close()
+            ui.notify(
+                f"{len(result.people)} leerlingen geïmporteerd uit {event.file.name}.",
+                type="positive",
+            )
+
+        with dialog, ui.card().classes("app-card w-[560px] max-w-[95vw] p-5"):
+            ui.label("Leerlingen importeren").classes("text-xl font-semibold")
+            ui.label(
+                "Kies een CSV- of Excel-export met minstens de kolommen Voornaam, "
+                "Familienaam en Geboortedatum. Kleur, Afbeelding en Groep zijn "
+                "optioneel."
+            ).classes("text-sm text-grey-7")
+            ui.upload(
+                label="Bestand kiezen",
+                auto_upload=True,
+                max_file_size=25_000_000,
+                on_upload=import_file,
+                on_rejected=lambda: ui.notify(
+                    "Kies een bestand van maximaal 25 MB.",
+                    type="negative",
+                ),
+            ).props(f"accept={','.join(IMPORT_SUFFIXES)}").classes("w-full")
+            errors = ui.label("").classes("text-negative text-sm whitespace-pre-line")
+            errors.set_visibility(False)
+            with ui.row().classes("w-full justify-end"):
+                ui.button("Sluiten", on_click=dialog.close).props("flat")
+        dialog.open()
+
     def _open_settings(self) -> None:
+        traffic.action(self.session_id, "settings")
         dialog = ui.dialog()
         with dialog, ui.card().classes("app-card w-[800px] max-w-[95vw]"):
             ui.label("Layout-instellingen").classes("text-xl font-semibold")
@@ -595,12 +1022,107 @@ if IS_PYODIDE:
     with Client(page("/")) as client:
         AppPage()
 else:
+    from fastapi import Response
+    from fastapi.responses import JSONResponse
+    from nicegui import app as server
+
+    from api import RenderApi, RenderQueue
+    from warmup import warm_up
+
+    render_api = RenderApi(
+        shared_catalog(),
+        generator=PdfGenerator(cache=document_cache, optimize=PDF_OPTIMIZE),
+        queue=RenderQueue(scheduler=render_scheduler),
+    )
+    render_api.register(server)
+
+    @server.get("/metrics", include_in_schema=False)
+    def prometheus_metrics() -> Response:
+        if not metrics.enabled:
+            return Response(status_code=404)
+        return Response(metrics.render(), media_type=PROMETHEUS_CONTENT_TYPE)
+
+    from sandbox import ParseLimits, ParseWorkerPool
+
+    parse_pool = ParseWorkerPool(IMAGE_DIR, ParseLimits.from_env())
+    server.on_shutdown(parse_pool.close)
+
+    from render_worker import RenderWorkerPool
+
+    render_workers = RenderWorkerPool.from_env()
+    if render_workers is not None:
+        # Remote renders hold no local thread; let every worker stay busy.
+        render_scheduler.concurrency = max(
+            render_scheduler.concurrency, render_workers.capacity
+        )
+
+        async def _check_render_workers() -> None:
+            render_workers.catalog = (await run.io_bound(shared_catalog)).fingerprint
+            await render_workers.watch()
+
+        server.on_startup(
+            lambda: background_tasks.create(
+                _check_render_workers(), name="check render workers"
+            )
+        )
+        server.on_shutdown(render_workers.close)
+
+    import admin
+
+    admin.register(server, render_profiler, session_registry, traffic)
+
+    @server.get("/ready", include_in_schema=False)
+    def readiness() -> Response:
+        status_code, payload = warm_up.status()
+        return JSONResponse(payload, status_code=status_code)
 
     @ui.page("/")
     def index() -> None:
         AppPage()
 
+    def _start_warm_up() -> None:
+        background_tasks.create(
+            run.io_bound(
+                warm_up.run,
+                shared_catalog,
+                PdfGenerator(cache=document_cache),
+            ),
+            name="warm up renderer",
+        )
+
+    async def _evict_idle_sessions() -> None:
+        while True:
+            await asyncio.sleep(SESSION_SWEEP_SECONDS)
+            session_registry.evict_idle()
+
+    server.on_startup(
+        lambda: background_tasks.create(
+            _evict_idle_sessions(), name="evict idle sessions"
+        )
+    )
+
+    async def _watch_catalog() -> None:
+        watcher = catalog_watcher()
+        while True:
+            await asyncio.sleep(CATALOG_POLL_SECONDS)
+            try:
+                changed = await run.io_bound(watcher.poll)
+            except (OSError, ValueError):
+                log.exception("Design catalog not reloaded")
+                continue
+            if changed:
+                render_api.catalog = watcher.current
+                if render_workers is not None:
+                    render_workers.catalog = watcher.current.fingerprint
+                log.info("Design catalog version %d loaded", watcher.current.version)
+
+    if CATALOG_POLL_SECONDS > 0:
+        server.on_startup(
+            lambda: background_tasks.create(_watch_catalog(), name="watch catalog")
+        )
+
     def main() -> None:
+        server.on_startup(_start_warm_up)
         ui.run(title=f"Naamkaartjes {APP_VERSION}", favicon="🎓")
 
     if __name__ in {"__main__", "__mp_main__"}:
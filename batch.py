@@ -0,0 +1,241 @@
+"""Render many class projects to PDF without the browser UI.
+
+Example::
+
+    uv run python batch.py klassen/ naamkaartjes/ --workers 4
+    uv run python batch.py klassen/ naamkaartjes.zip --zip
+    uv run python batch.py klassen/ naamkaartjes/ --optimize smallest
+
+PyMuPDF, fpdf2 and the importer are only imported once there is work to do,
+so ``--help`` and argument errors return immediately.
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import sys
+import zipfile
+from collections.abc import Sequence
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass
+from pathlib import Path
+from time import perf_counter
+from typing import TYPE_CHECKING
+
+from models import DEFAULT_IMAGE_DIR, ImageCatalog, validate_people
+
+if TYPE_CHECKING:
+    from pdf_utils import PdfGenerator, PdfProject
+
+BATCH_SUFFIXES = (".json", ".csv", ".xlsx", ".pdf")
+# Mirrors pdf_utils.OPTIMIZE_MODES without importing fpdf2 for ``--help``.
+OPTIMIZE_MODES = ("fast", "balanced", "smallest")
+
+_catalog: ImageCatalog | None = None
+_generator: PdfGenerator | None = None
+
+
+@dataclass(slots=True)
+class BatchResult:
+    source: Path
+    output_name: str
+    seconds: float
+    pdf: bytes | None = None
+    error: str | None = None
+
+
+def find_sources(directory: Path) -> list[Path]:
+    """Return the project, class list and PDF files in ``directory``."""
+
+    return sorted(
+        path
+        for path in directory.iterdir()
+        if path.is_file() and path.suffix.lower() in BATCH_SUFFIXES
+    )
+
+
+def load_project_file(path: Path, catalog: ImageCatalog) -> PdfProject:
+    """Load a project JSON payload, CSV/XLSX class list or JufDea PDF."""
+
+    from importer import import_people
+    from pdf_utils import PdfProject, decode_project, load_layout, load_pdf_project
+
+    suffix = path.suffix.lower()
+    if suffix == ".json":
+        project = decode_project(path.read_bytes())
+    elif suffix == ".pdf":
+        # This already runs in one of the batch's worker processes; a page
+        # pool per file would multiply them.
+        return load_pdf_project(path, catalog, parallel=False)
+    else:
+        result = import_people(path, catalog)
+        if result.errors:
+            raise ValueError(result.errors[0])
+        project = PdfProject(result.people, load_layout())
+
+    errors = validate_people(project.people, catalog)
+    if errors:
+        raise ValueError(errors[0])
+    return project
+
+
+def render_file(path: Path, output_name: str) -> BatchResult:
+    """Render one source file in a worker process."""
+
+    if _catalog is None or _generator is None:
+        _init_worker(DEFAULT_IMAGE_DIR)
+    assert _catalog is not None and _generator is not None
+
+    start = perf_counter()
+    try:
+        project = load_project_file(path, _catalog)
+        pdf = _generator.document(project.people, _catalog, project.layout)
+    except Exception as error:
+        return BatchResult(path, output_name, perf_counter() - start, error=str(error))
+    return BatchResult(path, output_name, perf_counter() - start, pdf=pdf)
+
+
+def run_batch(
+    sources: Sequence[Path],
+    output: Path,
+    *,
+    as_zip: bool = False,
+    workers: int | None = None,
+    image_dir: Path = DEFAULT_IMAGE_DIR,
+    optimize: str = "fast",
+) -> list[BatchResult]:
+    """Render ``sources`` across a process pool into a folder or a zip file.
+
+    Results are written as soon as each file finishes and returned in the
+    order of ``sources``. PDF bytes are dropped from the returned results once
+    they have been written.
+    """
+
+    names = _output_names(sources)
+    results: dict[Path, BatchResult] = {}
+    if not as_zip:
+        output.mkdir(parents=True, exist_ok=True)
+    archive = zipfile.ZipFile(output, "w") if as_zip else None
+    try:
+        with ProcessPoolExecutor(
+            max_workers=workers,
+            initializer=_init_worker,
+            initargs=(image_dir, optimize),
+        ) as executor:
+            futures = {
+                executor.submit(render_file, source, names[source]): source
+                for source in sources
+            }
+            for future in as_completed(futures):
+                source = futures[future]
+                try:
+                    result = future.result()
+                except BrokenProcessPool:
+                    # A worker died (e.g. out of memory); the pool fails every
+                    # file still in it, and each is reported on its own.
+                    result = BatchResult(
+                        source,
+                        names[source],
+                        0.0,
+                        error="Het verwerkingsproces is onverwacht gestopt.",
+                    )
+                except Exception as error:
+                    result = BatchResult(source, names[source], 0.0, error=str(error))
+                if result.pdf is not None:
+                    if archive is not None:
+                        archive.writestr(result.output_name, result.pdf)
+                    else:
+                        (output / result.output_name).write_bytes(result.pdf)
+                    result.pdf = None
+                results[result.source] = result
+    finally:
+        if archive is not None:
+            archive.close()
+    return [results[source] for source in sources]
+
+
+def main(argv: Sequence[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(
+        description="Maak naamkaartjes voor een hele map met klassen."
+    )
+    parser.add_argument(
+        "input",
+        type=Path,
+        help="map met project-JSON-, CSV-, XLSX- of JufDea-PDF-bestanden",
+    )
+    parser.add_argument("output", type=Path, help="uitvoermap of zip-bestand")
+    parser.add_argument(
+        "--zip",
+        action="store_true",
+        help="schrijf alle PDF's in één zip-bestand",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=os.cpu_count(),
+        help="aantal parallelle processen",
+    )
+    parser.add_argument(
+        "--images",
+        type=Path,
+        default=DEFAULT_IMAGE_DIR,
+        help="map met kaartontwerpen",
+    )
+    parser.add_argument(
+        "--optimize",
+        choices=OPTIMIZE_MODES,
+        default="fast",
+        help="fast: meteen wegschrijven, balanced: kleiner bestand, "
+        "smallest: ook afbeeldingen verkleinen",
+    )
+    args = parser.parse_args(argv)
+
+    sources = find_sources(args.input)
+    if not sources:
+        parser.error(f"Geen bruikbare bestanden gevonden in {args.input}.")
+
+    start = perf_counter()
+    results = run_batch(
+        sources,
+        args.output,
+        as_zip=args.zip,
+        workers=args.workers,
+        image_dir=args.images,
+        optimize=args.optimize,
+    )
+    failures = [result for result in results if result.error]
+    for result in results:
+        status = "FOUT" if result.error else "ok"
+        detail = result.error or result.output_name
+        print(f"{status:4} {result.seconds:7.2f}s  {result.source.name}: {detail}")
+    print(
+        f"{len(results) - len(failures)} van {len(results)} bestanden gelukt "
+        f"in {perf_counter() - start:.2f}s."
+    )
+    return 1 if failures else 0
+
+
+def _init_worker(image_dir: Path, optimize: str = "fast") -> None:
+    global _catalog, _generator
+    from pdf_utils import PdfGenerator
+
+    _catalog = ImageCatalog(image_dir)
+    _generator = PdfGenerator(optimize=optimize)
+
+
+def _output_names(sources: Sequence[Path]) -> dict[Path, str]:
+    names: dict[Path, str] = {}
+    used: set[str] = set()
+    for source in sources:
+        name = f"{source.stem}.pdf"
+        if name in used:
+            name = f"{source.stem}-{source.suffix.lstrip('.').lower()}.pdf"
+        used.add(name)
+        names[source] = name
+    return names
+
+
+if __name__ == "__main__":
+    sys.exit(main())
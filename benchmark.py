@@ -0,0 +1,340 @@
+"""Measure the rendering and loading hot paths on synthetic classes.
+
+Results are written as JSON so a run after an fpdf2 or PyMuPDF upgrade can be
+compared with a saved baseline. Example::
+
+    uv run python benchmark.py run --output baseline.json
+    uv run python benchmark.py run --output nu.json
+    uv run python benchmark.py compare baseline.json nu.json --threshold 0.2
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import platform
+import random
+import statistics
+import sys
+import tracemalloc
+from collections.abc import Callable, Sequence
+from dataclasses import asdict, dataclass
+from datetime import date, timedelta
+from pathlib import Path
+from time import perf_counter
+from typing import Any
+
+import fitz
+import fpdf
+from fpdf import FPDF
+
+from importer import import_people
+from models import DEFAULT_IMAGE_DIR, ImageCatalog, Person
+from pdf_utils import (
+    OPTIMIZE_MODES,
+    PROJECT_ATTACHMENT,
+    PdfGenerator,
+    load_layout,
+    load_pdf_project,
+    optimize_pdf,
+    render_preview_png,
+)
+
+DOCUMENT_SIZES = (1, 30, 300, 2000)
+LOAD_SIZE = 30
+IMPORT_SIZE = 5_000
+DEFAULT_THRESHOLD = 0.2
+
+_FIRST_NAMES = (
+    "Ada", "Bram", "Chloë", "Daan", "Elif", "Finn", "Lotte", "Mila", "Noah",
+    "Ouassim", "Saar", "Tuur", "Wout", "Yara", "Zoë",
+)  # fmt: skip
+_FAMILY_NAMES = (
+    "Peeters", "Janssens", "Maes", "Jacobs", "Mertens", "Willems", "Claes",
+    "Goossens", "Wouters", "De Smet", "El Amrani", "Van den Broeck",
+)  # fmt: skip
+
+
+@dataclass(slots=True)
+class BenchmarkResult:
+    name: str
+    runs: int
+    p50_seconds: float
+    p95_seconds: float
+    mean_seconds: float
+    peak_bytes: int
+
+
+def synthetic_class(
+    catalog: ImageCatalog,
+    size: int,
+    *,
+    seed: int = 0,
+) -> list[Person]:
+    """Return ``size`` valid, distinct pupils spread over the catalog designs."""
+
+    generator = random.Random(seed)
+    selections = sorted(catalog.selections)
+    people = []
+    for index in range(size):
+        scene, color = generator.choice(selections)
+        group = 1 if generator.random() < 0.5 else 2
+        born = date(2021 - group, 1, 1) + timedelta(days=generator.randrange(365))
+        people.append(
+            Person(
+                name=f"{generator.choice(_FIRST_NAMES)} {index + 1}",
+                family_name=generator.choice(_FAMILY_NAMES),
+                color=color,
+                scene=scene,
+                birth_date=born.strftime("%d-%m-%Y"),
+                group=group,
+            )
+        )
+    return people
+
+
+def table_pdf(people: Sequence[Person]) -> bytes:
+    """Build a PDF in the older ``table.json`` attachment format."""
+
+    table: dict[str, dict[str, Any]] = {}
+    for index, person in enumerate(people):
+        for key, value in person.to_dict().items():
+            table.setdefault(key, {})[str(index)] = value
+    pdf = FPDF()
+    pdf.add_page()
+    pdf.embed_file(
+        bytes=json.dumps(table).encode(),
+        basename="table.json",
+        mime_type="application/json",
+    )
+    pdf.embed_file(
+        bytes=json.dumps(load_layout()).encode(),
+        basename="layout.json",
+        mime_type="application/json",
+    )
+    return bytes(pdf.output())
+
+
+def class_list_csv(people: Sequence[Person]) -> bytes:
+    """Build a class list as exported by the school administration."""
+
+    rows = "".join(
+        f"{person.name},{person.family_name},{person.birth_date}\n" for person in people
+    )
+    return f"Voornaam,Familienaam,Geboortedatum\n{rows}".encode()
+
+
+def legacy_pdf(document: bytes) -> bytes:
+    """Strip the project attachment so loading has to reconstruct the rows."""
+
+    with fitz.open(stream=document, filetype="pdf") as pdf:
+        pdf.embfile_del(PROJECT_ATTACHMENT)
+        return pdf.tobytes()
+
+
+def measure(name: str, function: Callable[[], Any], runs: int) -> BenchmarkResult:
+    """Time ``function`` ``runs`` times, then once more under tracemalloc.
+
+    Peak memory is measured in a separate call because tracing allocations
+    slows Python code down and would distort the timings.
+    """
+
+    function()
+    timings = []
+    for _ in range(runs):
+        start = perf_counter()
+        function()
+        timings.append(perf_counter() - start)
+
+    tracemalloc.start()
+    try:
+        function()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    timings.sort()
+    return BenchmarkResult(
+        name=name,
+        runs=runs,
+        p50_seconds=statistics.median(timings),
+        p95_seconds=timings[min(len(timings) - 1, round(0.95 * (len(timings) - 1)))],
+        mean_seconds=statistics.fmean(timings),
+        peak_bytes=peak,
+    )
+
+
+def run_suite(
+    *,
+    image_dir: Path = DEFAULT_IMAGE_DIR,
+    sizes: Sequence[int] = DOCUMENT_SIZES,
+    load_size: int = LOAD_SIZE,
+    import_size: int = IMPORT_SIZE,
+    runs: int = 5,
+    report: Callable[[BenchmarkResult], None] | None = None,
+) -> dict[str, Any]:
+    """Run every benchmark and return the JSON-serialisable results."""
+
+    catalog = ImageCatalog(image_dir)
+    generator = PdfGenerator()
+    results: list[BenchmarkResult] = []
+
+    def add(name: str, function: Callable[[], Any], count: int = runs) -> None:
+        result = measure(name, function, count)
+        results.append(result)
+        if report is not None:
+            report(result)
+
+    add("catalog", lambda: ImageCatalog(image_dir))
+    person = synthetic_class(catalog, 1)[0]
+    add(
+        "preview",
+        lambda: render_preview_png(generator.preview(person, catalog)),
+        max(runs, 20),
+    )
+    for size in sizes:
+        people = synthetic_class(catalog, size)
+        # Very large documents take seconds each; a few runs are enough.
+        count = max(1, runs if size <= 300 else runs // 3)
+        add(f"document[{size}]", lambda p=people: generator.document(p, catalog), count)
+
+    people = synthetic_class(catalog, load_size)
+    current = generator.document(people, catalog)
+    sources = {
+        "current": current,
+        "table": table_pdf(people),
+        "legacy": legacy_pdf(current),
+    }
+    for kind, source in sources.items():
+        add(
+            f"load[{kind}]",
+            lambda source=source: load_pdf_project(source, catalog),
+        )
+
+    class_list = class_list_csv(synthetic_class(catalog, import_size))
+    add(
+        f"import[{import_size}]",
+        lambda: import_people(class_list, catalog, filename="school.csv"),
+    )
+
+    # Time and size of each optimize mode on the same document.
+    sizes: dict[str, dict[str, int]] = {}
+    for mode in OPTIMIZE_MODES:
+        add(f"optimize[{mode}]", lambda mode=mode: optimize_pdf(current, mode))
+        _, optimize_report = optimize_pdf(current, mode)
+        sizes[mode] = {
+            "bytes": optimize_report.optimized_bytes,
+            "saved_bytes": optimize_report.saved_bytes,
+        }
+
+    return {
+        "environment": {
+            "python": platform.python_version(),
+            "fpdf2": fpdf.__version__,
+            "pymupdf": fitz.VersionBind,
+            "platform": platform.platform(),
+        },
+        "benchmarks": {result.name: asdict(result) for result in results},
+        "optimize_sizes": sizes,
+    }
+
+
+def compare(
+    baseline: dict[str, Any],
+    current: dict[str, Any],
+    threshold: float = DEFAULT_THRESHOLD,
+) -> list[str]:
+    """Describe every benchmark that got slower or bigger beyond ``threshold``.
+
+    Medians are compared for time so a single noisy run does not count as a
+    regression; peak memory is compared directly.
+    """
+
+    regressions = []
+    for name, before in baseline["benchmarks"].items():
+        after = current["benchmarks"].get(name)
+        if after is None:
+            continue
+        for metric in ("p50_seconds", "peak_bytes"):
+            if before[metric] and after[metric] > before[metric] * (1 + threshold):
+                change = after[metric] / before[metric] - 1
+                regressions.append(
+                    f"{name} {metric}: {before[metric]:.4g} -> "
+                    f"{after[metric]:.4g} (+{change:.0%})"
+                )
+    return regressions
+
+
+def main(argv: Sequence[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(
+        description="Meet de snelheid van renderen en inladen."
+    )
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = commands.add_parser("run", help="voer alle metingen uit")
+    run_parser.add_argument(
+        "--output", type=Path, required=True, help="JSON-bestand voor de resultaten"
+    )
+    run_parser.add_argument(
+        "--sizes",
+        type=int,
+        nargs="+",
+        default=list(DOCUMENT_SIZES),
+        help="klasgroottes voor de volledige PDF",
+    )
+    run_parser.add_argument(
+        "--runs", type=int, default=5, help="aantal herhalingen per meting"
+    )
+    run_parser.add_argument(
+        "--images",
+        type=Path,
+        default=DEFAULT_IMAGE_DIR,
+        help="map met kaartontwerpen",
+    )
+
+    compare_parser = commands.add_parser(
+        "compare", help="vergelijk met een opgeslagen baseline"
+    )
+    compare_parser.add_argument("baseline", type=Path)
+    compare_parser.add_argument("current", type=Path)
+    compare_parser.add_argument(
+        "--threshold",
+        type=float,
+        default=DEFAULT_THRESHOLD,
+        help="toegelaten vertraging, bijvoorbeeld 0.2 voor 20%%",
+    )
+    args = parser.parse_args(argv)
+
+    if args.command == "run":
+        results = run_suite(
+            image_dir=args.images,
+            sizes=args.sizes,
+            runs=args.runs,
+            report=lambda result: print(
+                f"{result.name:16} p50 {result.p50_seconds * 1000:9.1f} ms  "
+                f"p95 {result.p95_seconds * 1000:9.1f} ms  "
+                f"piek {result.peak_bytes / 1_000_000:7.1f} MB"
+            ),
+        )
+        for mode, size in results["optimize_sizes"].items():
+            print(
+                f"{mode:16} {size['bytes'] / 1_000_000:7.2f} MB  "
+                f"bespaard {size['saved_bytes'] / 1_000_000:7.2f} MB"
+            )
+        args.output.write_text(json.dumps(results, indent=4) + "\n", encoding="utf-8")
+        return 0
+
+    regressions = compare(
+        json.loads(args.baseline.read_text(encoding="utf-8")),
+        json.loads(args.current.read_text(encoding="utf-8")),
+        args.threshold,
+    )
+    for regression in regressions:
+        print(f"TRAGER {regression}")
+    if not regressions:
+        print("Geen achteruitgang boven de drempel.")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
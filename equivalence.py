@@ -0,0 +1,382 @@
+"""Check that an alternative render path produces the same cards as the reference.
+
+Every case is rendered by ``PdfGenerator.document`` and by a candidate path.
+Both PDFs are rasterised with PyMuPDF and compared pixel by pixel within a
+tolerance, together with the extracted words and the image placements.
+Example::
+
+    uv run python equivalence.py --candidate warm
+    uv run python equivalence.py --candidate mijn_module:render --zoom 2
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import copy
+import importlib
+import sys
+from collections.abc import Callable, Sequence
+from dataclasses import dataclass, field
+from hashlib import sha256
+from pathlib import Path
+from typing import Any
+
+import fitz
+from PIL import Image, ImageChops
+
+from benchmark import synthetic_class
+from models import DEFAULT_IMAGE_DIR, ImageCatalog, Person
+from pdf_utils import DocumentCache, PdfGenerator, load_layout, render_cooperatively
+
+# Maximum difference per colour channel before a pixel counts as changed.
+CHANNEL_TOLERANCE = 16
+# Fraction of changed pixels a page may have; anti-aliasing noise stays below.
+PIXEL_TOLERANCE = 0.0005
+# Text and images may move this many points before they count as moved.
+POSITION_TOLERANCE = 0.5
+
+Renderer = Callable[[Sequence[Person], ImageCatalog, dict[str, Any]], bytes]
+
+
+@dataclass(slots=True)
+class Case:
+    name: str
+    people: list[Person]
+    layout: dict[str, Any]
+
+
+@dataclass(slots=True)
+class CaseResult:
+    name: str
+    differences: list[str] = field(default_factory=list)
+
+    @property
+    def equivalent(self) -> bool:
+        return not self.differences
+
+
+def reference_renderer() -> Renderer:
+    return PdfGenerator().document
+
+
+def warm_renderer() -> Renderer:
+    """Serve every document from a cache shared with all earlier cases.
+
+    One generator fills the cache and a fresh one reads the document back, as
+    different sessions of the server do. Because every earlier case is in the
+    same cache, a cache key that misses part of the input returns another
+    case's document and fails the comparison with the cold reference render.
+    """
+
+    cache = DocumentCache()
+
+    def render(
+        people: Sequence[Person],
+        catalog: ImageCatalog,
+        layout: dict[str, Any],
+    ) -> bytes:
+        PdfGenerator(cache=cache).document(people, catalog, layout)
+        return PdfGenerator(cache=cache).document(people, catalog, layout)
+
+    return render
+
+
+def preview_renderer() -> Renderer:
+    """Assemble documents from single previews, as the editor shows them."""
+
+    generator = PdfGenerator()
+    reference = PdfGenerator()
+
+    def render(
+        people: Sequence[Person],
+        catalog: ImageCatalog,
+        layout: dict[str, Any],
+    ) -> bytes:
+        with fitz.open(
+            stream=reference.document(people, catalog, layout), filetype="pdf"
+        ) as document:
+            first_person_page = document.page_count - len(people)
+            for index, person in enumerate(people):
+                preview = generator.preview(person, catalog, layout)
+                with fitz.open(stream=preview, filetype="pdf") as page:
+                    target = first_person_page + index
+                    document.delete_page(target)
+                    document.insert_pdf(page, start_at=target)
+            return document.tobytes()
+
+    return render
+
+
+def cooperative_renderer() -> Renderer:
+    """Render page by page on an event loop, as the browser build does."""
+
+    generator = PdfGenerator()
+
+    def render(
+        people: Sequence[Person],
+        catalog: ImageCatalog,
+        layout: dict[str, Any],
+    ) -> bytes:
+        steps = generator.document_steps(people, catalog, layout)
+        return asyncio.run(render_cooperatively(steps))
+
+    return render
+
+
+RENDERERS: dict[str, Callable[[], Renderer]] = {
+    "reference": reference_renderer,
+    "warm": warm_renderer,
+    "preview": preview_renderer,
+    "cooperative": cooperative_renderer,
+}
+
+
+def synthetic_cases(
+    catalog: ImageCatalog, *, sizes: Sequence[int] = (1, 30)
+) -> list[Case]:
+    """Return synthetic classes crossed with layout variants and edge-case names."""
+
+    layout = load_layout()
+    smaller_text = copy.deepcopy(layout)
+    for details in smaller_text["Types"].values():
+        details["Text"]["font-size"] = max(1, int(details["Text"]["font-size"]) // 2)
+    portrait = copy.deepcopy(layout)
+    for details in portrait["Types"].values():
+        details["Size & positions"]["portrait"] = True
+    layouts = {"standaard": layout, "kleine-tekst": smaller_text, "portret": portrait}
+
+    unusual = synthetic_class(catalog, 4, seed=1)
+    unusual[0].name = "Maximiliaan-Alexander-Constantijn"
+    unusual[1].name = "Zoë-Ëlla"
+    unusual[2].name = "A"
+    unusual[3].family_name = "Van den Broeck-El Amrani"
+
+    cases = [
+        Case(f"{layout_name}-{size}", synthetic_class(catalog, size), variant)
+        for layout_name, variant in layouts.items()
+        for size in sizes
+    ]
+    cases += [
+        Case(f"{layout_name}-namen", unusual, variant)
+        for layout_name, variant in layouts.items()
+    ]
+    return cases
+
+
+def compare_pdfs(
+    reference: bytes,
+    candidate: bytes,
+    *,
+    zoom: float = 1.0,
+    channel_tolerance: int = CHANNEL_TOLERANCE,
+    pixel_tolerance: float = PIXEL_TOLERANCE,
+) -> list[str]:
+    """Describe how ``candidate`` renders differently from ``reference``."""
+
+    if reference == candidate:
+        return []
+    differences: list[str] = []
+    with (
+        fitz.open(stream=reference, filetype="pdf") as expected,
+        fitz.open(stream=candidate, filetype="pdf") as actual,
+    ):
+        if expected.page_count != actual.page_count:
+            return [f"{expected.page_count} pagina's verwacht, {actual.page_count}."]
+        matrix = fitz.Matrix(zoom, zoom)
+        digests: tuple[dict[int, bytes], dict[int, bytes]] = ({}, {})
+        for number, (expected_page, actual_page) in enumerate(
+            zip(expected, actual, strict=True), start=1
+        ):
+            differences += [
+                f"pagina {number}: {difference}"
+                for difference in _compare_pages(
+                    expected_page,
+                    actual_page,
+                    matrix,
+                    channel_tolerance,
+                    pixel_tolerance,
+                    digests,
+                )
+            ]
+    return differences
+
+
+def check_equivalence(
+    candidate: Renderer,
+    cases: Sequence[Case],
+    catalog: ImageCatalog,
+    *,
+    reference: Renderer | None = None,
+    zoom: float = 1.0,
+) -> list[CaseResult]:
+    reference = reference or reference_renderer()
+    return [
+        CaseResult(
+            case.name,
+            compare_pdfs(
+                reference(case.people, catalog, case.layout),
+                candidate(case.people, catalog, case.layout),
+                zoom=zoom,
+            ),
+        )
+        for case in cases
+    ]
+
+
+def main(argv: Sequence[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(
+        description="Controleer of een andere renderweg dezelfde kaartjes maakt."
+    )
+    parser.add_argument(
+        "--candidate",
+        default="warm",
+        help=(
+            f"te controleren renderweg: {', '.join(RENDERERS)} of "
+            "module:functie met dezelfde argumenten als PdfGenerator.document"
+        ),
+    )
+    parser.add_argument(
+        "--zoom", type=float, default=1.0, help="resolutie van de vergelijking"
+    )
+    parser.add_argument(
+        "--sizes",
+        type=int,
+        nargs="+",
+        default=[1, 30],
+        help="klasgroottes van de synthetische gevallen",
+    )
+    parser.add_argument(
+        "--images",
+        type=Path,
+        default=DEFAULT_IMAGE_DIR,
+        help="map met kaartontwerpen",
+    )
+    args = parser.parse_args(argv)
+
+    catalog = ImageCatalog(args.images)
+    try:
+        candidate = _load_renderer(args.candidate)
+    except (ImportError, AttributeError, ValueError) as error:
+        parser.error(f"Onbekende renderweg '{args.candidate}': {error}")
+    results = check_equivalence(
+        candidate,
+        synthetic_cases(catalog, sizes=args.sizes),
+        catalog,
+        zoom=args.zoom,
+    )
+    for result in results:
+        print(f"{'ok' if result.equivalent else 'VERSCHIL':8} {result.name}")
+        for difference in result.differences:
+            print(f"         {difference}")
+    failures = sum(not result.equivalent for result in results)
+    print(f"{len(results) - failures} van {len(results)} gevallen gelijk.")
+    return 1 if failures else 0
+
+
+def _load_renderer(name: str) -> Renderer:
+    if name in RENDERERS:
+        return RENDERERS[name]()
+    module_name, separator, function_name = name.partition(":")
+    if not separator:
+        raise ValueError("gebruik module:functie")
+    return getattr(importlib.import_module(module_name), function_name)
+
+
+def _compare_pages(
+    expected: fitz.Page,
+    actual: fitz.Page,
+    matrix: fitz.Matrix,
+    channel_tolerance: int,
+    pixel_tolerance: float,
+    digests: tuple[dict[int, bytes], dict[int, bytes]],
+) -> list[str]:
+    differences = []
+    expected_words = _words(expected)
+    actual_words = _words(actual)
+    if [word for word, _ in expected_words] != [word for word, _ in actual_words]:
+        differences.append(
+            f"tekst {_text(expected_words)!r} werd {_text(actual_words)!r}"
+        )
+    elif any(
+        not _close(expected_box, actual_box)
+        for (_, expected_box), (_, actual_box) in zip(
+            expected_words, actual_words, strict=True
+        )
+    ):
+        differences.append("tekst staat op een andere plaats")
+
+    if _image_digests(expected, digests[0]) != _image_digests(actual, digests[1]):
+        differences.append("andere afbeeldingen")
+    expected_boxes = _image_boxes(expected)
+    actual_boxes = _image_boxes(actual)
+    if len(expected_boxes) != len(actual_boxes) or any(
+        not _close(expected_box, actual_box)
+        for expected_box, actual_box in zip(expected_boxes, actual_boxes, strict=True)
+    ):
+        differences.append("afbeeldingen staan op een andere plaats")
+
+    expected_pixels = expected.get_pixmap(matrix=matrix, alpha=False)
+    actual_pixels = actual.get_pixmap(matrix=matrix, alpha=False)
+    if (expected_pixels.width, expected_pixels.height) != (
+        actual_pixels.width,
+        actual_pixels.height,
+    ):
+        differences.append("ander paginaformaat")
+        return differences
+    changed = _changed_pixels(expected_pixels, actual_pixels, channel_tolerance)
+    total = expected_pixels.width * expected_pixels.height
+    if changed / total > pixel_tolerance:
+        differences.append(f"{changed} van {total} pixels verschillen")
+    return differences
+
+
+def _words(page: fitz.Page) -> list[tuple[str, tuple[float, ...]]]:
+    return [(word[4], tuple(word[:4])) for word in page.get_text("words", sort=True)]
+
+
+def _text(words: list[tuple[str, tuple[float, ...]]]) -> str:
+    return " ".join(word for word, _ in words)
+
+
+def _image_digests(page: fitz.Page, digests: dict[int, bytes]) -> list[bytes]:
+    # Hash the stored image streams once per document; asking PyMuPDF for
+    # per-placement hashes decodes and hashes every image on every page.
+    for image in page.get_images(full=True):
+        xref = image[0]
+        if xref not in digests:
+            digests[xref] = sha256(page.parent.xref_stream_raw(xref)).digest()
+    return sorted(digests[image[0]] for image in page.get_images(full=True))
+
+
+def _image_boxes(page: fitz.Page) -> list[tuple[float, ...]]:
+    return sorted(tuple(info["bbox"]) for info in page.get_image_info())
+
+
+def _close(first: tuple[float, ...], second: tuple[float, ...]) -> bool:
+    return all(
+        abs(a - b) <= POSITION_TOLERANCE for a, b in zip(first, second, strict=True)
+    )
+
+
+def _changed_pixels(
+    expected: fitz.Pixmap,
+    actual: fitz.Pixmap,
+    tolerance: int,
+) -> int:
+    if expected.samples == actual.samples:
+        return 0
+    size = (expected.width, expected.height)
+    difference = ImageChops.difference(
+        Image.frombytes("RGB", size, expected.samples),
+        Image.frombytes("RGB", size, actual.samples),
+    )
+    # Per pixel, keep the largest channel difference and count those above
+    # the tolerance.
+    red, green, blue = difference.split()
+    largest = ImageChops.lighter(ImageChops.lighter(red, green), blue)
+    return sum(largest.histogram()[tolerance + 1 :])
+
+
+if __name__ == "__main__":
+    sys.exit(main())
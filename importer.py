@@ -0,0 +1,302 @@
+from __future__ import annotations
+
+import csv
+import io
+import re
+import zipfile
+from collections.abc import Iterator, Mapping
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta
+from pathlib import Path, PurePosixPath
+from typing import IO
+from xml.etree.ElementTree import Element, iterparse
+
+from models import ImageCatalog, Person, parse_birth_date, validate_people
+
+IMPORT_SUFFIXES = (".csv", ".xlsx")
+COLUMN_ALIASES: dict[str, tuple[str, ...]] = {
+    "name": ("voornaam", "roepnaam", "name", "first name", "firstname"),
+    "family_name": (
+        "familienaam",
+        "achternaam",
+        "family name",
+        "last name",
+        "lastname",
+        "surname",
+    ),
+    "birth_date": (
+        "geboortedatum",
+        "geboren",
+        "birth date",
+        "birthdate",
+        "date of birth",
+        "dob",
+    ),
+    "color": ("kleur", "color", "colour"),
+    "scene": ("afbeelding", "ontwerp", "thema", "scene"),
+    "group": ("groep", "klas", "leerjaar", "group"),
+}
+DATE_FORMATS = ("%d-%m-%Y", "%d/%m/%Y", "%d.%m.%Y", "%Y-%m-%d", "%Y-%m-%d %H:%M:%S")
+EXCEL_EPOCH = date(1899, 12, 30)
+# Five-digit serials cover 1927 to 2173; shorter numbers such as "2014" are
+# years or typos, not dates.
+EXCEL_SERIALS = range(10_000, 100_000)
+
+_SPREADSHEET_NS = "{http://schemas.openxmlformats.org/spreadsheetml/2006/main}"
+_RELATIONSHIP_NS = (
+    "{http://schemas.openxmlformats.org/officeDocument/2006/relationships}"
+)
+_PACKAGE_RELATIONSHIP_NS = (
+    "{http://schemas.openxmlformats.org/package/2006/relationships}"
+)
+_CELL_COLUMN = re.compile(r"[A-Z]+")
+_GROUP_NUMBER = re.compile(r"\d+")
+
+
+@dataclass(slots=True)
+class ImportResult:
+    people: list[Person]
+    errors: list[str]
+
+
+def import_people(
+    source: bytes | Path,
+    catalog: ImageCatalog,
+    *,
+    filename: str | None = None,
+    columns: Mapping[str, str] | None = None,
+) -> ImportResult:
+    """Read a CSV or XLSX class list exported from the school administration.
+
+    ``columns`` maps ``Person`` fields to header names when the export does not
+    use one of the recognised Dutch or English headers. Rows are validated in
+    one batch after reading and every problem is returned at once.
+    """
+
+    name = filename or (source.name if isinstance(source, Path) else "")
+    suffix = Path(name).suffix.lower()
+    if suffix not in IMPORT_SUFFIXES:
+        raise ValueError("Kies een CSV- of Excel-bestand (.csv of .xlsx).")
+
+    stream: IO[bytes] = (
+        source.open("rb") if isinstance(source, Path) else io.BytesIO(source)
+    )
+    with stream:
+        rows = _read_csv(stream) if suffix == ".csv" else _read_xlsx(stream)
+        people = _people_from_rows(rows, catalog, columns or {})
+
+    if not people:
+        return ImportResult([], ["Het bestand bevat geen leerlingen."])
+    return ImportResult(people, validate_people(people, catalog))
+
+
+def _people_from_rows(
+    rows: Iterator[list[str]],
+    catalog: ImageCatalog,
+    columns: Mapping[str, str],
+) -> list[Person]:
+    header = next((row for row in rows if any(cell.strip() for cell in row)), None)
+    if header is None:
+        return []
+    indexes = _map_columns(header, columns)
+    if "name" not in indexes:
+        raise ValueError("Het bestand heeft geen kolom 'Voornaam'.")
+
+    default = catalog.new_person()
+    colors = {color.lower(): color for color in catalog.colors}
+    scenes = {scene.lower(): scene for scene in catalog.scenes}
+    people: list[Person] = []
+    ungrouped: list[Person] = []
+
+    def cell(row: list[str], field: str) -> str:
+        index = indexes.get(field)
+        return row[index].strip() if index is not None and index < len(row) else ""
+
+    for row in rows:
+        if not any(value.strip() for value in row):
+            continue
+        color = cell(row, "color")
+        scene = cell(row, "scene")
+        group = _parse_group(cell(row, "group"))
+        person = Person(
+            name=cell(row, "name"),
+            family_name=cell(row, "family_name"),
+            color=colors.get(color.lower(), color) or default.color,
+            scene=scenes.get(scene.lower(), scene) or default.scene,
+            birth_date=_normalize_birth_date(cell(row, "birth_date")),
+            group=group or 1,
+        )
+        people.append(person)
+        if group is None:
+            ungrouped.append(person)
+
+    _infer_groups(ungrouped)
+    return people
+
+
+def _map_columns(header: list[str], columns: Mapping[str, str]) -> dict[str, int]:
+    normalized = [_normalize_header(value) for value in header]
+    indexes: dict[str, int] = {}
+    for field, aliases in COLUMN_ALIASES.items():
+        wanted = (_normalize_header(columns[field]),) if field in columns else aliases
+        index = next(
+            (normalized.index(alias) for alias in wanted if alias in normalized),
+            None,
+        )
+        if index is not None:
+            indexes[field] = index
+        elif field in columns:
+            raise ValueError(f"Kolom '{columns[field]}' komt niet voor in het bestand.")
+    return indexes
+
+
+def _normalize_header(value: str) -> str:
+    return " ".join(value.replace("_", " ").replace("-", " ").lower().split())
+
+
+def _normalize_birth_date(value: str) -> str:
+    """Convert common spreadsheet date notations to ``dd-mm-yyyy``."""
+
+    if not value or parse_birth_date(value) is not None:
+        return value
+    try:
+        serial = float(value)
+    except ValueError:
+        pass
+    else:
+        if serial.is_integer() and int(serial) in EXCEL_SERIALS:
+            return (EXCEL_EPOCH + timedelta(days=int(serial))).strftime("%d-%m-%Y")
+        return value
+    for date_format in DATE_FORMATS:
+        try:
+            return datetime.strptime(value, date_format).strftime("%d-%m-%Y")
+        except ValueError:
+            continue
+    return value
+
+
+def _parse_group(value: str) -> int | None:
+    """Read group 1 or 2 from labels such as ``2``, ``K2`` or ``groep 1``.
+
+    Other class names, like ``3A``, say nothing about the card group; those
+    rows get their group from the birth year.
+    """
+
+    numbers = _GROUP_NUMBER.findall(value)
+    if len(numbers) == 1 and int(numbers[0]) in (1, 2):
+        return int(numbers[0])
+    return None
+
+
+def _infer_groups(people: list[Person]) -> None:
+    """Put the youngest birth year in group 1 and older children in group 2."""
+
+    years = {
+        birth_date.year
+        for person in people
+        if (birth_date := parse_birth_date(person.birth_date)) is not None
+    }
+    if len(years) < 2:
+        return
+    youngest = max(years)
+    for person in people:
+        birth_date = parse_birth_date(person.birth_date)
+        if birth_date is not None and birth_date.year < youngest:
+            person.group = 2
+
+
+def _read_csv(stream: IO[bytes]) -> Iterator[list[str]]:
+    text = io.TextIOWrapper(stream, encoding="utf-8-sig", newline="")
+    sample = text.read(4096)
+    text.seek(0)
+    try:
+        dialect: type[csv.Dialect] | csv.Dialect = csv.Sniffer().sniff(
+            sample, delimiters=",;\t"
+        )
+    except csv.Error:
+        dialect = csv.excel
+    yield from csv.reader(text, dialect)
+
+
+def _read_xlsx(stream: IO[bytes]) -> Iterator[list[str]]:
+    """Stream the rows of the first worksheet without loading the whole sheet."""
+
+    try:
+        archive = zipfile.ZipFile(stream)
+    except zipfile.BadZipFile as error:
+        raise ValueError("Het gekozen bestand is geen geldig Excel-bestand.") from error
+
+    with archive:
+        shared_strings = _xlsx_shared_strings(archive)
+        with archive.open(_xlsx_first_sheet(archive)) as sheet:
+            for _, element in iterparse(sheet):
+                if element.tag != f"{_SPREADSHEET_NS}row":
+                    continue
+                row: list[str] = []
+                for cell in element.iter(f"{_SPREADSHEET_NS}c"):
+                    column = _CELL_COLUMN.match(cell.get("r", ""))
+                    index = _column_index(column.group()) if column else len(row)
+                    row.extend("" for _ in range(index - len(row) + 1))
+                    row[index] = _xlsx_cell_value(cell, shared_strings)
+                element.clear()
+                yield row
+
+
+def _xlsx_shared_strings(archive: zipfile.ZipFile) -> list[str]:
+    try:
+        file = archive.open("xl/sharedStrings.xml")
+    except KeyError:
+        return []
+    strings: list[str] = []
+    with file:
+        for _, element in iterparse(file):
+            if element.tag == f"{_SPREADSHEET_NS}si":
+                strings.append(
+                    "".join(
+                        text.text or "" for text in element.iter(f"{_SPREADSHEET_NS}t")
+                    )
+                )
+                element.clear()
+    return strings
+
+
+def _xlsx_first_sheet(archive: zipfile.ZipFile) -> str:
+    try:
+        with archive.open("xl/workbook.xml") as file:
+            sheet = next(
+                element
+                for _, element in iterparse(file)
+                if element.tag == f"{_SPREADSHEET_NS}sheet"
+            )
+        relationship_id = sheet.get(f"{_RELATIONSHIP_NS}id")
+        with archive.open("xl/_rels/workbook.xml.rels") as file:
+            target = next(
+                element.get("Target", "")
+                for _, element in iterparse(file)
+                if element.tag == f"{_PACKAGE_RELATIONSHIP_NS}Relationship"
+                and element.get("Id") == relationship_id
+            )
+    except (KeyError, StopIteration):
+        return "xl/worksheets/sheet1.xml"
+    if target.startswith("/"):
+        return target.lstrip("/")
+    return str(PurePosixPath("xl") / target)
+
+
+def _xlsx_cell_value(cell: Element, shared_strings: list[str]) -> str:
+    cell_type = cell.get("t")
+    if cell_type == "inlineStr":
+        return "".join(text.text or "" for text in cell.iter(f"{_SPREADSHEET_NS}t"))
+    value = cell.findtext(f"{_SPREADSHEET_NS}v") or ""
+    if cell_type == "s" and value:
+        return shared_strings[int(value)]
+    if cell_type in (None, "n") and value.endswith(".0"):
+        return value[:-2]
+    return value
+
+
+def _column_index(letters: str) -> int:
+    index = 0
+    for letter in letters:
+        index = index * 26 + ord(letter) - ord("A") + 1
+    return index - 1
@@ -0,0 +1,501 @@
+"""Simulate a class of teachers using the editor at the same time.
+
+Example::
+
+    uv run python loadtest.py --teachers 20 --duration 120
+    uv run python loadtest.py --teachers 40 --output maandag.json --max-preview-p95 2
+
+The real app runs in this process under NiceGUI's user simulation, the same
+one ``tests/test_app.py`` uses, so no browser, network or running server is
+needed. Every simulated teacher has an own editor session and, after a think
+time, adds a row, types a name, switches rows, opens a PDF of a saved class
+or downloads the PDF. The report has percentiles of the time until the
+preview is up to date again, of downloads and of opening PDFs, the lag of
+the event loop and the estimated memory per session (the same estimate as
+the admin page).
+
+The simulation skips the websocket and the browser, so the numbers are
+server time only. Renders use the same scheduler, caches and render
+workers (``JUFDEA_RENDER_WORKERS``) as a normal start.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import runpy
+import sys
+from collections import Counter
+from collections.abc import AsyncIterator, Sequence
+from contextlib import AbstractAsyncContextManager, asynccontextmanager
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from time import perf_counter
+from typing import Any
+
+import httpx
+from nicegui import context, core, helpers, ui
+from nicegui.elements.upload_files import SmallFileUpload
+from nicegui.testing import User
+from nicegui.testing.user_download import UserDownload
+from nicegui.testing.user_simulation import user_simulation
+
+from benchmark import synthetic_class
+from models import DEFAULT_IMAGE_DIR, ImageCatalog
+from pdf_utils import PdfGenerator, load_layout
+from sessions import session_registry
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+APP_FILE = Path(__file__).with_name("app.py")
+# Relative weights of what a teacher does next.
+ACTIONS = {"type": 5, "select": 3, "add_row": 2, "download": 1, "open_pdf": 1}
+LAG_INTERVAL = 0.05
+# Give up on a single action after this long and count it as an error.
+ACTION_TIMEOUT = 60.0
+MAX_REPORTED_ERRORS = 20
+
+_NAMES = (
+    "Ada", "Bram", "Chloë", "Daan", "Elif", "Finn", "Lotte", "Mila", "Noah",
+    "Ouassim", "Saar", "Tuur", "Wout", "Yara", "Zoë",
+)  # fmt: skip
+
+
+@dataclass(slots=True)
+class LoadTestConfig:
+    teachers: int = 10
+    duration_seconds: float = 60.0
+    # Mean pause between two actions of one teacher.
+    think_seconds: float = 3.0
+    keystroke_seconds: float = 0.2
+    # Rows in the saved class that teachers open.
+    class_size: int = 25
+    max_rows: int = 30
+    seed: int = 0
+
+
+@dataclass(slots=True)
+class Measurements:
+    preview_seconds: list[float] = field(default_factory=list)
+    download_seconds: list[float] = field(default_factory=list)
+    open_seconds: list[float] = field(default_factory=list)
+    lag_seconds: list[float] = field(default_factory=list)
+    session_bytes: list[int] = field(default_factory=list)
+    actions: Counter[str] = field(default_factory=Counter)
+    errors: list[str] = field(default_factory=list)
+
+
+class Teacher:
+    """One simulated teacher working in its own editor session."""
+
+    def __init__(
+        self,
+        number: int,
+        user: User,
+        page: Any,
+        config: LoadTestConfig,
+        project_pdf: bytes,
+        measurements: Measurements,
+    ) -> None:
+        self.number = number
+        self.user = user
+        self.page = page
+        # Kept before _route_downloads replaces ``user.download``.
+        self.download: UserDownload = user.download
+        self.config = config
+        self.project_pdf = project_pdf
+        self.measurements = measurements
+        self.random = random.Random(f"{config.seed}-{number}")
+
+    async def run(self, deadline: float) -> None:
+        # Teachers do not all start at the same second.
+        await asyncio.sleep(self.random.uniform(0, self.config.think_seconds))
+        while perf_counter() < deadline:
+            action = self._choose()
+            try:
+                await asyncio.wait_for(self.act(action), ACTION_TIMEOUT)
+            except Exception as error:
+                self.measurements.errors.append(
+                    f"leraar {self.number}, {action}: {error!r}"
+                )
+            self.measurements.actions[action] += 1
+            await asyncio.sleep(self._think_time())
+
+    async def act(self, action: str) -> None:
+        if action == "type":
+            await self._type_name()
+        elif action == "select":
+            await self._select_row()
+        elif action == "add_row":
+            await self._add_row()
+        elif action == "download":
+            await self._download()
+        elif action == "open_pdf":
+            await self._open_pdf()
+        else:
+            raise ValueError(f"Onbekende actie '{action}'.")
+
+    def _choose(self) -> str:
+        actions = dict(ACTIONS)
+        if len(self.page.people) >= self.config.max_rows:
+            actions.pop("add_row", None)
+        if len(self.page.people) < 2:
+            actions.pop("select", None)
+        return self.random.choices(list(actions), weights=list(actions.values()))[0]
+
+    def _think_time(self) -> float:
+        mean = self.config.think_seconds
+        return min(self.random.expovariate(1 / mean), 4 * mean) if mean > 0 else 0
+
+    def _selected_index(self) -> int:
+        return next(
+            index
+            for index, person in enumerate(self.page.people)
+            if person is self.page.selected_person
+        )
+
+    async def _type_name(self) -> None:
+        index = self._selected_index()
+        name = self.random.choice(_NAMES)
+        name_input = next(iter(self.user.find(marker=f"name-{index}").elements))
+        # The input is debounced in the browser: typing a name sends one change.
+        await asyncio.sleep(len(name) * self.config.keystroke_seconds)
+        start = perf_counter()
+        with self.user.client:
+            name_input.value = name
+        await self._wait_for_preview(start)
+
+    async def _select_row(self) -> None:
+        current = self._selected_index()
+        index = self.random.choice(
+            [index for index in range(len(self.page.people)) if index != current]
+        )
+        start = perf_counter()
+        self.user.find(marker=f"name-{index}").trigger("focus")
+        await self._wait_for_preview(start)
+
+    async def _add_row(self) -> None:
+        start = perf_counter()
+        self.user.find("Rij toevoegen").click()
+        await self._wait_for_preview(start)
+
+    async def _download(self) -> None:
+        page = self.page
+        key = page.generator.document_key(page.people, page.catalog, page.layout)
+        url = f"/api/documents/{key}"
+        seen = len(self._downloads(url))
+        start = perf_counter()
+        self.user.find("PDF downloaden").click()
+        while len(self._downloads(url)) <= seen:
+            await asyncio.sleep(0.02)
+        response = self._downloads(url)[-1]
+        response.raise_for_status()
+        self.measurements.download_seconds.append(perf_counter() - start)
+
+    def _downloads(self, url: str) -> list[httpx.Response]:
+        # Teachers with the same class share document keys; only this
+        # teacher's own responses count.
+        return [
+            response
+            for response in self.download.http_responses
+            if response.url.path == url
+        ]
+
+    async def _open_pdf(self) -> None:
+        people = self.page.people
+        self.user.find("PDF openen").click()
+        upload = max(self.user.find(kind=ui.upload).elements, key=lambda e: e.id)
+        start = perf_counter()
+        await upload.handle_uploads(
+            [
+                SmallFileUpload(
+                    name="klas.pdf",
+                    content_type="application/pdf",
+                    _data=self.project_pdf,
+                )
+            ]
+        )
+        while self.page.people is people:
+            await asyncio.sleep(0.02)
+        self.measurements.open_seconds.append(perf_counter() - start)
+        await self._wait_for_preview(perf_counter())
+
+    async def _wait_for_preview(self, start: float) -> None:
+        """Record how long until the newest scheduled preview is shown."""
+
+        while True:
+            task = self.page.preview_task
+            if task is None:
+                return
+            await asyncio.wait({task})
+            # A newer preview may have replaced this one in the meantime.
+            if self.page.preview_task is task:
+                break
+        if self.page.preview_error.visible:
+            raise RuntimeError(self.page.preview_error.text)
+        self.measurements.preview_seconds.append(perf_counter() - start)
+
+
+class _RoutedDownload:
+    """``ui.download`` that delivers each download to the user whose page made it.
+
+    ``User`` points the global ``ui.download`` at whichever user was accessed
+    last, so with several users a download would land at a random teacher.
+    """
+
+    def __init__(self, downloads: dict[str, UserDownload]) -> None:
+        self.downloads = downloads
+
+    def __call__(self, *args: Any, **kwargs: Any) -> Any:
+        return self.downloads[context.client.id](*args, **kwargs)
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self.downloads[context.client.id], name)
+
+
+def summarize(values: Sequence[float]) -> dict[str, Any]:
+    """Count, p50, p95, p99 and maximum of ``values``."""
+
+    ordered = sorted(values)
+    if not ordered:
+        return {"count": 0, "p50": None, "p95": None, "p99": None, "max": None}
+
+    def percentile(fraction: float) -> float:
+        return ordered[min(len(ordered) - 1, round(fraction * (len(ordered) - 1)))]
+
+    return {
+        "count": len(ordered),
+        "p50": percentile(0.5),
+        "p95": percentile(0.95),
+        "p99": percentile(0.99),
+        "max": ordered[-1],
+    }
+
+
+async def run_load_test(
+    config: LoadTestConfig, *, main_file: Path = APP_FILE
+) -> dict[str, Any]:
+    """Let ``config.teachers`` simulated teachers use the app; return a report."""
+
+    if config.teachers < 1:
+        raise ValueError("Er is minstens één leraar nodig.")
+    project_pdf = await asyncio.to_thread(_class_pdf, config.class_size)
+    measurements = Measurements()
+
+    async with _simulation(main_file) as first_user:
+        users = [first_user] + [
+            User(
+                httpx.AsyncClient(
+                    transport=httpx.ASGITransport(core.app), base_url="http://test"
+                )
+            )
+            for _ in range(config.teachers - 1)
+        ]
+        try:
+            teachers = [
+                Teacher(
+                    number,
+                    user,
+                    await _open_editor(user),
+                    config,
+                    project_pdf,
+                    measurements,
+                )
+                for number, user in enumerate(users, start=1)
+            ]
+            _route_downloads(users)
+            # Let the simulated sockets connect so updates are sent right away.
+            await asyncio.sleep(0.3)
+            lag = asyncio.create_task(_sample_lag(measurements.lag_seconds))
+            start = perf_counter()
+            deadline = start + config.duration_seconds
+            await asyncio.gather(*(teacher.run(deadline) for teacher in teachers))
+            elapsed = perf_counter() - start
+            lag.cancel()
+            measurements.session_bytes = [
+                sum(teacher.page.memory_usage().values()) for teacher in teachers
+            ]
+        finally:
+            for user in users[1:]:
+                await user.http_client.aclose()
+
+    return {
+        "config": asdict(config),
+        "elapsed_seconds": elapsed,
+        "actions": dict(measurements.actions),
+        "preview_seconds": summarize(measurements.preview_seconds),
+        "download_seconds": summarize(measurements.download_seconds),
+        "open_pdf_seconds": summarize(measurements.open_seconds),
+        "event_loop_lag_seconds": summarize(measurements.lag_seconds),
+        "session_bytes": summarize(measurements.session_bytes),
+        "peak_rss_bytes": _peak_rss(),
+        "error_count": len(measurements.errors),
+        "errors": measurements.errors[:MAX_REPORTED_ERRORS],
+    }
+
+
+def main(argv: Sequence[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(
+        description="Laat gesimuleerde leraren tegelijk de editor gebruiken."
+    )
+    parser.add_argument("--teachers", type=int, default=10, help="aantal leraren")
+    parser.add_argument(
+        "--duration", type=float, default=60.0, help="duur van de test in seconden"
+    )
+    parser.add_argument(
+        "--think",
+        type=float,
+        default=3.0,
+        help="gemiddelde bedenktijd tussen twee acties in seconden",
+    )
+    parser.add_argument(
+        "--class-size",
+        type=int,
+        default=25,
+        help="aantal rijen in de PDF die leraren openen",
+    )
+    parser.add_argument("--seed", type=int, default=0, help="startwaarde voor toeval")
+    parser.add_argument("--output", type=Path, help="schrijf het rapport als JSON")
+    parser.add_argument(
+        "--max-preview-p95",
+        type=float,
+        help="mislukt als de p95 van de preview langer duurt (seconden)",
+    )
+    parser.add_argument(
+        "--max-lag-p95",
+        type=float,
+        help="mislukt als de p95 van de event-loopvertraging groter is (seconden)",
+    )
+    args = parser.parse_args(argv)
+    if args.teachers < 1:
+        parser.error("Er is minstens één leraar nodig.")
+
+    config = LoadTestConfig(
+        teachers=args.teachers,
+        duration_seconds=args.duration,
+        think_seconds=args.think,
+        class_size=args.class_size,
+        seed=args.seed,
+    )
+    report = asyncio.run(run_load_test(config))
+    if args.output:
+        args.output.write_text(json.dumps(report, indent=2) + "\n", encoding="utf-8")
+    _print_report(report)
+
+    failures = []
+    if report["error_count"]:
+        failures.append(f"{report['error_count']} acties mislukt")
+    for name, limit, label in (
+        ("preview_seconds", args.max_preview_p95, "preview"),
+        ("event_loop_lag_seconds", args.max_lag_p95, "event-loopvertraging"),
+    ):
+        p95 = report[name]["p95"]
+        if limit is not None and p95 is not None and p95 > limit:
+            failures.append(f"p95 {label} {p95:.2f}s > {limit:.2f}s")
+    for failure in failures:
+        print(f"MISLUKT: {failure}", file=sys.stderr)
+    return 1 if failures else 0
+
+
+def _simulation(main_file: Path) -> AbstractAsyncContextManager[User]:
+    # user_simulation first resets NiceGUI's globals, which only works under
+    # pytest. From the command line the app starts in a fresh process anyway.
+    if helpers.is_pytest():
+        return user_simulation(main_file=main_file)
+    return _fresh_simulation(main_file)
+
+
+@asynccontextmanager
+async def _fresh_simulation(main_file: Path) -> AsyncIterator[User]:
+    os.environ["NICEGUI_USER_SIMULATION"] = "true"
+    try:
+        runpy.run_path(str(main_file), run_name="__main__")
+        async with (
+            core.app.router.lifespan_context(core.app),
+            httpx.AsyncClient(
+                transport=httpx.ASGITransport(core.app), base_url="http://test"
+            ) as client,
+        ):
+            yield User(client)
+    finally:
+        os.environ.pop("NICEGUI_USER_SIMULATION", None)
+
+
+async def _open_editor(user: User) -> Any:
+    await user.open("/")
+    return next(
+        info.session
+        for info in session_registry.sessions()
+        if getattr(info.session, "client", None) is user.client
+    )
+
+
+def _route_downloads(users: Sequence[User]) -> None:
+    routed = _RoutedDownload({user.client.id: user.download for user in users})
+    for user in users:
+        user.download = routed
+
+
+async def _sample_lag(samples: list[float]) -> None:
+    loop = asyncio.get_running_loop()
+    while True:
+        start = loop.time()
+        await asyncio.sleep(LAG_INTERVAL)
+        samples.append(max(0.0, loop.time() - start - LAG_INTERVAL))
+
+
+def _class_pdf(class_size: int) -> bytes:
+    catalog = ImageCatalog(DEFAULT_IMAGE_DIR)
+    people = synthetic_class(catalog, class_size)
+    return PdfGenerator().document(people, catalog, load_layout())
+
+
+def _peak_rss() -> int | None:
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Kilobytes on Linux, bytes on macOS.
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def _print_report(report: dict[str, Any]) -> None:
+    config = report["config"]
+    actions = sum(report["actions"].values())
+    print(
+        f"{config['teachers']} leraren, {report['elapsed_seconds']:.0f}s: "
+        f"{actions} acties, {report['error_count']} mislukt."
+    )
+    for name, label in (
+        ("preview_seconds", "preview"),
+        ("download_seconds", "downloaden"),
+        ("open_pdf_seconds", "PDF openen"),
+        ("event_loop_lag_seconds", "event loop"),
+    ):
+        stats = report[name]
+        if not stats["count"]:
+            print(f"{label:<12} geen metingen")
+            continue
+        print(
+            f"{label:<12} p50 {stats['p50']:.3f}s  p95 {stats['p95']:.3f}s  "
+            f"p99 {stats['p99']:.3f}s  max {stats['max']:.3f}s  (n={stats['count']})"
+        )
+    memory = report["session_bytes"]
+    line = (
+        f"geheugen     p50 {memory['p50'] / 1000:.0f} kB  "
+        f"max {memory['max'] / 1000:.0f} kB per sessie"
+    )
+    if report["peak_rss_bytes"] is not None:
+        line += f", piek proces {report['peak_rss_bytes'] / 1_000_000:.0f} MB"
+    print(line)
+    for error in report["errors"]:
+        print(f"  {error}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,171 @@
+"""Stage timings and counters for the render pipeline in Prometheus format.
+
+Collection is off unless ``JUFDEA_METRICS=1`` is set. While disabled every
+hook returns immediately, so the instrumented code costs one attribute check
+per call. The server exposes the collected values on ``/metrics``.
+"""
+
+from __future__ import annotations
+
+import functools
+import os
+import threading
+from collections.abc import Callable, Iterator
+from contextlib import AbstractContextManager, contextmanager, nullcontext
+from time import perf_counter
+from typing import Any, TypeVar
+
+STAGE_SECONDS = "jufdea_stage_seconds"
+QUEUE_WAIT_SECONDS = "jufdea_queue_wait_seconds"
+RENDERS_IN_FLIGHT = "jufdea_renders_in_flight"
+CACHE_REQUESTS = "jufdea_document_cache_requests_total"
+OPTIMIZE_SAVED_BYTES = "jufdea_optimize_saved_bytes_total"
+WS_MESSAGES = "jufdea_ws_messages_total"
+WS_BYTES = "jufdea_ws_bytes_total"
+
+BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+_DEFINITIONS = {
+    STAGE_SECONDS: ("histogram", "Time spent in one render or load stage."),
+    QUEUE_WAIT_SECONDS: ("histogram", "Time renders waited in the scheduler."),
+    RENDERS_IN_FLIGHT: ("gauge", "Renders currently running."),
+    CACHE_REQUESTS: ("counter", "Document cache lookups by result."),
+    OPTIMIZE_SAVED_BYTES: ("counter", "Bytes removed by the PDF optimize pass."),
+    WS_MESSAGES: ("counter", "Websocket messages sent, by UI action and type."),
+    WS_BYTES: ("counter", "Websocket payload bytes sent, by UI action."),
+}
+_NULL_CONTEXT = nullcontext()
+
+Function = TypeVar("Function", bound=Callable[..., Any])
+Labels = tuple[tuple[str, str], ...]
+
+
+class _Histogram:
+    __slots__ = ("buckets", "count", "total")
+
+    def __init__(self) -> None:
+        self.buckets = [0] * len(BUCKETS)
+        self.count = 0
+        self.total = 0.0
+
+    def observe(self, value: float) -> None:
+        for index, bound in enumerate(BUCKETS):
+            if value <= bound:
+                self.buckets[index] += 1
+        self.count += 1
+        self.total += value
+
+
+class Metrics:
+    """Thread-safe registry of the histograms, gauges and counters above."""
+
+    def __init__(self, *, enabled: bool = False) -> None:
+        self.enabled = enabled
+        self._histograms: dict[str, dict[Labels, _Histogram]] = {}
+        self._values: dict[str, dict[Labels, float]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, name: str, value: float, **labels: str) -> None:
+        if not self.enabled:
+            return
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            series = self._histograms.setdefault(name, {})
+            histogram = series.get(key)
+            if histogram is None:
+                histogram = series[key] = _Histogram()
+            histogram.observe(value)
+
+    def increment(self, name: str, amount: float = 1.0, **labels: str) -> None:
+        """Add ``amount`` to a counter or gauge; gauges also accept negatives."""
+
+        if not self.enabled:
+            return
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            series = self._values.setdefault(name, {})
+            series[key] = series.get(key, 0.0) + amount
+
+    def time(
+        self, name: str = STAGE_SECONDS, **labels: str
+    ) -> AbstractContextManager[Any]:
+        """Observe the duration of a ``with`` block in histogram ``name``."""
+
+        if not self.enabled:
+            return _NULL_CONTEXT
+        return self._timer(name, labels)
+
+    def timed(self, stage: str) -> Callable[[Function], Function]:
+        """Decorate a function so each call is observed as ``stage``."""
+
+        def decorate(function: Function) -> Function:
+            @functools.wraps(function)
+            def wrapper(*args: Any, **kwargs: Any) -> Any:
+                if not self.enabled:
+                    return function(*args, **kwargs)
+                with self._timer(STAGE_SECONDS, {"stage": stage}):
+                    return function(*args, **kwargs)
+
+            return wrapper  # type: ignore[return-value]
+
+        return decorate
+
+    def reset(self) -> None:
+        with self._lock:
+            self._histograms.clear()
+            self._values.clear()
+
+    def render(self) -> str:
+        """Return all series in the Prometheus text exposition format."""
+
+        lines: list[str] = []
+        with self._lock:
+            for name, (kind, description) in _DEFINITIONS.items():
+                lines += [f"# HELP {name} {description}", f"# TYPE {name} {kind}"]
+                if kind == "histogram":
+                    histograms = self._histograms.get(name, {})
+                    for key in sorted(histograms):
+                        lines += _histogram_lines(name, key, histograms[key])
+                else:
+                    for key, value in sorted(self._values.get(name, {}).items()):
+                        lines.append(f"{name}{_format_labels(key)} {_number(value)}")
+        return "\n".join(lines) + "\n"
+
+    @contextmanager
+    def _timer(self, name: str, labels: dict[str, str]) -> Iterator[None]:
+        start = perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, perf_counter() - start, **labels)
+
+
+def _histogram_lines(name: str, key: Labels, histogram: _Histogram) -> list[str]:
+    lines = [
+        f"{name}_bucket{_format_labels(key + (('le', _number(bound)),))} {count}"
+        for bound, count in zip(BUCKETS, histogram.buckets, strict=True)
+    ]
+    lines += [
+        f"{name}_bucket{_format_labels(key + (('le', '+Inf'),))} {histogram.count}",
+        f"{name}_sum{_format_labels(key)} {_number(histogram.total)}",
+        f"{name}_count{_format_labels(key)} {histogram.count}",
+    ]
+    return lines
+
+
+def _format_labels(key: Labels) -> str:
+    if not key:
+        return ""
+    pairs = ",".join(f'{label}="{_escape(value)}"' for label, value in key)
+    return f"{{{pairs}}}"
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _number(value: float) -> str:
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+metrics = Metrics(enabled=os.environ.get("JUFDEA_METRICS", "") not in {"", "0"})
@@ -0,0 +1,197 @@
+"""Rewrite archived JufDea PDFs so they embed the current project data.
+
+Older PDFs are reconstructed through ``load_pdf_project`` every time they are
+opened. After migration they carry the ``jufdea-project.json`` attachment and
+open through the fast path. Example::
+
+    uv run python migrate.py archief/ --output gemigreerd/
+    uv run python migrate.py archief/ --in-place --report rapport.json
+
+PyMuPDF and fpdf2 are only imported in the worker processes that use them.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import shutil
+import sys
+from collections.abc import Sequence
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from time import perf_counter
+from typing import TYPE_CHECKING
+
+from models import DEFAULT_IMAGE_DIR, ImageCatalog
+
+if TYPE_CHECKING:
+    from pdf_utils import PdfProject
+
+_catalog: ImageCatalog | None = None
+
+
+@dataclass(slots=True)
+class MigrationResult:
+    source: str
+    status: str
+    seconds: float
+    people: int = 0
+    error: str | None = None
+
+
+def migrate_pdf(
+    pdf_bytes: bytes,
+    catalog: ImageCatalog,
+) -> tuple[bytes, PdfProject] | None:
+    """Embed the restored project into ``pdf_bytes``; ``None`` if already current.
+
+    The original pages are kept. The rewritten file is loaded again to check
+    that it restores the same rows through the attachment.
+    """
+
+    import fitz
+
+    from pdf_utils import PROJECT_ATTACHMENT, encode_project, load_pdf_project
+
+    with fitz.open(stream=pdf_bytes, filetype="pdf") as document:
+        if PROJECT_ATTACHMENT in document.embfile_names():
+            return None
+
+    # This already runs in one of the migration's worker processes; a page
+    # pool per file would multiply them.
+    project = load_pdf_project(pdf_bytes, catalog, parallel=False)
+    with fitz.open(stream=pdf_bytes, filetype="pdf") as document:
+        document.embfile_add(
+            PROJECT_ATTACHMENT,
+            encode_project(project.people, project.layout),
+            filename=PROJECT_ATTACHMENT,
+            desc="Editable JufDea project data",
+        )
+        migrated = document.tobytes(garbage=1, deflate=True)
+
+    if load_pdf_project(migrated, catalog, parallel=False).people != project.people:
+        raise ValueError("De gemigreerde PDF geeft andere leerlingen terug.")
+    return migrated, project
+
+
+def migrate_file(source: Path, target: Path) -> MigrationResult:
+    """Migrate one archived PDF in a worker process."""
+
+    if _catalog is None:
+        _init_worker(DEFAULT_IMAGE_DIR)
+    assert _catalog is not None
+
+    start = perf_counter()
+    try:
+        migration = migrate_pdf(source.read_bytes(), _catalog)
+        if migration is None:
+            if target != source:
+                target.parent.mkdir(parents=True, exist_ok=True)
+                shutil.copyfile(source, target)
+            return MigrationResult(str(source), "current", perf_counter() - start)
+        migrated, project = migration
+        target.parent.mkdir(parents=True, exist_ok=True)
+        temporary = target.with_name(f".{target.name}.tmp")
+        temporary.write_bytes(migrated)
+        os.replace(temporary, target)
+    except Exception as error:
+        return MigrationResult(
+            str(source), "failed", perf_counter() - start, error=str(error)
+        )
+    return MigrationResult(
+        str(source), "migrated", perf_counter() - start, people=len(project.people)
+    )
+
+
+def migrate_directory(
+    directory: Path,
+    output: Path | None = None,
+    *,
+    workers: int | None = None,
+    image_dir: Path = DEFAULT_IMAGE_DIR,
+) -> list[MigrationResult]:
+    """Migrate every PDF below ``directory``, in place or into ``output``."""
+
+    sources = sorted(
+        path
+        for path in directory.rglob("*")
+        if path.is_file() and path.suffix.lower() == ".pdf"
+    )
+    targets = [
+        source if output is None else output / source.relative_to(directory)
+        for source in sources
+    ]
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        initializer=_init_worker,
+        initargs=(image_dir,),
+    ) as executor:
+        return list(executor.map(migrate_file, sources, targets))
+
+
+def main(argv: Sequence[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(
+        description="Zet oude JufDea-PDF's om naar het huidige formaat."
+    )
+    parser.add_argument("input", type=Path, help="map met gearchiveerde PDF's")
+    destination = parser.add_mutually_exclusive_group(required=True)
+    destination.add_argument(
+        "--output", type=Path, help="map voor de gemigreerde kopieën"
+    )
+    destination.add_argument(
+        "--in-place",
+        action="store_true",
+        help="overschrijf de originele bestanden",
+    )
+    parser.add_argument("--report", type=Path, help="schrijf een JSON-rapport")
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=os.cpu_count(),
+        help="aantal parallelle processen",
+    )
+    parser.add_argument(
+        "--images",
+        type=Path,
+        default=DEFAULT_IMAGE_DIR,
+        help="map met kaartontwerpen",
+    )
+    args = parser.parse_args(argv)
+
+    results = migrate_directory(
+        args.input,
+        None if args.in_place else args.output,
+        workers=args.workers,
+        image_dir=args.images,
+    )
+    counts = {status: 0 for status in ("migrated", "current", "failed")}
+    for result in results:
+        counts[result.status] += 1
+        if result.error:
+            print(f"FOUT {result.source}: {result.error}")
+    print(
+        f"{counts['migrated']} gemigreerd, {counts['current']} al actueel, "
+        f"{counts['failed']} mislukt."
+    )
+    if args.report:
+        args.report.write_text(
+            json.dumps(
+                [asdict(result) for result in results],
+                indent=4,
+                ensure_ascii=False,
+            )
+            + "\n",
+            encoding="utf-8",
+        )
+    return 1 if counts["failed"] else 0
+
+
+def _init_worker(image_dir: Path) -> None:
+    global _catalog
+    _catalog = ImageCatalog(image_dir)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,5 +1,8 @@
 from __future__ import annotations
 
+import json
+import shutil
+from collections.abc import Iterable
 from dataclasses import asdict, dataclass
 from datetime import date
 from hashlib import sha256
@@ -7,6 +10,8 @@ from pathlib import Path
 from typing import Any
 
 DESIGN_COLORS = ("geel", "oranje", "blauw", "rood", "groen", "roze")
+DEFAULT_IMAGE_DIR = Path(__file__).resolve().parent / "GUI" / "images" / "ontwerpen"
+DESIGN_MANIFEST = "manifest.json"
 
 
 @dataclass(slots=True)
@@ -58,40 +63,108 @@ class ImageCatalog:
 
     The artwork is numbered in groups of six. Within every group, the variants
     use the same color order defined by ``DESIGN_COLORS``.
+
+    A directory with a ``manifest.json``, as written by ``write_manifest``,
+    lists content-addressed design files with their hashes instead. Those
+    files need not exist yet: the browser build fetches them on first use, see
+    ``missing_images``.
+
+    A catalog never changes after construction. ``refreshed`` returns a new
+    version for the current contents of the directory instead.
     """
 
     def __init__(self, image_dir: Path) -> None:
-        self.image_dir = image_dir
-        self._images: dict[tuple[str, str], Path] = {}
-        for path in sorted(image_dir.glob("*.jpg")):
-            if "-" not in path.stem:
-                continue
-            scene, variant = path.stem.rsplit("-", maxsplit=1)
-            try:
-                variant_number = int(variant)
-            except ValueError:
-                color = variant
-            else:
-                color = DESIGN_COLORS[(variant_number - 1) % len(DESIGN_COLORS)]
-            selection = (scene, color)
-            if selection in self._images:
+        manifest = image_dir / DESIGN_MANIFEST
+        if manifest.exists():
+            images, hashes = _read_manifest(manifest)
+            stats: dict[Path, tuple[int, int]] = {}
+        else:
+            stats = _stat_images(image_dir)
+            images = _discover_images(stats)
+            hashes = {
+                selection: sha256(path.read_bytes()).digest()
+                for selection, path in images.items()
+            }
+        self._index(image_dir, images, hashes, stats, version=1)
+
+    def refreshed(self) -> ImageCatalog:
+        """Return the next version if designs were added, changed or removed.
+
+        Only files whose size or modification time changed are hashed and
+        checked for duplicates; unchanged designs keep their hashes. Without
+        changes, or for manifest catalogs, the catalog itself is returned.
+        """
+
+        if not self._stats:
+            return self
+        stats = _stat_images(self.image_dir)
+        changed = {
+            path for path, stat in stats.items() if self._stats.get(path) != stat
+        }
+        if not changed and stats.keys() == self._stats.keys():
+            return self
+
+        images = {
+            selection: path
+            for selection, path in self._images.items()
+            if path in stats and path not in changed
+        }
+        for selection, path in _discover_images(
+            {path: stats[path] for path in changed}
+        ).items():
+            if selection in images:
                 raise ValueError(
-                    f"Duplicate design for scene '{scene}' and color '{color}'"
+                    f"Duplicate design for scene '{selection[0]}' "
+                    f"and color '{selection[1]}'"
                 )
-            self._images[selection] = path
+            images[selection] = path
+        hashes = {
+            selection: self._hashes[selection]
+            if path not in changed
+            else sha256(path.read_bytes()).digest()
+            for selection, path in images.items()
+        }
+        catalog = object.__new__(ImageCatalog)
+        catalog._index(
+            self.image_dir,
+            dict(sorted(images.items(), key=lambda item: item[1])),
+            hashes,
+            stats,
+            version=self.version + 1,
+        )
+        return catalog
 
-        if not self._images:
+    def _index(
+        self,
+        image_dir: Path,
+        images: dict[tuple[str, str], Path],
+        hashes: dict[tuple[str, str], bytes],
+        stats: dict[Path, tuple[int, int]],
+        *,
+        version: int,
+    ) -> None:
+        if not images:
             raise FileNotFoundError(f"No card designs found in {image_dir}")
 
+        self.image_dir = image_dir
+        self.version = version
+        self._images = images
+        self._hashes = hashes
+        self._stats = stats
         self.scenes = sorted({scene for scene, _ in self._images})
         available_colors = {color for _, color in self._images}
         self.colors = [
             color for color in DESIGN_COLORS if color in available_colors
         ] + sorted(available_colors - set(DESIGN_COLORS))
-        self._image_hashes = {
-            sha256(path.read_bytes()).digest(): selection
-            for selection, path in self._images.items()
-        }
+        self._image_hashes = {digest: selection for selection, digest in hashes.items()}
+        self.fingerprint = sha256(
+            b"".join(
+                f"{scene}-{color}:".encode() + image_hash
+                for image_hash, (scene, color) in sorted(
+                    self._image_hashes.items(), key=lambda item: item[1]
+                )
+            )
+        ).hexdigest()
 
     def image_for(self, person: Person) -> Path:
         try:
@@ -101,6 +174,46 @@ class ImageCatalog:
                 f"No image exists for scene '{person.scene}' and color '{person.color}'"
             ) from error
 
+    def missing_images(self, people: Iterable[Person]) -> list[Path]:
+        """Design files needed for ``people`` that are not on disk yet."""
+
+        return sorted(
+            {
+                path
+                for path in (
+                    self._images.get((person.scene, person.color)) for person in people
+                )
+                if path is not None and not path.exists()
+            }
+        )
+
+    def write_manifest(self, directory: Path) -> Path:
+        """Copy the designs to content-addressed files with a manifest."""
+
+        directory.mkdir(parents=True, exist_ok=True)
+        designs = []
+        for digest, (scene, color) in sorted(
+            self._image_hashes.items(), key=lambda item: item[1]
+        ):
+            source = self._images[(scene, color)]
+            name = f"{digest.hex()[:16]}{source.suffix}"
+            shutil.copyfile(source, directory / name)
+            designs.append(
+                {"scene": scene, "color": color, "sha256": digest.hex(), "file": name}
+            )
+        manifest = directory / DESIGN_MANIFEST
+        manifest.write_text(
+            json.dumps({"designs": designs}, indent=2, ensure_ascii=False),
+            encoding="utf-8",
+        )
+        return manifest
+
+    @property
+    def selections(self) -> frozenset[tuple[str, str]]:
+        """All available ``(scene, color)`` pairs."""
+
+        return frozenset(self._images)
+
     def new_person(self) -> Person:
         scene, color = next(iter(self._images))
         return Person(scene=scene, color=color)
@@ -114,26 +227,117 @@ class ImageCatalog:
             raise ValueError("De PDF bevat een onbekende kaartafbeelding.") from error
 
 
+class CatalogWatcher:
+    """Publish new catalog versions when the design directory changes.
+
+    ``poll`` is cheap when nothing changed: it only lists and stats the
+    directory. Readers take ``current`` at the start of each render and keep
+    using that version for the whole render.
+    """
+
+    def __init__(self, catalog: ImageCatalog) -> None:
+        self.current = catalog
+
+    def poll(self) -> bool:
+        """Swap in a refreshed catalog; return whether a new version appeared."""
+
+        catalog = self.current.refreshed()
+        if catalog is self.current:
+            return False
+        self.current = catalog
+        return True
+
+
+def _stat_images(image_dir: Path) -> dict[Path, tuple[int, int]]:
+    stats = {}
+    for path in sorted(image_dir.glob("*.jpg")):
+        try:
+            stat = path.stat()
+        except FileNotFoundError:
+            continue
+        stats[path] = (stat.st_mtime_ns, stat.st_size)
+    return stats
+
+
+def _discover_images(
+    stats: dict[Path, tuple[int, int]],
+) -> dict[tuple[str, str], Path]:
+    images: dict[tuple[str, str], Path] = {}
+    for path in sorted(stats):
+        if "-" not in path.stem:
+            continue
+        scene, variant = path.stem.rsplit("-", maxsplit=1)
+        try:
+            variant_number = int(variant)
+        except ValueError:
+            color = variant
+        else:
+            color = DESIGN_COLORS[(variant_number - 1) % len(DESIGN_COLORS)]
+        selection = (scene, color)
+        if selection in images:
+            raise ValueError(
+                f"Duplicate design for scene '{scene}' and color '{color}'"
+            )
+        images[selection] = path
+    return images
+
+
+def _read_manifest(
+    manifest: Path,
+) -> tuple[dict[tuple[str, str], Path], dict[tuple[str, str], bytes]]:
+    designs = json.loads(manifest.read_text(encoding="utf-8"))["designs"]
+    images = {
+        (design["scene"], design["color"]): manifest.parent / design["file"]
+        for design in designs
+    }
+    hashes = {
+        (design["scene"], design["color"]): bytes.fromhex(design["sha256"])
+        for design in designs
+    }
+    return images, hashes
+
+
 def validate_people(people: list[Person], catalog: ImageCatalog) -> list[str]:
-    """Return user-facing validation errors for the current rows."""
+    """Return user-facing validation errors for the current rows.
+
+    Dates and catalog selections are checked once per distinct value, so large
+    imports with repeated designs and birth dates validate in a single pass.
+    """
 
-    errors: list[str] = []
     if not people:
         return ["Add at least one person."]
 
+    invalid_dates = {
+        value
+        for value in {person.birth_date for person in people}
+        if parse_birth_date(value) is None
+    }
+    missing_selections = {
+        (person.scene, person.color) for person in people
+    } - catalog.selections
+
+    errors: list[str] = []
     for row_number, person in enumerate(people, start=1):
         prefix = f"Row {row_number}"
         if not person.name.strip():
             errors.append(f"{prefix}: name is required.")
-        try:
-            _ = person.birth_date_value
-        except ValueError:
+        if person.birth_date in invalid_dates:
             errors.append(f"{prefix}: birth date must use dd-mm-yyyy.")
         if person.group not in (1, 2):
             errors.append(f"{prefix}: group must be 1 or 2.")
-        try:
-            catalog.image_for(person)
-        except ValueError as error:
-            errors.append(f"{prefix}: {error}.")
+        if (person.scene, person.color) in missing_selections:
+            errors.append(
+                f"{prefix}: No image exists for scene '{person.scene}' "
+                f"and color '{person.color}'."
+            )
 
     return errors
+
+
+def parse_birth_date(value: str) -> date | None:
+    """Parse a ``dd-mm-yyyy`` birth date, returning ``None`` when invalid."""
+
+    try:
+        return Person(birth_date=value).birth_date_value
+    except (AttributeError, ValueError):
+        return None
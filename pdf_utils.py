@@ -1,24 +1,54 @@
 from __future__ import annotations
 
+import asyncio
+import functools
 import json
 import math
+import os
 import re
-from collections.abc import Sequence
+import sys
+import threading
+from collections import OrderedDict, deque
+from collections.abc import Awaitable, Callable, Generator, Iterator, Sequence
+from concurrent.futures import ProcessPoolExecutor
 from dataclasses import dataclass
+from datetime import datetime, timezone
+from hashlib import sha256
 from pathlib import Path
-from typing import Any
+from time import perf_counter
+from types import ModuleType
+from typing import TYPE_CHECKING, Any, Literal
 
-import fitz
 from fpdf import FPDF
 
+from metrics import CACHE_REQUESTS, OPTIMIZE_SAVED_BYTES, metrics
 from models import ImageCatalog, Person, validate_people
 
+if TYPE_CHECKING:
+    import fitz
+
 BASE_DIR = Path(__file__).resolve().parent
 DEFAULT_LAYOUT_PATH = BASE_DIR / "layout.json"
 DEFAULT_FONT_PATH = BASE_DIR / "GUI" / "assets" / "SchoolKX_new_SemiBold.ttf"
 FONT_NAME = "SchoolKX"
+DOWNLOAD_NAME = "naamkaartjes.pdf"
 PROJECT_ATTACHMENT = "jufdea-project.json"
 PROJECT_VERSION = 1
+PDF_HEADER_BYTES = 1024
+INVALID_PDF_MESSAGE = "Het gekozen bestand is geen geldige JufDea-PDF."
+UNRECOGNIZED_PDF_MESSAGE = "Deze PDF bevat geen herkenbare JufDea-projectgegevens."
+# Generated PDFs carry a fixed creation date so identical projects produce
+# byte-identical files that can be cached and compared.
+DOCUMENT_DATE = datetime(2026, 1, 1, tzinfo=timezone.utc)
+# "fast" keeps the fpdf2 output; the others rewrite it with PyMuPDF.
+OPTIMIZE_MODES = ("fast", "balanced", "smallest")
+# Resolution the card designs are resampled to in "smallest" mode; enough
+# for a name card on an office printer.
+OPTIMIZE_DPI = 150
+OPTIMIZE_JPEG_QUALITY = 80
+# Legacy PDFs with at least this many person pages are read in parallel.
+LEGACY_PARALLEL_PAGES = 150
+_LEGACY_DATE_PATTERN = re.compile(r"\b\d{2}-\d{2}-\d{4}\b")
 
 
 @dataclass(slots=True)
@@ -27,6 +57,112 @@ class PdfProject:
     layout: dict[str, Any]
 
 
+@dataclass(slots=True, frozen=True)
+class RenderProgress:
+    """How far a stepwise render has come; the last step writes the file."""
+
+    done: int
+    total: int
+
+    @property
+    def fraction(self) -> float:
+        return self.done / self.total if self.total else 1.0
+
+
+@dataclass(slots=True, frozen=True)
+class OptimizeReport:
+    """Size and duration of one ``optimize_pdf`` pass."""
+
+    mode: str
+    original_bytes: int
+    optimized_bytes: int
+    seconds: float
+
+    @property
+    def saved_bytes(self) -> int:
+        return self.original_bytes - self.optimized_bytes
+
+
+# Yields progress after every card or page and returns the PDF bytes.
+RenderSteps = Generator[RenderProgress, None, bytes]
+
+
+class _ProjectPDF(FPDF):
+    """FPDF document whose file identifier is derived from its project data."""
+
+    project_digest: str | None = None
+
+    def file_id(self) -> str | Literal[-1] | None:
+        if self.project_digest is None:
+            return super().file_id()
+        identifier = self.project_digest[:32].upper()
+        return f"<{identifier}><{identifier}>"
+
+
+class DocumentCache:
+    """Thread-safe LRU cache of complete documents, bounded by total bytes."""
+
+    def __init__(self, max_bytes: int = 64_000_000) -> None:
+        self.max_bytes = max_bytes
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self._documents: OrderedDict[str, bytes] = OrderedDict()
+        # Owner (an editor session) -> the key and document it was handed.
+        self._held: dict[str, tuple[str, bytes]] = {}
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._documents)
+
+    def get(self, key: str) -> bytes | None:
+        with self._lock:
+            document = self._documents.get(key)
+            if document is None:
+                document = next(
+                    (held for k, held in self._held.values() if k == key), None
+                )
+                if document is not None:
+                    self.hits += 1
+                    metrics.increment(CACHE_REQUESTS, result="hit")
+                    return document
+                self.misses += 1
+                metrics.increment(CACHE_REQUESTS, result="miss")
+                return None
+            self._documents.move_to_end(key)
+            self.hits += 1
+            metrics.increment(CACHE_REQUESTS, result="hit")
+            return document
+
+    def put(self, key: str, document: bytes) -> None:
+        if len(document) > self.max_bytes:
+            return
+        with self._lock:
+            previous = self._documents.pop(key, None)
+            if previous is not None:
+                self.size -= len(previous)
+            self._documents[key] = document
+            self.size += len(document)
+            while self.size > self.max_bytes:
+                _, evicted = self._documents.popitem(last=False)
+                self.size -= len(evicted)
+
+    def hold(self, owner: str, key: str, document: bytes) -> None:
+        """Keep ``document`` available under ``key`` until ``owner`` replaces it.
+
+        A download link handed to a session must keep working even when the
+        document is larger than the cache or is evicted before the browser
+        fetches it. Each owner holds at most one document.
+        """
+
+        with self._lock:
+            self._held[owner] = (key, document)
+
+    def release(self, owner: str) -> None:
+        with self._lock:
+            self._held.pop(owner, None)
+
+
 def load_layout(path: Path = DEFAULT_LAYOUT_PATH) -> dict[str, Any]:
     with path.open(encoding="utf-8") as file:
         layout = json.load(file)
@@ -76,9 +212,15 @@ class PdfGenerator:
         self,
         layout_path: Path = DEFAULT_LAYOUT_PATH,
         font_path: Path = DEFAULT_FONT_PATH,
+        cache: DocumentCache | None = None,
+        optimize: str = "fast",
     ) -> None:
+        if optimize not in OPTIMIZE_MODES:
+            raise ValueError(f"Onbekende optimalisatie '{optimize}'.")
         self.layout_path = layout_path
         self.font_path = font_path
+        self.cache = cache
+        self.optimize = optimize
 
     def preview(
         self,
@@ -86,12 +228,38 @@ class PdfGenerator:
         catalog: ImageCatalog,
         layout: dict[str, Any] | None = None,
     ) -> bytes:
+        return finish_steps(self.preview_steps(person, catalog, layout))
+
+    def preview_steps(
+        self,
+        person: Person,
+        catalog: ImageCatalog,
+        layout: dict[str, Any] | None = None,
+    ) -> RenderSteps:
+        """Render a preview one card at a time; see ``render_cooperatively``."""
+
         layout = layout or load_layout(self.layout_path)
         validate_layout(layout)
+        total = _card_count(layout) + 1
         pdf = self._new_pdf()
         pdf.add_page(orientation="L")
-        self._draw_person_page(pdf, person, catalog, layout)
-        return bytes(pdf.output())
+        for done, _ in enumerate(
+            self._draw_person_page(pdf, person, catalog, layout), start=1
+        ):
+            yield RenderProgress(done, total)
+        with metrics.time(stage="output"):
+            return bytes(pdf.output())
+
+    def document_key(
+        self,
+        people: Sequence[Person],
+        catalog: ImageCatalog,
+        layout: dict[str, Any] | None = None,
+    ) -> str:
+        """Return the content address of the document for these inputs."""
+
+        payload = encode_project(people, layout or load_layout(self.layout_path))
+        return self._document_key(payload, catalog)
 
     def document(
         self,
@@ -99,26 +267,69 @@ class PdfGenerator:
         catalog: ImageCatalog,
         layout: dict[str, Any] | None = None,
     ) -> bytes:
+        return finish_steps(self.document_steps(people, catalog, layout))
+
+    def document_steps(
+        self,
+        people: Sequence[Person],
+        catalog: ImageCatalog,
+        layout: dict[str, Any] | None = None,
+    ) -> RenderSteps:
+        """Render a document one page at a time; cached documents take no steps."""
+
         layout = layout or load_layout(self.layout_path)
         validate_layout(layout)
+        payload = encode_project(people, layout)
+        key = self._document_key(payload, catalog)
+        if self.cache is not None and (cached := self.cache.get(key)) is not None:
+            return cached
+
+        total = len(people) + 2
         pdf = self._new_pdf()
-        self._draw_group_pages(pdf, people, catalog, title="hulpjeslijst")
-        self._draw_group_pages(pdf, people, catalog, title="namenlijst")
-        for person in people:
+        pdf.project_digest = key
+        with metrics.time(stage="group_pages"):
+            self._draw_group_pages(pdf, people, catalog, title="hulpjeslijst")
+            self._draw_group_pages(pdf, people, catalog, title="namenlijst")
+        yield RenderProgress(1, total)
+        for done, person in enumerate(people, start=2):
             pdf.add_page(orientation="L")
-            self._draw_person_page(pdf, person, catalog, layout)
+            for _ in self._draw_person_page(pdf, person, catalog, layout):
+                pass
+            yield RenderProgress(done, total)
         pdf.embed_file(
-            bytes=encode_project(people, layout),
+            bytes=payload,
             basename=PROJECT_ATTACHMENT,
             mime_type="application/json",
             desc="Editable JufDea project data",
             compress=True,
             checksum=True,
         )
-        return bytes(pdf.output())
-
-    def _new_pdf(self) -> FPDF:
-        pdf = FPDF()
+        with metrics.time(stage="output"):
+            document = bytes(pdf.output())
+        if self.optimize != "fast":
+            document, report = optimize_pdf(document, self.optimize)
+            metrics.increment(
+                OPTIMIZE_SAVED_BYTES, report.saved_bytes, mode=report.mode
+            )
+        if self.cache is not None:
+            self.cache.put(key, document)
+        return document
+
+    def _document_key(self, payload: bytes, catalog: ImageCatalog) -> str:
+        digest = sha256(payload)
+        digest.update(catalog.fingerprint.encode())
+        # The font's contents, not its install path, so every checkout agrees.
+        digest.update(_file_digest(self.font_path).encode())
+        # Unoptimized documents keep the key (and file identifier) they had
+        # before the optimize pass existed.
+        if self.optimize != "fast":
+            digest.update(self.optimize.encode())
+        return digest.hexdigest()
+
+    @metrics.timed("new_pdf")
+    def _new_pdf(self) -> _ProjectPDF:
+        pdf = _ProjectPDF()
+        pdf.set_creation_date(DOCUMENT_DATE)
         pdf.set_auto_page_break(auto=False)
         pdf.add_font(FONT_NAME, fname=str(self.font_path))
         pdf.set_font(FONT_NAME, size=14)
@@ -130,7 +341,9 @@ class PdfGenerator:
         person: Person,
         catalog: ImageCatalog,
         layout: dict[str, Any],
-    ) -> None:
+    ) -> Iterator[None]:
+        """Draw the cards of one person, yielding after each card."""
+
         image_path = catalog.image_for(person)
 
         for layout_type, details in layout["Types"].items():
@@ -152,23 +365,25 @@ class PdfGenerator:
                 positions["left (mm)"],
                 strict=True,
             ):
-                PdfGenerator._draw_card(
-                    pdf=pdf,
-                    layout_type=layout_type,
-                    name=person.name.strip(),
-                    birth_date=person.birth_date.strip(),
-                    image_path=image_path,
-                    x=float(left),
-                    y=float(top),
-                    width=width,
-                    height=height,
-                    portrait=portrait,
-                    margin=margin,
-                    top_offset=top_offset,
-                    base_font_size=base_font_size,
-                    text_margin=text_margin,
-                    bottom_offset=bottom_offset,
-                )
+                with metrics.time(stage="draw_card", layout=layout_type):
+                    PdfGenerator._draw_card(
+                        pdf=pdf,
+                        layout_type=layout_type,
+                        name=person.name.strip(),
+                        birth_date=person.birth_date.strip(),
+                        image_path=image_path,
+                        x=float(left),
+                        y=float(top),
+                        width=width,
+                        height=height,
+                        portrait=portrait,
+                        margin=margin,
+                        top_offset=top_offset,
+                        base_font_size=base_font_size,
+                        text_margin=text_margin,
+                        bottom_offset=bottom_offset,
+                    )
+                yield
 
     @staticmethod
     def _draw_card(
@@ -348,6 +563,57 @@ class PdfGenerator:
             y += cell_height
 
 
+def finish_steps(steps: RenderSteps) -> bytes:
+    """Run render steps to the end without pausing."""
+
+    while True:
+        try:
+            next(steps)
+        except StopIteration as finished:
+            return finished.value
+
+
+async def render_cooperatively(
+    steps: RenderSteps,
+    *,
+    on_progress: Callable[[RenderProgress], None] | None = None,
+    cancelled: Callable[[], bool] | None = None,
+    pause: Callable[[], Awaitable[None]] = lambda: asyncio.sleep(0),
+) -> bytes:
+    """Run render steps, handing control back to the event loop after each.
+
+    The browser build has a single thread: rendering inline would freeze the
+    page. Between steps the spinner animates and typing is handled; when
+    ``cancelled()`` turns true the render stops with ``CancelledError``.
+    """
+
+    try:
+        while True:
+            try:
+                progress = next(steps)
+            except StopIteration as finished:
+                return finished.value
+            if on_progress is not None:
+                on_progress(progress)
+            await pause()
+            if cancelled is not None and cancelled():
+                raise asyncio.CancelledError
+    finally:
+        steps.close()
+
+
+@functools.cache
+def _file_digest(path: Path) -> str:
+    return sha256(path.read_bytes()).hexdigest()
+
+
+def _card_count(layout: dict[str, Any]) -> int:
+    return sum(
+        len(details["Size & positions"]["top (mm)"])
+        for details in layout["Types"].values()
+    )
+
+
 def encode_project(
     people: Sequence[Person],
     layout: dict[str, Any],
@@ -364,27 +630,67 @@ def encode_project(
     return json.dumps(payload, ensure_ascii=False, separators=(",", ":")).encode()
 
 
-def load_pdf_project(pdf_bytes: bytes, catalog: ImageCatalog) -> PdfProject:
-    """Restore editable data from current or legacy generated PDFs."""
+def decode_project(data: bytes) -> PdfProject:
+    """Restore a project from the JSON payload written by ``encode_project``."""
 
     try:
-        with fitz.open(stream=pdf_bytes, filetype="pdf") as document:
-            attachments = set(document.embfile_names())
-            if PROJECT_ATTACHMENT in attachments:
-                payload = json.loads(document.embfile_get(PROJECT_ATTACHMENT))
-                project = _decode_current_project(payload)
-            elif "table.json" in attachments:
+        payload = json.loads(data)
+    except json.JSONDecodeError as error:
+        raise ValueError("De projectgegevens zijn geen geldige JSON.") from error
+    project = _decode_current_project(payload)
+    validate_layout(project.layout)
+    return project
+
+
+def probe_pdf(source: bytes | Path) -> str:
+    """Classify a JufDea PDF as ``current``, ``table`` or ``legacy`` cheaply.
+
+    Only the file edges, the embedded file names and the page boxes are read,
+    so unrelated PDFs are rejected with a ``ValueError`` before any page
+    content is parsed.
+    """
+
+    _check_pdf_header(source)
+    fitz = _fitz()
+    try:
+        with _open_pdf(source) as document:
+            return _probe_document(document)
+    except fitz.FileDataError as error:
+        raise ValueError(INVALID_PDF_MESSAGE) from error
+
+
+@metrics.timed("load_pdf_project")
+def load_pdf_project(
+    source: bytes | Path, catalog: ImageCatalog, *, parallel: bool = True
+) -> PdfProject:
+    """Restore editable data from current or legacy generated PDFs.
+
+    ``source`` may be the PDF bytes or a path; paths are opened from disk
+    without reading the whole file into memory. Pass ``parallel=False`` to
+    read large legacy files in-process instead of from a process pool.
+    """
+
+    _check_pdf_header(source)
+    fitz = _fitz()
+    try:
+        with _open_pdf(source) as document:
+            kind = _probe_document(document)
+            if kind == "current":
+                project = decode_project(document.embfile_get(PROJECT_ATTACHMENT))
+            elif kind == "table":
                 table = json.loads(document.embfile_get("table.json"))
                 layout = (
                     json.loads(document.embfile_get("layout.json"))
-                    if "layout.json" in attachments
+                    if "layout.json" in document.embfile_names()
                     else load_layout()
                 )
                 project = PdfProject(_decode_legacy_people(table), layout)
             else:
-                project = _reconstruct_legacy_project(document, catalog)
+                project = _reconstruct_legacy_project(
+                    document, catalog, source if parallel else None
+                )
     except (fitz.FileDataError, json.JSONDecodeError) as error:
-        raise ValueError("Het gekozen bestand is geen geldige JufDea-PDF.") from error
+        raise ValueError(INVALID_PDF_MESSAGE) from error
 
     validate_layout(project.layout)
     errors = validate_people(project.people, catalog)
@@ -393,9 +699,11 @@ def load_pdf_project(pdf_bytes: bytes, catalog: ImageCatalog) -> PdfProject:
     return project
 
 
+@metrics.timed("preview_png")
 def render_preview_png(pdf_bytes: bytes, zoom: float = 1.5) -> bytes:
     """Render the first PDF page to a stable browser image."""
 
+    fitz = _fitz()
     with fitz.open(stream=pdf_bytes, filetype="pdf") as document:
         if document.page_count == 0:
             raise ValueError("De PDF bevat geen pagina's.")
@@ -404,6 +712,101 @@ def render_preview_png(pdf_bytes: bytes, zoom: float = 1.5) -> bytes:
         return pixmap.tobytes("png")
 
 
+@metrics.timed("optimize")
+def optimize_pdf(
+    pdf_bytes: bytes, mode: str = "balanced", *, dpi: int = OPTIMIZE_DPI
+) -> tuple[bytes, OptimizeReport]:
+    """Rewrite a generated PDF to make it smaller; see ``OPTIMIZE_MODES``.
+
+    ``balanced`` drops unused objects and packs the objects into compressed
+    object streams. ``smallest`` also merges identical streams (fonts and
+    images) and resamples images above ``dpi`` to ``dpi``. The original is
+    returned when a pass does not make the file smaller. Embedded files, and
+    with them the project data, are kept as they are.
+    """
+
+    if mode not in OPTIMIZE_MODES:
+        raise ValueError(f"Onbekende optimalisatie '{mode}'.")
+    start = perf_counter()
+    optimized = pdf_bytes
+    if mode != "fast":
+        fitz = _fitz()
+        with fitz.open(stream=pdf_bytes, filetype="pdf") as document:
+            if mode == "smallest":
+                document.rewrite_images(
+                    dpi_threshold=dpi + 1,
+                    dpi_target=dpi,
+                    quality=OPTIMIZE_JPEG_QUALITY,
+                )
+            candidate = document.tobytes(
+                garbage=4 if mode == "smallest" else 3,
+                deflate=True,
+                use_objstms=1,
+                # Keep the identifier fpdf2 derived from the project data so
+                # optimized documents stay byte-identical across runs.
+                no_new_id=True,
+            )
+        if len(candidate) < len(pdf_bytes):
+            optimized = candidate
+    return optimized, OptimizeReport(
+        mode, len(pdf_bytes), len(optimized), perf_counter() - start
+    )
+
+
+def _fitz() -> ModuleType:
+    # PyMuPDF is the largest dependency by far. Importing it on first use
+    # keeps it off the startup path; the browser build installs it then.
+    import fitz
+
+    return fitz
+
+
+def _open_pdf(source: bytes | Path) -> fitz.Document:
+    fitz = _fitz()
+    if isinstance(source, Path):
+        return fitz.open(source, filetype="pdf")
+    return fitz.open(stream=source, filetype="pdf")
+
+
+def _check_pdf_header(source: bytes | Path) -> None:
+    """Reject files without a PDF header.
+
+    The end of the file is left to PyMuPDF, which repairs files with trailing
+    bytes after ``%%EOF`` or a damaged cross-reference table.
+    """
+
+    if isinstance(source, Path):
+        with source.open("rb") as file:
+            head = file.read(PDF_HEADER_BYTES)
+    else:
+        head = source[:PDF_HEADER_BYTES]
+    if b"%PDF-" not in head:
+        raise ValueError(INVALID_PDF_MESSAGE)
+
+
+def _probe_document(document: fitz.Document) -> str:
+    attachments = set(document.embfile_names())
+    if PROJECT_ATTACHMENT in attachments:
+        return "current"
+    if "table.json" in attachments:
+        return "table"
+
+    # Old generated PDFs start with portrait group pages and end with landscape
+    # person pages that each show a card image.
+    landscape = [
+        page_number
+        for page_number in range(document.page_count)
+        if (box := document.page_cropbox(page_number)).width > box.height
+    ]
+    if (
+        not landscape
+        or len(landscape) == document.page_count
+        or not document.get_page_images(landscape[0])
+    ):
+        raise ValueError(UNRECOGNIZED_PDF_MESSAGE)
+    return "legacy"
+
+
 def _decode_current_project(payload: Any) -> PdfProject:
     if not isinstance(payload, dict):
         raise ValueError("De ingesloten projectgegevens hebben een ongeldig formaat.")
@@ -446,33 +849,41 @@ def _decode_legacy_people(table: Any) -> list[Person]:
 def _reconstruct_legacy_project(
     document: fitz.Document,
     catalog: ImageCatalog,
+    source: bytes | Path | None = None,
 ) -> PdfProject:
-    """Recover rows from old generated PDFs that predate embedded project data."""
-
-    person_pages = [page for page in document if page.rect.width > page.rect.height]
-    group_pages = [page for page in document if page.rect.width <= page.rect.height]
+    """Recover rows from old generated PDFs that predate embedded project data.
+
+    Large files have their person pages read by a process pool when the
+    ``source`` bytes or path are given. Every person page reuses the same few image
+    xrefs, so each xref is extracted and identified only once.
+    """
+
+    person_pages: list[int] = []
+    group_pages: list[int] = []
+    for page in document:
+        rect = page.rect
+        (person_pages if rect.width > rect.height else group_pages).append(page.number)
     if not person_pages or not group_pages:
-        raise ValueError("Deze PDF bevat geen herkenbare JufDea-projectgegevens.")
+        raise ValueError(UNRECOGNIZED_PDF_MESSAGE)
 
-    people: list[Person] = []
-    date_pattern = re.compile(r"\b\d{2}-\d{2}-\d{4}\b")
-    for page in person_pages:
-        lines = [line.strip() for line in page.get_text().splitlines() if line.strip()]
-        birth_date = next(
-            (match.group() for line in lines if (match := date_pattern.search(line))),
-            "",
-        )
-        names = [
-            line
-            for line in lines
-            if not date_pattern.fullmatch(line) and not line.endswith("fest")
-        ]
-        images = page.get_images(full=True)
-        if not names or not birth_date or not images:
-            raise ValueError("Deze PDF bevat geen herkenbare JufDea-projectgegevens.")
+    if (
+        source is not None
+        and len(person_pages) >= LEGACY_PARALLEL_PAGES
+        and sys.platform != "emscripten"
+    ):
+        page_rows = _read_person_pages_parallel(source, person_pages)
+    else:
+        page_rows = _read_person_pages(document, person_pages)
 
-        image = document.extract_image(images[0][0])["image"]
-        scene, color = catalog.selection_for_image(image)
+    people: list[Person] = []
+    selections: dict[int, tuple[str, str]] = {}
+    for names, birth_date, xref in page_rows:
+        if not names or not birth_date or xref is None:
+            raise ValueError(UNRECOGNIZED_PDF_MESSAGE)
+        if xref not in selections:
+            image = document.extract_image(xref)["image"]
+            selections[xref] = catalog.selection_for_image(image)
+        scene, color = selections[xref]
         people.append(
             Person(
                 name=names[0],
@@ -483,7 +894,8 @@ def _reconstruct_legacy_project(
         )
 
     group_rows: list[tuple[str, int]] = []
-    for page in group_pages:
+    for page_number in group_pages:
+        page = document.load_page(page_number)
         midpoint = page.rect.width / 2
         for block in page.get_text("dict")["blocks"]:
             for line in block.get("lines", []):
@@ -492,19 +904,81 @@ def _reconstruct_legacy_project(
                     group = 1 if line["bbox"][0] < midpoint else 2
                     group_rows.append((text, group))
 
-    unused_rows = list(group_rows)
+    # Index every row under each first-name prefix that ends at a space, so a
+    # person matches the first unused row whose full name is their name or
+    # starts with their name followed by a space.
+    rows_by_name: dict[str, deque[int]] = {}
+    for index, (full_name, _) in enumerate(group_rows):
+        for end, character in enumerate(full_name):
+            if character == " ":
+                rows_by_name.setdefault(full_name[:end], deque()).append(index)
+        rows_by_name.setdefault(full_name, deque()).append(index)
+
+    used_rows: set[int] = set()
     for person in people:
-        match_index = next(
-            (
-                index
-                for index, (full_name, _) in enumerate(unused_rows)
-                if full_name == person.name or full_name.startswith(f"{person.name} ")
-            ),
-            None,
-        )
-        if match_index is None:
+        candidates = rows_by_name.get(person.name)
+        while candidates and candidates[0] in used_rows:
+            candidates.popleft()
+        if not candidates:
             continue
-        full_name, person.group = unused_rows.pop(match_index)
+        row_index = candidates.popleft()
+        used_rows.add(row_index)
+        full_name, person.group = group_rows[row_index]
         person.family_name = full_name.removeprefix(person.name).strip()
 
     return PdfProject(people, load_layout())
+
+
+def _read_person_pages(
+    document: fitz.Document,
+    page_numbers: Sequence[int],
+) -> list[tuple[list[str], str, int | None]]:
+    """Return the names, birth date and first image xref of person pages."""
+
+    rows: list[tuple[list[str], str, int | None]] = []
+    for page_number in page_numbers:
+        page = document.load_page(page_number)
+        lines = [line.strip() for line in page.get_text().splitlines() if line.strip()]
+        birth_date = next(
+            (
+                match.group()
+                for line in lines
+                if (match := _LEGACY_DATE_PATTERN.search(line))
+            ),
+            "",
+        )
+        names = [
+            line
+            for line in lines
+            if not _LEGACY_DATE_PATTERN.fullmatch(line) and not line.endswith("fest")
+        ]
+        images = page.get_images(full=True)
+        rows.append((names, birth_date, images[0][0] if images else None))
+    return rows
+
+
+def _read_person_pages_from_source(
+    source: bytes | Path,
+    page_numbers: Sequence[int],
+) -> list[tuple[list[str], str, int | None]]:
+    with _open_pdf(source) as document:
+        return _read_person_pages(document, page_numbers)
+
+
+def _read_person_pages_parallel(
+    source: bytes | Path,
+    page_numbers: Sequence[int],
+) -> list[tuple[list[str], str, int | None]]:
+    workers = min(os.cpu_count() or 1, math.ceil(len(page_numbers) / 50))
+    chunk_size = math.ceil(len(page_numbers) / workers)
+    chunks = [
+        page_numbers[start : start + chunk_size]
+        for start in range(0, len(page_numbers), chunk_size)
+    ]
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        results = executor.map(
+            _read_person_pages_from_source,
+            [source] * len(chunks),
+            chunks,
+        )
+        return [row for chunk in results for row in chunk]
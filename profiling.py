@@ -0,0 +1,157 @@
+"""Opt-in profiling of slow preview and document renders.
+
+With ``JUFDEA_PROFILE=1`` (or the switch on the admin page) every render runs
+under ``cProfile``. Renders slower than the threshold leave two files in the
+profile directory: the ``.prof`` statistics and the ``encode_project`` payload
+that reproduces the render. Inspect them with::
+
+    uv run python -m pstats profiles/<naam>.prof
+    uv run python batch.py <map-met-de-json> uit/
+"""
+
+from __future__ import annotations
+
+import cProfile
+import heapq
+import logging
+import os
+import threading
+from collections.abc import Iterator, Sequence
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from datetime import datetime
+from pathlib import Path
+from time import perf_counter
+from typing import Any
+
+from models import Person
+from pdf_utils import BASE_DIR, encode_project
+
+log = logging.getLogger(__name__)
+
+DEFAULT_PROFILE_DIR = BASE_DIR / "profiles"
+DEFAULT_THRESHOLD_SECONDS = 0.5
+MAX_RECORDS = 20
+
+
+@dataclass(order=True, slots=True)
+class ProfileRecord:
+    """One saved slow render, ordered by duration."""
+
+    seconds: float
+    kind: str = field(compare=False)
+    rows: int = field(compare=False)
+    created: datetime = field(compare=False)
+    profile_path: Path = field(compare=False)
+    payload_path: Path = field(compare=False)
+
+
+class RenderProfiler:
+    """Profile renders and keep the slowest ones on disk.
+
+    Since Python 3.12 only one ``cProfile`` profiler can be active at a time.
+    Renders that start while another render is being profiled are only timed,
+    and the active profile may include calls from those concurrent renders.
+    """
+
+    def __init__(
+        self,
+        directory: Path = DEFAULT_PROFILE_DIR,
+        *,
+        threshold_seconds: float = DEFAULT_THRESHOLD_SECONDS,
+        enabled: bool = False,
+        max_records: int = MAX_RECORDS,
+    ) -> None:
+        self.directory = directory
+        self.threshold_seconds = threshold_seconds
+        self.enabled = enabled
+        self.max_records = max_records
+        self._records: list[ProfileRecord] = []
+        self._active = threading.Lock()
+        self._records_lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls) -> RenderProfiler:
+        """Read ``JUFDEA_PROFILE``, ``JUFDEA_PROFILE_DIR`` and the threshold."""
+
+        return cls(
+            Path(os.environ.get("JUFDEA_PROFILE_DIR", DEFAULT_PROFILE_DIR)),
+            threshold_seconds=float(
+                os.environ.get(
+                    "JUFDEA_PROFILE_THRESHOLD_MS",
+                    DEFAULT_THRESHOLD_SECONDS * 1000,
+                )
+            )
+            / 1000,
+            enabled=os.environ.get("JUFDEA_PROFILE", "") not in {"", "0"},
+        )
+
+    @property
+    def slowest(self) -> list[ProfileRecord]:
+        """The saved renders, slowest first."""
+
+        with self._records_lock:
+            return sorted(self._records, reverse=True)
+
+    @contextmanager
+    def profile(
+        self,
+        kind: str,
+        people: Sequence[Person],
+        layout: dict[str, Any],
+    ) -> Iterator[None]:
+        """Profile the ``with`` block and save it if it exceeds the threshold."""
+
+        if not self.enabled or not self._active.acquire(blocking=False):
+            yield
+            return
+        profiler = cProfile.Profile()
+        start = perf_counter()
+        try:
+            profiler.enable()
+            try:
+                yield
+            finally:
+                profiler.disable()
+        finally:
+            self._active.release()
+        seconds = perf_counter() - start
+        if seconds >= self.threshold_seconds:
+            try:
+                self._save(kind, people, layout, profiler, seconds)
+            except Exception:
+                # A full disk or unwritable directory must not fail the render.
+                log.exception("Could not save the profile of a slow %s", kind)
+
+    def _save(
+        self,
+        kind: str,
+        people: Sequence[Person],
+        layout: dict[str, Any],
+        profiler: cProfile.Profile,
+        seconds: float,
+    ) -> None:
+        created = datetime.now()
+        stem = f"{created:%Y%m%d-%H%M%S-%f}-{kind}-{round(seconds * 1000)}ms"
+        self.directory.mkdir(parents=True, exist_ok=True)
+        record = ProfileRecord(
+            seconds=seconds,
+            kind=kind,
+            rows=len(people),
+            created=created,
+            profile_path=self.directory / f"{stem}.prof",
+            payload_path=self.directory / f"{stem}.json",
+        )
+        profiler.dump_stats(record.profile_path)
+        record.payload_path.write_bytes(encode_project(people, layout))
+
+        with self._records_lock:
+            if len(self._records) < self.max_records:
+                heapq.heappush(self._records, record)
+                return
+            dropped = heapq.heappushpop(self._records, record)
+        dropped.profile_path.unlink(missing_ok=True)
+        dropped.payload_path.unlink(missing_ok=True)
+
+
+render_profiler = RenderProfiler.from_env()
@@ -0,0 +1,255 @@
+"""Rasterise complete name-card documents for print shops and display screens.
+
+Example::
+
+    uv run python raster.py naamkaartjes.pdf kaartjes.zip
+    uv run python raster.py naamkaartjes.pdf scherm.zip --format webp --dpi 96
+    uv run python raster.py naamkaartjes.pdf drukker.zip --pages 3-10,12 --dpi 300
+
+Pages are split across a process pool. The document is written to one
+temporary file that every worker opens itself, so the PDF is not copied into
+each task. Images are written to the zip in page order while later pages are
+still rendering; only a few pages per worker are held in memory.
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import sys
+import tempfile
+import zipfile
+from collections import deque
+from collections.abc import Iterator, Sequence
+from concurrent.futures import Future, ProcessPoolExecutor
+from contextlib import contextmanager
+from itertools import islice
+from pathlib import Path
+from time import perf_counter
+from typing import IO, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    import fitz
+
+# Image format -> file extension in the zip.
+RASTER_FORMATS = {"png": "png", "jpeg": "jpg", "webp": "webp"}
+DEFAULT_DPI = 150
+MAX_DPI = 600
+DEFAULT_QUALITY = 85
+# Pages in flight per worker; bounds the images kept in memory.
+PAGES_PER_WORKER = 4
+
+_document: fitz.Document | None = None
+
+
+def parse_pages(spec: str | None, page_count: int) -> list[int]:
+    """Turn ``"1-3,5"`` (1-based, inclusive) into zero-based page numbers.
+
+    ``None`` or an empty string selects every page.
+    """
+
+    if not spec:
+        return list(range(page_count))
+    pages: list[int] = []
+    for part in spec.split(","):
+        first, _, last = part.strip().partition("-")
+        try:
+            start = int(first)
+            end = int(last) if last else start
+        except ValueError:
+            raise ValueError(f"Ongeldige paginaselectie '{part.strip()}'.") from None
+        if not 1 <= start <= end <= page_count:
+            raise ValueError(f"Pagina's '{part.strip()}' vallen buiten 1-{page_count}.")
+        pages.extend(range(start - 1, end))
+    return list(dict.fromkeys(pages))
+
+
+def rasterize_page(
+    document: fitz.Document,
+    page_number: int,
+    *,
+    image_format: str = "png",
+    dpi: int = DEFAULT_DPI,
+    quality: int = DEFAULT_QUALITY,
+) -> bytes:
+    """Render one page of an open document to PNG, JPEG or WebP bytes."""
+
+    pixmap = document.load_page(page_number).get_pixmap(dpi=dpi, alpha=False)
+    if image_format == "png":
+        return pixmap.tobytes("png")
+    if image_format == "jpeg":
+        return pixmap.tobytes("jpeg", jpg_quality=quality)
+    if image_format == "webp":
+        # PyMuPDF has no WebP encoder; Pillow has one.
+        return pixmap.pil_tobytes(format="WEBP", quality=quality)
+    raise ValueError(f"Onbekend afbeeldingsformaat '{image_format}'.")
+
+
+def rasterize_to_zip(
+    source: bytes | Path,
+    output: Path | IO[bytes],
+    *,
+    pages: str | None = None,
+    image_format: str = "png",
+    dpi: int = DEFAULT_DPI,
+    quality: int = DEFAULT_QUALITY,
+    workers: int | None = None,
+) -> list[str]:
+    """Write the selected pages of ``source`` as images into a zip archive.
+
+    Returns the names written, in page order. ``workers=1`` renders in this
+    process, which is also what happens in the browser build.
+    """
+
+    if image_format not in RASTER_FORMATS:
+        raise ValueError(f"Onbekend afbeeldingsformaat '{image_format}'.")
+    if not 1 <= dpi <= MAX_DPI:
+        raise ValueError(f"De resolutie moet tussen 1 en {MAX_DPI} dpi liggen.")
+
+    import fitz
+
+    with _shared_file(source) as path:
+        with fitz.open(path, filetype="pdf") as document:
+            page_numbers = parse_pages(pages, document.page_count)
+        extension = RASTER_FORMATS[image_format]
+        names = []
+        # Images are already compressed; deflating them again only costs time.
+        with zipfile.ZipFile(output, "w", zipfile.ZIP_STORED) as archive:
+            for page_number, image in _rasterize(
+                path, page_numbers, image_format, dpi, quality, workers
+            ):
+                name = f"pagina-{page_number + 1:03d}.{extension}"
+                archive.writestr(name, image)
+                names.append(name)
+    return names
+
+
+def main(argv: Sequence[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(
+        description="Zet alle of enkele pagina's van een PDF om naar afbeeldingen."
+    )
+    parser.add_argument("input", type=Path, help="PDF met naamkaartjes")
+    parser.add_argument("output", type=Path, help="zip-bestand voor de afbeeldingen")
+    parser.add_argument(
+        "--format",
+        choices=RASTER_FORMATS,
+        default="png",
+        help="afbeeldingsformaat",
+    )
+    parser.add_argument("--dpi", type=int, default=DEFAULT_DPI, help="resolutie in dpi")
+    parser.add_argument(
+        "--quality",
+        type=int,
+        default=DEFAULT_QUALITY,
+        help="kwaliteit voor JPEG en WebP (1-100)",
+    )
+    parser.add_argument("--pages", help="pagina's, bijvoorbeeld 1-3,5 (standaard alle)")
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=os.cpu_count(),
+        help="aantal parallelle processen",
+    )
+    args = parser.parse_args(argv)
+    if not args.input.is_file():
+        parser.error(f"{args.input} bestaat niet.")
+    if not 1 <= args.quality <= 100:
+        parser.error("De kwaliteit moet tussen 1 en 100 liggen.")
+
+    start = perf_counter()
+    try:
+        names = rasterize_to_zip(
+            args.input,
+            args.output,
+            pages=args.pages,
+            image_format=args.format,
+            dpi=args.dpi,
+            quality=args.quality,
+            workers=args.workers,
+        )
+    except ValueError as error:
+        parser.error(str(error))
+    print(
+        f"{len(names)} pagina's naar {args.output} geschreven "
+        f"in {perf_counter() - start:.2f}s."
+    )
+    return 0
+
+
+@contextmanager
+def _shared_file(source: bytes | Path) -> Iterator[Path]:
+    """Yield a path for ``source``; bytes are spooled to a temporary file."""
+
+    if isinstance(source, Path):
+        yield source
+        return
+    with tempfile.NamedTemporaryFile(suffix=".pdf", delete=False) as file:
+        file.write(source)
+    try:
+        yield Path(file.name)
+    finally:
+        Path(file.name).unlink(missing_ok=True)
+
+
+def _rasterize(
+    path: Path,
+    page_numbers: Sequence[int],
+    image_format: str,
+    dpi: int,
+    quality: int,
+    workers: int | None,
+) -> Iterator[tuple[int, bytes]]:
+    import fitz
+
+    workers = min(workers or os.cpu_count() or 1, len(page_numbers) or 1)
+    if workers == 1 or sys.platform == "emscripten":
+        with fitz.open(path, filetype="pdf") as document:
+            for page_number in page_numbers:
+                yield (
+                    page_number,
+                    rasterize_page(
+                        document,
+                        page_number,
+                        image_format=image_format,
+                        dpi=dpi,
+                        quality=quality,
+                    ),
+                )
+        return
+
+    with ProcessPoolExecutor(
+        max_workers=workers, initializer=_init_worker, initargs=(path,)
+    ) as executor:
+
+        def submit(page_number: int) -> tuple[int, Future[bytes]]:
+            future = executor.submit(
+                _render_page, page_number, image_format, dpi, quality
+            )
+            return page_number, future
+
+        # A bounded window of submitted pages, handed out in page order.
+        remaining = iter(page_numbers)
+        window = deque(map(submit, islice(remaining, workers * PAGES_PER_WORKER)))
+        while window:
+            page_number, future = window.popleft()
+            image = future.result()
+            window.extend(map(submit, islice(remaining, 1)))
+            yield page_number, image
+
+
+def _init_worker(path: Path) -> None:
+    global _document
+    import fitz
+
+    _document = fitz.open(path, filetype="pdf")
+
+
+def _render_page(page_number: int, image_format: str, dpi: int, quality: int) -> bytes:
+    assert _document is not None
+    return rasterize_page(
+        _document, page_number, image_format=image_format, dpi=dpi, quality=quality
+    )
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,557 @@
+"""Render previews and documents in separate worker daemons over a socket.
+
+A worker loads the design catalog, the layout and the font once and then
+serves ``ping``, ``preview``, ``document`` and ``load`` jobs. Start one per
+CPU core, on this machine or on others::
+
+    uv run python render_worker.py --listen unix:/tmp/jufdea-1.sock
+    uv run python render_worker.py --listen 0.0.0.0:7070
+
+and list them in ``JUFDEA_RENDER_WORKERS`` (comma separated) for the app.
+
+Every message is one frame: an 8-byte header with the lengths of a JSON
+object and of a binary body, followed by both. PDFs and PNGs travel as the
+body, so nothing is pickled between machines. Uploaded PDFs are opened in the
+worker's own sandboxed parse pool. With ``JUFDEA_WORKER_TOKEN`` set, workers
+only accept requests that carry the same token.
+
+Workers reload their designs like the app does. Jobs carry the fingerprint
+of the app's catalog and the optimize mode, so a worker with other designs
+refuses the job (and is marked unhealthy) instead of rendering a document
+that does not match the app's cache key.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import contextlib
+import hmac
+import json
+import logging
+import os
+import struct
+import sys
+import tempfile
+import time
+from collections.abc import Callable, Sequence
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import TYPE_CHECKING, Any
+
+from models import DEFAULT_IMAGE_DIR, CatalogWatcher, ImageCatalog, Person
+from sandbox import ParseLimits, ParseWorkerPool, ProjectTooComplexError
+
+if TYPE_CHECKING:
+    from pdf_utils import PdfGenerator, PdfProject
+
+log = logging.getLogger(__name__)
+
+WORKERS_ENV = "JUFDEA_RENDER_WORKERS"
+TOKEN_ENV = "JUFDEA_WORKER_TOKEN"
+UNAVAILABLE_MESSAGE = "Er is geen renderserver bereikbaar."
+TIMEOUT_MESSAGE = "De renderserver deed er te lang over."
+STALE_MESSAGE = "De renderserver heeft andere ontwerpen."
+# Seconds before a worker that failed is tried again.
+RETRY_AFTER_SECONDS = 5.0
+# Jobs the app sends to one worker at once: one rendering and one waiting, so
+# the worker does not idle during the network round trip.
+WORKER_SLOTS = 2
+CATALOG_POLL_SECONDS = 5.0
+MAX_FRAME_BYTES = 256_000_000
+_HEADER = struct.Struct(">II")
+
+Connection = tuple[asyncio.StreamReader, asyncio.StreamWriter]
+
+
+class WorkerError(RuntimeError):
+    """A worker could not be reached or answered unexpectedly."""
+
+
+async def write_frame(
+    writer: asyncio.StreamWriter, meta: dict[str, Any], body: bytes = b""
+) -> None:
+    header = json.dumps(meta, ensure_ascii=False, separators=(",", ":")).encode()
+    writer.write(_HEADER.pack(len(header), len(body)) + header + body)
+    await writer.drain()
+
+
+async def read_frame(reader: asyncio.StreamReader) -> tuple[dict[str, Any], bytes]:
+    header_size, body_size = _HEADER.unpack(await reader.readexactly(_HEADER.size))
+    if header_size + body_size > MAX_FRAME_BYTES:
+        raise WorkerError("Frame is too large.")
+    meta = json.loads(await reader.readexactly(header_size))
+    return meta, await reader.readexactly(body_size)
+
+
+async def open_connection(address: str) -> Connection:
+    """Connect to ``unix:/path`` or ``host:port``."""
+
+    if address.startswith("unix:"):
+        return await asyncio.open_unix_connection(address.removeprefix("unix:"))
+    host, _, port = address.rpartition(":")
+    return await asyncio.open_connection(host, int(port))
+
+
+class RenderWorker:
+    """The daemon side: answers jobs with the resources it loaded at startup."""
+
+    def __init__(
+        self,
+        catalog: ImageCatalog,
+        generator: PdfGenerator,
+        parse_pool: ParseWorkerPool,
+        *,
+        layout: dict[str, Any] | None = None,
+        token: str = "",
+    ) -> None:
+        self.catalog = catalog
+        self.generator = generator
+        self._generators = {generator.optimize: generator}
+        # Jobs without a layout of their own use the one read at startup.
+        self.layout = layout
+        self.parse_pool = parse_pool
+        self.token = token
+        self.active = 0
+        self.completed = 0
+        # Rendering is CPU-bound Python, so one thread per worker process is
+        # enough; it keeps the event loop free to answer health checks.
+        self._executor = ThreadPoolExecutor(max_workers=1)
+
+    async def serve(self, address: str) -> asyncio.Server:
+        if address.startswith("unix:"):
+            return await asyncio.start_unix_server(
+                self.handle, address.removeprefix("unix:")
+            )
+        host, _, port = address.rpartition(":")
+        return await asyncio.start_server(self.handle, host, int(port))
+
+    async def handle(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ) -> None:
+        try:
+            while True:
+                try:
+                    meta, body = await read_frame(reader)
+                except (asyncio.IncompleteReadError, ConnectionError):
+                    return
+                reply, data = await self.dispatch(meta, body)
+                await write_frame(writer, reply, data)
+        except (ConnectionError, WorkerError) as error:
+            log.warning("Render worker connection closed: %s", error)
+        finally:
+            writer.close()
+
+    async def dispatch(
+        self, meta: dict[str, Any], body: bytes
+    ) -> tuple[dict[str, Any], bytes]:
+        if self.token and not hmac.compare_digest(
+            str(meta.get("token", "")), self.token
+        ):
+            return _failure("unauthorized", "Ongeldig token."), b""
+        operation = meta.get("op")
+        if operation == "ping":
+            return {
+                "status": "ok",
+                "active": self.active,
+                "completed": self.completed,
+                "catalog": self.catalog.fingerprint,
+            }, b""
+
+        expected = meta.get("catalog")
+        if operation in {"preview", "document"} and expected not in {
+            None,
+            self.catalog.fingerprint,
+        }:
+            return _failure("stale", STALE_MESSAGE), b""
+
+        self.active += 1
+        try:
+            if operation == "preview":
+                data = await self._in_thread(
+                    self._preview, meta["person"], meta.get("layout"), meta["zoom"]
+                )
+            elif operation == "document":
+                data = await self._in_thread(
+                    self._document,
+                    meta["people"],
+                    meta.get("layout"),
+                    meta.get("optimize", self.generator.optimize),
+                )
+            elif operation == "load":
+                data = await self._load(body)
+            else:
+                return _failure("invalid", f"Onbekende opdracht '{operation}'."), b""
+        except ProjectTooComplexError as error:
+            return _failure("too_complex", str(error)), b""
+        except (KeyError, TypeError, ValueError) as error:
+            return _failure("invalid", str(error)), b""
+        except Exception as error:
+            log.exception("Render job failed")
+            return _failure("failed", str(error)), b""
+        finally:
+            self.active -= 1
+        self.completed += 1
+        return {"status": "ok"}, data
+
+    async def _in_thread(self, function: Callable[..., bytes], *args: Any) -> bytes:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, function, *args)
+
+    def _preview(
+        self, person: dict[str, Any], layout: dict[str, Any] | None, zoom: float
+    ) -> bytes:
+        from pdf_utils import render_preview_png
+
+        pdf = self.generator.preview(
+            Person.from_dict(person), self.catalog, layout or self.layout
+        )
+        return render_preview_png(pdf, zoom)
+
+    def _document(
+        self,
+        people: list[dict[str, Any]],
+        layout: dict[str, Any] | None,
+        optimize: str,
+    ) -> bytes:
+        return self._generator(optimize).document(
+            [Person.from_dict(person) for person in people],
+            self.catalog,
+            layout or self.layout,
+        )
+
+    def _generator(self, optimize: str) -> PdfGenerator:
+        """The generator for ``optimize``, sharing the document cache."""
+
+        from pdf_utils import PdfGenerator
+
+        generator = self._generators.get(optimize)
+        if generator is None:
+            # Raises ValueError for an unknown mode.
+            generator = PdfGenerator(cache=self.generator.cache, optimize=optimize)
+            self._generators[optimize] = generator
+        return generator
+
+    async def _load(self, pdf: bytes) -> bytes:
+        from pdf_utils import encode_project
+
+        with tempfile.NamedTemporaryFile(suffix=".pdf", delete=False) as file:
+            file.write(pdf)
+            path = Path(file.name)
+        try:
+            project = await self.parse_pool.load(path, catalog=self.catalog.fingerprint)
+        finally:
+            path.unlink(missing_ok=True)
+        return encode_project(project.people, project.layout)
+
+
+@dataclass(slots=True)
+class WorkerEndpoint:
+    """The client's view of one worker."""
+
+    address: str
+    in_flight: int = 0
+    reported_load: int = 0
+    healthy: bool = True
+    retry_at: float = 0.0
+    failures: int = 0
+    idle: list[Connection] = field(default_factory=list)
+
+    @property
+    def available(self) -> bool:
+        return self.healthy or time.monotonic() >= self.retry_at
+
+
+class RenderWorkerPool:
+    """Send jobs to the least busy healthy worker, retrying on another one."""
+
+    def __init__(
+        self,
+        addresses: Sequence[str],
+        *,
+        token: str = "",
+        retries: int = 2,
+        timeout: float = 120.0,
+    ) -> None:
+        if not addresses:
+            raise ValueError("At least one render worker address is required.")
+        self.endpoints = [WorkerEndpoint(address) for address in addresses]
+        self.token = token
+        self.retries = retries
+        self.timeout = timeout
+        # Fingerprint of the app's current catalog; workers with other designs
+        # are not used.
+        self.catalog: str | None = None
+        self._next = 0
+
+    @classmethod
+    def from_env(cls) -> RenderWorkerPool | None:
+        """Return a pool for ``JUFDEA_RENDER_WORKERS``, or ``None`` when unset."""
+
+        addresses = [
+            address.strip()
+            for address in os.environ.get(WORKERS_ENV, "").split(",")
+            if address.strip()
+        ]
+        if not addresses:
+            return None
+        return cls(addresses, token=os.environ.get(TOKEN_ENV, ""))
+
+    @property
+    def capacity(self) -> int:
+        """How many renders the app should have in flight on these workers."""
+
+        return len(self.endpoints) * WORKER_SLOTS
+
+    async def preview_png(
+        self,
+        person: Person,
+        layout: dict[str, Any] | None = None,
+        zoom: float = 1.5,
+        *,
+        catalog: str | None = None,
+    ) -> bytes:
+        _, png = await self._request(
+            {
+                "op": "preview",
+                "person": person.to_dict(),
+                "layout": layout,
+                "zoom": zoom,
+                "catalog": catalog or self.catalog,
+            }
+        )
+        return png
+
+    async def document(
+        self,
+        people: Sequence[Person],
+        layout: dict[str, Any] | None = None,
+        *,
+        optimize: str = "fast",
+        catalog: str | None = None,
+    ) -> bytes:
+        """Render a document; ``catalog`` is the fingerprint it must match."""
+
+        _, pdf = await self._request(
+            {
+                "op": "document",
+                "people": [person.to_dict() for person in people],
+                "layout": layout,
+                "optimize": optimize,
+                "catalog": catalog or self.catalog,
+            }
+        )
+        return pdf
+
+    async def load(self, path: Path) -> PdfProject:
+        from pdf_utils import decode_project
+
+        _, payload = await self._request({"op": "load"}, path.read_bytes())
+        return decode_project(payload)
+
+    async def check(self) -> dict[str, bool]:
+        """Ping every worker and record its health and reported load."""
+
+        async def ping(endpoint: WorkerEndpoint) -> bool:
+            try:
+                reply, _ = await self._exchange(endpoint, {"op": "ping"}, b"", 5.0)
+            except (
+                OSError,
+                asyncio.IncompleteReadError,
+                asyncio.TimeoutError,
+                WorkerError,
+            ):
+                self._failed(endpoint)
+                return False
+            endpoint.reported_load = int(reply.get("active", 0))
+            if self.catalog is not None and reply.get("catalog") != self.catalog:
+                log.warning("Render worker %s has other designs", endpoint.address)
+                self._failed(endpoint)
+                return False
+            endpoint.healthy = True
+            return True
+
+        results = await asyncio.gather(*map(ping, self.endpoints))
+        return {
+            endpoint.address: healthy
+            for endpoint, healthy in zip(self.endpoints, results, strict=True)
+        }
+
+    async def watch(self, interval: float = 10.0) -> None:
+        """Check the workers every ``interval`` seconds until cancelled."""
+
+        while True:
+            await self.check()
+            await asyncio.sleep(interval)
+
+    async def close(self) -> None:
+        for endpoint in self.endpoints:
+            while endpoint.idle:
+                _, writer = endpoint.idle.pop()
+                writer.close()
+
+    async def _request(
+        self, meta: dict[str, Any], body: bytes = b""
+    ) -> tuple[dict[str, Any], bytes]:
+        tried: set[str] = set()
+        for _ in range(self.retries + 1):
+            endpoint = self._choose(tried)
+            if endpoint is None:
+                break
+            tried.add(endpoint.address)
+            try:
+                reply, data = await self._exchange(endpoint, meta, body, self.timeout)
+            except asyncio.TimeoutError:
+                # A large job on a busy but healthy worker: sending the same
+                # render to the others would only repeat the wait.
+                log.warning("Render worker %s timed out", endpoint.address)
+                raise WorkerError(TIMEOUT_MESSAGE) from None
+            except (OSError, asyncio.IncompleteReadError, WorkerError):
+                log.warning("Render worker %s failed", endpoint.address)
+                self._failed(endpoint)
+                continue
+            if reply.get("status") == "ok":
+                return reply, data
+            if reply.get("kind") == "stale":
+                log.warning("Render worker %s has other designs", endpoint.address)
+                self._failed(endpoint)
+                continue
+            _raise_failure(reply)
+        raise WorkerError(UNAVAILABLE_MESSAGE)
+
+    def _choose(self, tried: set[str]) -> WorkerEndpoint | None:
+        candidates = [
+            endpoint
+            for endpoint in self.endpoints
+            if endpoint.available and endpoint.address not in tried
+        ]
+        if not candidates:
+            return None
+        # Rotate the starting point so equally loaded workers take turns.
+        self._next = (self._next + 1) % len(self.endpoints)
+        order = {
+            endpoint.address: (index - self._next) % len(self.endpoints)
+            for index, endpoint in enumerate(self.endpoints)
+        }
+        return min(
+            candidates,
+            key=lambda endpoint: (
+                endpoint.in_flight + endpoint.reported_load,
+                order[endpoint.address],
+            ),
+        )
+
+    async def _exchange(
+        self,
+        endpoint: WorkerEndpoint,
+        meta: dict[str, Any],
+        body: bytes,
+        timeout: float,
+    ) -> tuple[dict[str, Any], bytes]:
+        endpoint.in_flight += 1
+        try:
+            reader, writer = (
+                endpoint.idle.pop()
+                if endpoint.idle
+                else await asyncio.wait_for(open_connection(endpoint.address), 5.0)
+            )
+            try:
+                await write_frame(writer, {**meta, "token": self.token}, body)
+                reply = await asyncio.wait_for(read_frame(reader), timeout)
+            except BaseException:
+                writer.close()
+                raise
+            endpoint.idle.append((reader, writer))
+            endpoint.healthy = True
+            return reply
+        finally:
+            endpoint.in_flight -= 1
+
+    def _failed(self, endpoint: WorkerEndpoint) -> None:
+        endpoint.healthy = False
+        endpoint.failures += 1
+        endpoint.retry_at = time.monotonic() + RETRY_AFTER_SECONDS
+        while endpoint.idle:
+            _, writer = endpoint.idle.pop()
+            writer.close()
+
+
+def _failure(kind: str, message: str) -> dict[str, Any]:
+    return {"status": "error", "kind": kind, "message": message}
+
+
+def _raise_failure(reply: dict[str, Any]) -> None:
+    message = str(reply.get("message", ""))
+    kind = reply.get("kind")
+    if kind == "too_complex":
+        raise ProjectTooComplexError(message)
+    if kind == "invalid":
+        raise ValueError(message)
+    raise WorkerError(message or UNAVAILABLE_MESSAGE)
+
+
+async def _serve(address: str, image_dir: Path, token: str) -> None:
+    from pdf_utils import DocumentCache, PdfGenerator, load_layout
+    from warmup import WarmUp
+
+    catalog = ImageCatalog(image_dir)
+    generator = PdfGenerator(
+        cache=DocumentCache(),
+        optimize=os.environ.get("JUFDEA_PDF_OPTIMIZE", "fast"),
+    )
+    warm_up = WarmUp()
+    warm_up.run(lambda: catalog, generator)
+    if warm_up.error is not None:
+        raise SystemExit(f"Renderserver kon niet starten: {warm_up.error}")
+    parse_pool = ParseWorkerPool(image_dir, ParseLimits.from_env(), workers=1)
+    worker = RenderWorker(
+        catalog, generator, parse_pool, layout=load_layout(), token=token
+    )
+    watcher = CatalogWatcher(catalog)
+
+    async def watch_catalog() -> None:
+        while True:
+            await asyncio.sleep(CATALOG_POLL_SECONDS)
+            try:
+                changed = await asyncio.to_thread(watcher.poll)
+            except (OSError, ValueError):
+                log.exception("Design catalog not reloaded")
+                continue
+            if changed:
+                worker.catalog = watcher.current
+                log.info("Design catalog version %d loaded", watcher.current.version)
+
+    server = await worker.serve(address)
+    watching = asyncio.create_task(watch_catalog())
+    print(f"Renderserver luistert op {address}.", flush=True)
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        watching.cancel()
+        await parse_pool.close()
+
+
+def main(argv: Sequence[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Start een renderserver.")
+    parser.add_argument(
+        "--listen",
+        required=True,
+        help="unix:/pad/naar/socket of host:poort",
+    )
+    parser.add_argument(
+        "--images",
+        type=Path,
+        default=DEFAULT_IMAGE_DIR,
+        help="map met kaartontwerpen",
+    )
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO)
+    with contextlib.suppress(KeyboardInterrupt):
+        asyncio.run(_serve(args.listen, args.images, os.environ.get(TOKEN_ENV, "")))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,265 @@
+"""Load untrusted PDFs in worker processes with CPU, wall-clock and memory limits.
+
+A pathological upload can make PyMuPDF spin or allocate without bound. Parsing
+in a separate process keeps that away from the server: a worker that exceeds
+its limits is killed and replaced, and the caller gets a
+``ProjectTooComplexError`` instead of a stalled event loop.
+
+Workers are plain ``python sandbox.py`` subprocesses that never import the
+app. They talk over stdin/stdout in length-prefixed frames of a JSON header
+and a binary body; a loaded project comes back as the ``encode_project``
+payload, so a worker taken over by a hostile PDF can only send data, never
+objects the server would execute.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import os
+import struct
+import sys
+from dataclasses import dataclass
+from pathlib import Path
+from typing import IO, Any
+
+WORKER_STARTUP_SECONDS = 60.0
+TOO_COMPLEX_MESSAGE = "Dit bestand is te complex om te openen."
+# Length of the JSON header and of the body that follows it.
+_FRAME_HEADER = struct.Struct(">II")
+
+
+class ProjectTooComplexError(ValueError):
+    """Raised when loading a PDF exceeds the parse worker limits."""
+
+
+@dataclass(frozen=True, slots=True)
+class ParseLimits:
+    cpu_seconds: int = 20
+    wall_seconds: float = 30.0
+    memory_bytes: int = 1_500_000_000
+
+    @classmethod
+    def from_env(cls) -> ParseLimits:
+        """Read ``JUFDEA_PARSE_*`` overrides from the environment."""
+
+        defaults = cls()
+        return cls(
+            cpu_seconds=int(
+                os.environ.get("JUFDEA_PARSE_CPU_SECONDS", defaults.cpu_seconds)
+            ),
+            wall_seconds=float(
+                os.environ.get("JUFDEA_PARSE_WALL_SECONDS", defaults.wall_seconds)
+            ),
+            memory_bytes=int(
+                os.environ.get(
+                    "JUFDEA_PARSE_MEMORY_MB",
+                    defaults.memory_bytes // 1_000_000,
+                )
+            )
+            * 1_000_000,
+        )
+
+
+class _Worker:
+    def __init__(self, process: asyncio.subprocess.Process) -> None:
+        self.process = process
+
+    async def receive(self, timeout: float) -> tuple[dict[str, Any], bytes]:
+        assert self.process.stdout is not None
+        stdout = self.process.stdout
+
+        async def frame() -> tuple[dict[str, Any], bytes]:
+            meta_size, body_size = _FRAME_HEADER.unpack(
+                await stdout.readexactly(_FRAME_HEADER.size)
+            )
+            meta = json.loads(await stdout.readexactly(meta_size))
+            if not isinstance(meta, dict):
+                raise ValueError("Invalid parse worker reply")
+            return meta, await stdout.readexactly(body_size)
+
+        return await asyncio.wait_for(frame(), timeout)
+
+    async def send(self, meta: dict[str, Any]) -> None:
+        assert self.process.stdin is not None
+        self.process.stdin.write(_encode_frame(meta))
+        await self.process.stdin.drain()
+
+    async def kill(self) -> None:
+        if self.process.returncode is None:
+            self.process.kill()
+        await self.process.wait()
+
+
+class ParseWorkerPool:
+    """A small pool of sandboxed ``load_pdf_project`` worker processes."""
+
+    def __init__(
+        self,
+        image_dir: Path,
+        limits: ParseLimits | None = None,
+        *,
+        workers: int = 2,
+    ) -> None:
+        self.image_dir = image_dir
+        self.limits = limits or ParseLimits()
+        self.workers = workers
+        self.restarts = 0
+        self._idle: list[_Worker] = []
+        self._slots: asyncio.Semaphore | None = None
+
+    async def load(self, path: Path, *, catalog: str | None = None) -> Any:
+        """Load the PDF at ``path`` in a sandboxed worker.
+
+        ``catalog`` is the fingerprint of the caller's catalog version; a worker that
+        read another version of the designs rescans them first.
+        Returns the ``PdfProject``. Raises ``ValueError`` for invalid files and
+        ``ProjectTooComplexError`` when the worker hits one of its limits.
+        """
+
+        from pdf_utils import INVALID_PDF_MESSAGE, decode_project
+
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.workers)
+        async with self._slots:
+            worker = self._idle.pop() if self._idle else await self._start_worker()
+            try:
+                await worker.send(
+                    {
+                        "path": str(path),
+                        "catalog": catalog,
+                        "cpu_seconds": self.limits.cpu_seconds,
+                    }
+                )
+                reply, body = await worker.receive(self.limits.wall_seconds)
+            except (
+                asyncio.IncompleteReadError,
+                OSError,
+                ValueError,
+                # Not the builtin TimeoutError before Python 3.11.
+                asyncio.TimeoutError,
+            ) as error:
+                await self._replace(worker)
+                raise ProjectTooComplexError(TOO_COMPLEX_MESSAGE) from error
+            except BaseException:
+                # Cancelled mid-exchange: the worker may still be parsing.
+                await self._replace(worker)
+                raise
+
+            status = reply.get("status")
+            if status == "too_complex":
+                await self._replace(worker)
+                raise ProjectTooComplexError(TOO_COMPLEX_MESSAGE)
+            if status == "error":
+                self._idle.append(worker)
+                raise ValueError(str(reply.get("message", INVALID_PDF_MESSAGE)))
+            try:
+                if status != "ok":
+                    raise ValueError(f"Unknown parse worker status {status!r}")
+                project = decode_project(body)
+            except ValueError as error:
+                # Only a misbehaving worker sends this; do not reuse it.
+                await self._replace(worker)
+                raise ValueError(INVALID_PDF_MESSAGE) from error
+            self._idle.append(worker)
+            return project
+
+    async def close(self) -> None:
+        while self._idle:
+            await self._idle.pop().kill()
+
+    async def _replace(self, worker: _Worker) -> None:
+        await worker.kill()
+        self.restarts += 1
+
+    async def _start_worker(self) -> _Worker:
+        process = await asyncio.create_subprocess_exec(
+            sys.executable,
+            str(Path(__file__).resolve()),
+            str(self.image_dir),
+            str(self.limits.memory_bytes),
+            stdin=asyncio.subprocess.PIPE,
+            stdout=asyncio.subprocess.PIPE,
+        )
+        worker = _Worker(process)
+        try:
+            await worker.receive(WORKER_STARTUP_SECONDS)
+        except (
+            asyncio.IncompleteReadError,
+            OSError,
+            ValueError,
+            asyncio.TimeoutError,
+        ) as error:
+            await worker.kill()
+            raise RuntimeError("De PDF-lezer kon niet worden gestart.") from error
+        return worker
+
+
+def _encode_frame(meta: dict[str, Any], body: bytes = b"") -> bytes:
+    header = json.dumps(meta, separators=(",", ":")).encode("utf-8")
+    return _FRAME_HEADER.pack(len(header), len(body)) + header + body
+
+
+def _write_frame(output: IO[bytes], meta: dict[str, Any], body: bytes = b"") -> None:
+    output.write(_encode_frame(meta, body))
+    output.flush()
+
+
+def _read_frame(source: IO[bytes]) -> tuple[dict[str, Any], bytes]:
+    header = source.read(_FRAME_HEADER.size)
+    if len(header) < _FRAME_HEADER.size:
+        raise EOFError
+    meta_size, body_size = _FRAME_HEADER.unpack(header)
+    return json.loads(source.read(meta_size)), source.read(body_size)
+
+
+def _worker_main(image_dir: Path, memory_bytes: int) -> None:
+    import resource
+
+    # Keep the protocol on a private copy of stdout; library warnings printed
+    # to stdout go to stderr instead.
+    output = os.fdopen(os.dup(sys.stdout.fileno()), "wb")
+    os.dup2(sys.stderr.fileno(), sys.stdout.fileno())
+
+    from models import ImageCatalog
+    from pdf_utils import encode_project, load_pdf_project
+
+    catalog = ImageCatalog(image_dir)
+    resource.setrlimit(resource.RLIMIT_AS, (memory_bytes, memory_bytes))
+    _write_frame(output, {"status": "ready"})
+
+    while True:
+        try:
+            job, _ = _read_frame(sys.stdin.buffer)
+        except EOFError:
+            return
+        path, cpu_seconds = job["path"], int(job["cpu_seconds"])
+        # The CPU limit applies per job: move the soft limit relative to the
+        # CPU time used so far. Exceeding it terminates the worker (SIGXCPU).
+        usage = resource.getrusage(resource.RUSAGE_SELF)
+        resource.setrlimit(
+            resource.RLIMIT_CPU,
+            (
+                int(usage.ru_utime + usage.ru_stime) + cpu_seconds,
+                resource.RLIM_INFINITY,
+            ),
+        )
+        try:
+            if job.get("catalog") not in (None, catalog.fingerprint):
+                # Designs were added or removed since this worker started.
+                catalog = catalog.refreshed()
+            # A page pool started here would escape this process's limits
+            # and be orphaned when the worker is killed, so read in-process.
+            project = load_pdf_project(Path(path), catalog, parallel=False)
+            payload = encode_project(project.people, project.layout)
+        except MemoryError:
+            _write_frame(output, {"status": "too_complex"})
+            return
+        except Exception as error:
+            _write_frame(output, {"status": "error", "message": str(error)})
+        else:
+            _write_frame(output, {"status": "ok"}, payload)
+
+
+if __name__ == "__main__":
+    _worker_main(Path(sys.argv[1]), int(sys.argv[2]))
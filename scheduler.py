@@ -0,0 +1,197 @@
+"""Share render capacity fairly between all browser sessions and API clients."""
+
+from __future__ import annotations
+
+import asyncio
+import time
+from collections import OrderedDict, deque
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass, field
+from enum import IntEnum
+from typing import Any
+
+from metrics import QUEUE_WAIT_SECONDS, RENDERS_IN_FLIGHT, metrics
+
+
+class Priority(IntEnum):
+    """Lower values are dispatched first."""
+
+    PREVIEW = 0
+    DOWNLOAD = 1
+    PREFETCH = 2
+
+
+@dataclass(slots=True)
+class SessionWaits:
+    """Queue wait statistics for one session."""
+
+    jobs: int = 0
+    total_seconds: float = 0.0
+    max_seconds: float = 0.0
+    last_seconds: float = 0.0
+    queued: int = 0
+    last_active: float = field(default_factory=time.monotonic)
+
+    @property
+    def average_seconds(self) -> float:
+        return self.total_seconds / self.jobs if self.jobs else 0.0
+
+    def to_dict(self) -> dict[str, float | int]:
+        return {
+            "jobs": self.jobs,
+            "queued": self.queued,
+            "average_wait_seconds": round(self.average_seconds, 4),
+            "max_wait_seconds": round(self.max_seconds, 4),
+            "last_wait_seconds": round(self.last_seconds, 4),
+        }
+
+
+@dataclass(slots=True, eq=False)
+class _Request:
+    session_id: str
+    priority: Priority
+    function: Callable[..., Any]
+    args: tuple[Any, ...]
+    future: asyncio.Future[Any]
+    queued_at: float = field(default_factory=time.perf_counter)
+
+
+class RenderScheduler:
+    """Run blocking renders with a global concurrency cap and fair queuing.
+
+    Pending renders are grouped by priority and, within a priority, by session.
+    Sessions take turns, so a session with hundreds of queued renders delays
+    another session by at most one render per free slot.
+    """
+
+    def __init__(
+        self,
+        runner: Callable[..., Awaitable[Any]],
+        *,
+        concurrency: int = 4,
+    ) -> None:
+        if concurrency < 1:
+            raise ValueError("Render concurrency must be at least 1.")
+        self.runner = runner
+        self.concurrency = concurrency
+        self.running = 0
+        self._queues: dict[Priority, OrderedDict[str, deque[_Request]]] = {
+            priority: OrderedDict() for priority in Priority
+        }
+        self._waits: dict[str, SessionWaits] = {}
+        self._tasks: set[asyncio.Task[None]] = set()
+
+    @property
+    def queued(self) -> int:
+        return sum(
+            len(requests)
+            for sessions in self._queues.values()
+            for requests in sessions.values()
+        )
+
+    async def submit(
+        self,
+        session_id: str,
+        priority: Priority,
+        function: Callable[..., Any],
+        *args: Any,
+    ) -> Any:
+        """Queue ``function(*args)`` for ``session_id`` and await its result."""
+
+        request = _Request(
+            session_id,
+            priority,
+            function,
+            args,
+            asyncio.get_running_loop().create_future(),
+        )
+        self._queues[priority].setdefault(session_id, deque()).append(request)
+        waits = self._waits.setdefault(session_id, SessionWaits())
+        waits.queued += 1
+        waits.last_active = time.monotonic()
+        self._dispatch()
+        return await request.future
+
+    def wait_times(self) -> dict[str, SessionWaits]:
+        return dict(self._waits)
+
+    def forget(self, session_id: str) -> None:
+        """Drop the queued renders and statistics of a closed session."""
+
+        for sessions in self._queues.values():
+            for request in sessions.pop(session_id, ()):
+                request.future.cancel()
+        self._waits.pop(session_id, None)
+
+    def expire(self, prefix: str, idle_seconds: float) -> list[str]:
+        """Drop statistics of ``prefix`` sessions idle for ``idle_seconds``.
+
+        Editor sessions are forgotten when they close; callers without such
+        an end, like API clients, expire instead.
+        """
+
+        now = time.monotonic()
+        expired = [
+            session_id
+            for session_id, waits in self._waits.items()
+            if session_id.startswith(prefix)
+            and not waits.queued
+            and now - waits.last_active > idle_seconds
+        ]
+        for session_id in expired:
+            del self._waits[session_id]
+        return expired
+
+    def _dispatch(self) -> None:
+        while self.running < self.concurrency:
+            request = self._next_request()
+            if request is None:
+                return
+            self.running += 1
+            task = asyncio.get_running_loop().create_task(self._execute(request))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    def _next_request(self) -> _Request | None:
+        for sessions in self._queues.values():
+            while sessions:
+                session_id, requests = next(iter(sessions.items()))
+                request = requests.popleft()
+                if requests:
+                    sessions.move_to_end(session_id)
+                else:
+                    del sessions[session_id]
+                waits = self._waits.get(session_id)
+                if waits is not None:
+                    waits.queued -= 1
+                if not request.future.done():
+                    return request
+        return None
+
+    async def _execute(self, request: _Request) -> None:
+        waited = time.perf_counter() - request.queued_at
+        waits = self._waits.get(request.session_id)
+        if waits is not None:
+            waits.jobs += 1
+            waits.total_seconds += waited
+            waits.last_seconds = waited
+            waits.max_seconds = max(waits.max_seconds, waited)
+            waits.last_active = time.monotonic()
+        metrics.observe(QUEUE_WAIT_SECONDS, waited, priority=request.priority.name)
+        metrics.increment(RENDERS_IN_FLIGHT)
+        try:
+            result = await self.runner(request.function, *request.args)
+        except asyncio.CancelledError:
+            # A cooperative render stopped between steps.
+            request.future.cancel()
+            raise
+        except Exception as error:
+            if not request.future.done():
+                request.future.set_exception(error)
+        else:
+            if not request.future.done():
+                request.future.set_result(result)
+        finally:
+            metrics.increment(RENDERS_IN_FLIGHT, -1)
+            self.running -= 1
+            self._dispatch()
@@ -16,7 +16,7 @@ uvx --from "nicegui-pyodide==0.1.1" \
 # though the generated NiceGUI runtime itself has not changed.
 build_id="$(
     cd "$project_dir"
-    find app.py models.py pdf_utils.py layout.json static GUI -type f -print0 \
+    find app.py importer.py metrics.py models.py pdf_utils.py profiling.py scheduler.py sessions.py traffic.py layout.json static GUI -type f -print0 \
         | sort -z \
         | xargs -0 shasum -a 256 \
         | shasum -a 256 \
@@ -34,9 +34,20 @@ cp "$project_dir/static/pyscript.toml" "$build_dir/$config_file"
 cp "$project_dir/static/app.css" "$build_dir/$css_file"
 
 archive_path="$build_dir/$archive_file"
+design_dir="GUI/images/ontwerpen"
+# The design images are served one by one under content-addressed names and
+# fetched when a card first needs them; the archive only carries the manifest.
 (
     cd "$project_dir"
-    zip -q -r "$archive_path" models.py pdf_utils.py layout.json GUI
+    uv run --no-project python -c \
+        'import sys; from pathlib import Path; from models import DEFAULT_IMAGE_DIR, ImageCatalog; ImageCatalog(DEFAULT_IMAGE_DIR).write_manifest(Path(sys.argv[1]))' \
+        "$build_dir/$design_dir"
+    zip -q -r "$archive_path" importer.py metrics.py models.py pdf_utils.py profiling.py scheduler.py sessions.py traffic.py layout.json GUI \
+        -x "$design_dir/*"
+)
+(
+    cd "$build_dir"
+    zip -q "$archive_path" "$design_dir/manifest.json"
 )
 
 perl -0pi -e "s#\\./app\\.py#./$app_file#; s#\\./app-assets\\.zip#./$archive_file#" \
@@ -52,6 +63,9 @@ perl -0pi -e 's!#loading \{ padding: 2em; font-family: sans-serif; color: #666;
 perl -0pi -e "s#src=\"entrypoint\\.py\" config=\"pyscript\\.toml\"#src=\"$entrypoint_file\" config=\"$config_file\"#" \
     "$build_dir/index.html"
 
+uv run --no-project --with brotli \
+    python "$project_dir/scripts/static_cache.py" "$build_dir" "$build_id"
+
 mkdir -p "$output_dir"
 rm -rf "$client_dir"
 mv "$build_dir" "$client_dir"
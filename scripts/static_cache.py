@@ -0,0 +1,180 @@
+"""Precompress the static site and add an offline service worker.
+
+``build-static.sh`` runs this on the finished client directory::
+
+    uv run --no-project --with brotli python scripts/static_cache.py <dir> <build_id>
+
+Every file gets ``.br`` and ``.gz`` copies next to it when that makes it
+smaller, for hosts that serve precompressed files (nginx ``brotli_static`` /
+``gzip_static``, Caddy ``precompressed``). ``sw.js`` serves every build file
+from the browser cache first, so repeat visits start without network
+transfer. Design images are left out of the precache: they are cached when
+a card first needs them. Each build has its own cache; older builds are
+removed once a new worker activates.
+"""
+
+from __future__ import annotations
+
+import argparse
+import gzip
+import json
+import sys
+from collections.abc import Callable, Sequence
+from pathlib import Path
+
+SERVICE_WORKER = "sw.js"
+CACHE_PREFIX = "jufdea-"
+COMPRESSED_SUFFIXES = {"br": ".br", "gzip": ".gz"}
+# Fetched on demand by the app instead of at service-worker install.
+LAZY_DIRECTORIES = ("GUI/images/",)
+REGISTRATION = (
+    "<script>\n"
+    '      if ("serviceWorker" in navigator) {\n'
+    f'        navigator.serviceWorker.register("./{SERVICE_WORKER}");\n'
+    "      }\n"
+    "    </script>\n"
+)
+
+WORKER_TEMPLATE = """\
+// Generated by scripts/static_cache.py for build __BUILD_ID__.
+const CACHE = "__CACHE__";
+const PRECACHE = __PRECACHE__;
+
+self.addEventListener("install", (event) => {
+  event.waitUntil(
+    caches
+      .open(CACHE)
+      .then((cache) => cache.addAll(PRECACHE))
+      .then(() => self.skipWaiting()),
+  );
+});
+
+self.addEventListener("activate", (event) => {
+  event.waitUntil(
+    caches
+      .keys()
+      .then((keys) =>
+        Promise.all(
+          keys
+            .filter((key) => key.startsWith("__PREFIX__") && key !== CACHE)
+            .map((key) => caches.delete(key)),
+        ),
+      )
+      .then(() => self.clients.claim()),
+  );
+});
+
+// Build files carry a content hash or a version in their name, so a cached
+// copy never goes stale. Designs and packages fetched later (PyMuPDF,
+// Pyodide) are versioned too and are added to the cache of this build.
+// Only successful responses are kept: an opaque cross-origin response may be
+// an error page, and caching it would break the app until the next build.
+self.addEventListener("fetch", (event) => {
+  const request = event.request;
+  if (request.method !== "GET") {
+    return;
+  }
+  event.respondWith(
+    caches.match(request, { ignoreSearch: request.mode === "navigate" }).then(
+      (cached) =>
+        cached ||
+        fetch(request).then((response) => {
+          if (response.ok) {
+            const copy = response.clone();
+            caches.open(CACHE).then((cache) => cache.put(request, copy));
+          }
+          return response;
+        }),
+    ),
+  );
+});
+"""
+
+
+def precompress(
+    directory: Path, encodings: Sequence[str] = ("br", "gzip")
+) -> list[Path]:
+    """Write compressed copies of every file; return the written paths."""
+
+    compressors = [
+        (COMPRESSED_SUFFIXES[encoding], _compressor(encoding)) for encoding in encodings
+    ]
+    written = []
+    for path in _build_files(directory):
+        data = path.read_bytes()
+        for suffix, compress in compressors:
+            packed = compress(data)
+            # Already compressed files (zip archives, wheels) do not shrink;
+            # the host then serves the original.
+            if len(packed) < len(data):
+                target = path.with_name(path.name + suffix)
+                target.write_bytes(packed)
+                written.append(target)
+    return written
+
+
+def write_service_worker(directory: Path, build_id: str) -> Path:
+    """Generate ``sw.js`` for ``build_id`` and register it in ``index.html``."""
+
+    names = [path.relative_to(directory).as_posix() for path in _build_files(directory)]
+    precache = ["./"] + [
+        f"./{name}" for name in names if not name.startswith(LAZY_DIRECTORIES)
+    ]
+    worker = (
+        WORKER_TEMPLATE.replace("__BUILD_ID__", build_id)
+        .replace("__CACHE__", f"{CACHE_PREFIX}{build_id}")
+        .replace("__PREFIX__", CACHE_PREFIX)
+        .replace("__PRECACHE__", json.dumps(precache, indent=2))
+    )
+    path = directory / SERVICE_WORKER
+    path.write_text(worker, encoding="utf-8")
+
+    index = directory / "index.html"
+    html = index.read_text(encoding="utf-8")
+    if "</body>" not in html:
+        raise ValueError("index.html heeft geen </body>.")
+    index.write_text(html.replace("</body>", f"{REGISTRATION}</body>", 1), "utf-8")
+    return path
+
+
+def main(argv: Sequence[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(
+        description="Comprimeer de statische site en voeg een service worker toe."
+    )
+    parser.add_argument("directory", type=Path, help="map met de gebouwde site")
+    parser.add_argument("build_id", help="id van deze build")
+    args = parser.parse_args(argv)
+
+    try:
+        _compressor("br")
+    except ImportError:
+        parser.error("brotli ontbreekt; start via scripts/build-static.sh.")
+    write_service_worker(args.directory, args.build_id)
+    written = precompress(args.directory)
+    print(f"{len(written)} gecomprimeerde bestanden geschreven.")
+    return 0
+
+
+def _build_files(directory: Path) -> list[Path]:
+    return sorted(
+        path
+        for path in directory.rglob("*")
+        if path.is_file()
+        and path.name != SERVICE_WORKER
+        and path.suffix not in COMPRESSED_SUFFIXES.values()
+    )
+
+
+def _compressor(encoding: str) -> Callable[[bytes], bytes]:
+    if encoding == "gzip":
+        # A fixed mtime keeps rebuilds of unchanged files byte-identical.
+        return lambda data: gzip.compress(data, compresslevel=9, mtime=0)
+    if encoding == "br":
+        import brotli  # type: ignore[import-not-found]
+
+        return lambda data: brotli.compress(data, quality=11)
+    raise ValueError(f"Onbekende compressie '{encoding}'.")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,139 @@
+"""Track editor sessions, release them when their tab goes away and evict idle ones.
+
+Every ``AppPage`` registers itself here. When its client is deleted, or when
+it has been idle for ``JUFDEA_SESSION_IDLE_MINUTES`` (standaard 120), the
+session is closed: pending renders are cancelled and its rows and widgets are
+released. NiceGUI deletes a disconnected client within seconds, so idle
+sessions are usually still connected; such a tab is told to reload. The admin
+page lists the estimated memory kept per session.
+"""
+
+from __future__ import annotations
+
+import os
+import sys
+import threading
+import time
+from collections.abc import Iterable, Mapping
+from dataclasses import dataclass, field
+from typing import Any, Protocol
+
+DEFAULT_IDLE_SECONDS = 120 * 60
+# Rough server-side footprint of one NiceGUI element: the element object, its
+# props, classes and style dicts and the bookkeeping in the client.
+ELEMENT_BYTES = 2_000
+
+
+class Session(Protocol):
+    session_id: str
+
+    def memory_usage(self) -> dict[str, int]: ...
+
+    def close(self) -> None: ...
+
+
+@dataclass(slots=True)
+class SessionInfo:
+    session: Session
+    created: float = field(default_factory=time.monotonic)
+    last_active: float = field(default_factory=time.monotonic)
+
+    @property
+    def idle_seconds(self) -> float:
+        return time.monotonic() - self.last_active
+
+
+class SessionRegistry:
+    """All open editor sessions of this server process."""
+
+    def __init__(self, *, idle_seconds: float = DEFAULT_IDLE_SECONDS) -> None:
+        self.idle_seconds = idle_seconds
+        self.evicted = 0
+        self._sessions: dict[str, SessionInfo] = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls) -> SessionRegistry:
+        minutes = os.environ.get("JUFDEA_SESSION_IDLE_MINUTES")
+        if minutes is None:
+            return cls()
+        return cls(idle_seconds=float(minutes) * 60)
+
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+    def register(self, session: Session) -> None:
+        with self._lock:
+            self._sessions[session.session_id] = SessionInfo(session)
+
+    def touch(self, session_id: str) -> None:
+        """Record user activity for ``session_id``."""
+
+        info = self._sessions.get(session_id)
+        if info is not None:
+            info.last_active = time.monotonic()
+
+    def close(self, session_id: str) -> None:
+        """Close and forget a session; closing twice is harmless."""
+
+        with self._lock:
+            info = self._sessions.pop(session_id, None)
+        if info is not None:
+            info.session.close()
+
+    def evict_idle(self) -> list[str]:
+        """Close every session idle longer than the timeout."""
+
+        with self._lock:
+            idle = [
+                session_id
+                for session_id, info in self._sessions.items()
+                if info.idle_seconds > self.idle_seconds
+            ]
+        for session_id in idle:
+            self.close(session_id)
+        self.evicted += len(idle)
+        return idle
+
+    def sessions(self) -> list[SessionInfo]:
+        """The open sessions, most recently active first."""
+
+        with self._lock:
+            return sorted(
+                self._sessions.values(),
+                key=lambda info: info.last_active,
+                reverse=True,
+            )
+
+
+def estimate_bytes(value: Any, _seen: set[int] | None = None) -> int:
+    """Approximate the memory retained by plain data (lists, dicts, strings)."""
+
+    seen = set() if _seen is None else _seen
+    if id(value) in seen:
+        return 0
+    seen.add(id(value))
+    size = sys.getsizeof(value)
+    if isinstance(value, Mapping):
+        size += sum(
+            estimate_bytes(key, seen) + estimate_bytes(item, seen)
+            for key, item in value.items()
+        )
+    elif isinstance(value, (list, tuple, set, frozenset)):
+        size += sum(estimate_bytes(item, seen) for item in value)
+    elif hasattr(value, "__slots__"):
+        size += sum(
+            estimate_bytes(getattr(value, name), seen)
+            for name in _slot_names(type(value))
+            if hasattr(value, name)
+        )
+    return size
+
+
+def _slot_names(cls: type) -> Iterable[str]:
+    for base in cls.__mro__:
+        slots = base.__dict__.get("__slots__", ())
+        yield from (slots,) if isinstance(slots, str) else slots
+
+
+session_registry = SessionRegistry.from_env()
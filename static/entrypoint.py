@@ -1,24 +1,58 @@
-"""Install the browser runtime, build the UI, and mount NiceGUI."""
+"""Install the browser runtime, build the UI, and mount NiceGUI.
+
+PyMuPDF is not installed here: ``app`` installs it the first time a preview is
+rasterised or a PDF is opened. The time to reach each stage is shown on the
+loading overlay and kept in ``window.__jufdea_startup``.
+"""
+
+import asyncio
+import json
 
 import micropip  # type: ignore
 from js import window  # type: ignore
 
-window.console.log("JufDea: installing browser packages")
-await micropip.install("nicegui-3.14.0-py3-none-any.whl", deps=False)  # type: ignore  # noqa: F704, PLE1142
-await micropip.install("nicegui_pyodide-0.1.1-py3-none-any.whl", deps=False)  # type: ignore  # noqa: F704, PLE1142
-await micropip.install(  # type: ignore  # noqa: F704, PLE1142
-    ["typing-extensions", "markdown2", "Pygments", "docutils", "tinycss2"]
+loading = window.document.getElementById("loading")
+startup: dict[str, float] = {}
+
+
+def reached(stage: str) -> None:
+    # performance.now() counts from navigation start, so the first stage
+    # includes downloading Pyodide and the preloaded packages.
+    startup[stage] = round(window.performance.now() / 1000, 2)
+    window.console.log(f"JufDea: {stage} after {startup[stage]:.1f} s")
+    window.__jufdea_startup = json.dumps(startup)
+    status = loading.querySelector("span") if loading else None
+    if status:
+        status.textContent = " · ".join(
+            f"{name} {seconds:.1f} s" for name, seconds in startup.items()
+        )
+
+
+reached("Python")
+await asyncio.gather(  # type: ignore  # noqa: F704, PLE1142
+    micropip.install(
+        [
+            "nicegui-3.14.0-py3-none-any.whl",
+            "nicegui_pyodide-0.1.1-py3-none-any.whl",
+        ],
+        deps=False,
+    ),
+    micropip.install(
+        ["typing-extensions", "markdown2", "Pygments", "docutils", "tinycss2"]
+    ),
 )
-window.console.log("JufDea: browser packages installed")
+reached("pakketten")
 
 from app import client  # noqa: E402, I001
 from nicegui_pyodide import PyodideRuntime  # noqa: E402
 
-loading = window.document.getElementById("loading")
-if loading:
-    loading.style.display = "none"
+reached("editor")
 
 runtime = PyodideRuntime(client)
 await runtime.mount()  # type: ignore  # noqa: F704, PLE1142
+reached("klaar")
+# Hidden only now: until the UI is mounted there is nothing to click yet.
+if loading:
+    loading.style.display = "none"
 window.__pyodide_ready = True  # type: ignore
 window.console.log("JufDea: ready")
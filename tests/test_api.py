@@ -0,0 +1,256 @@
+import asyncio
+import io
+import threading
+import zipfile
+from pathlib import Path
+
+import fitz
+import httpx
+import pytest
+from fastapi import FastAPI
+from nicegui.testing import User
+
+import api
+from api import RenderApi, RenderQueue, RenderQueueFull
+from models import ImageCatalog
+from pdf_utils import load_pdf_project
+
+CATALOG = ImageCatalog(Path(__file__).parents[1] / "GUI" / "images" / "ontwerpen")
+
+PERSON = {
+    "name": "Ada",
+    "family_name": "Lovelace",
+    "color": "blauw",
+    "scene": "paraplu",
+    "birth_date": "10-12-2014",
+    "group": 1,
+}
+
+
+async def test_render_pdf_and_png(user: User) -> None:
+    client = user.http_client
+
+    pdf = await client.post("/api/render/pdf", json={"people": [PERSON]})
+    png = await client.post("/api/render/png", json={"person": PERSON, "zoom": 1})
+
+    assert pdf.status_code == 200
+    assert pdf.headers["content-type"] == "application/pdf"
+    project = load_pdf_project(pdf.content, CATALOG)
+    assert project.people[0].full_name == "Ada Lovelace"
+    assert png.status_code == 200
+    assert png.content.startswith(b"\x89PNG")
+
+
+async def test_invalid_payload_is_rejected(user: User) -> None:
+    response = await user.http_client.post(
+        "/api/render/pdf",
+        json={"people": [{**PERSON, "color": "paars"}]},
+    )
+
+    assert response.status_code == 422
+    assert "paars" in response.json()["detail"]
+
+
+async def test_jobs_can_be_polled(user: User) -> None:
+    client = user.http_client
+
+    created = await client.post("/api/jobs", json={"people": [PERSON] * 3})
+    assert created.status_code == 202
+    status_url = created.headers["location"]
+    for _ in range(100):
+        status = (await client.get(status_url)).json()
+        if status["status"] == "done":
+            break
+        await asyncio.sleep(0.05)
+
+    result = await client.get(status["result_url"])
+    with fitz.open(stream=result.content, filetype="pdf") as document:
+        assert document.page_count >= 5
+    assert (await client.get(status["result_url"])).status_code == 410
+    assert (await client.get(status_url)).json()["result_url"] is None
+
+
+@pytest.mark.usefixtures("user")  # runs the NiceGUI loop for background jobs
+async def test_finished_jobs_are_capped_and_expire(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    class Generator:
+        def document(self, *args: object) -> bytes:
+            return b"%PDF-" + b"0" * 95
+
+    monkeypatch.setattr(api, "MAX_RETAINED_JOB_BYTES", 250)
+    monkeypatch.setattr(api, "JOB_RETENTION_SECONDS", 0.05)
+    render_api = RenderApi(CATALOG, generator=Generator())
+    server = FastAPI()
+    render_api.register(server)
+
+    async with httpx.AsyncClient(
+        transport=httpx.ASGITransport(app=server), base_url="http://test"
+    ) as client:
+        ids = []
+        for _ in range(3):
+            created = await client.post("/api/jobs", json={"people": [PERSON]})
+            ids.append(created.json()["id"])
+            for _ in range(100):
+                if render_api.jobs[ids[-1]].finished is not None:
+                    break
+                await asyncio.sleep(0.01)
+        # Only two 100-byte results fit; the oldest job was dropped.
+        assert sorted(render_api.jobs) == sorted(ids[1:])
+
+        await asyncio.sleep(0.1)
+        assert render_api.jobs == {}
+        assert (await client.get(f"/api/jobs/{ids[2]}")).status_code == 404
+
+
+async def test_saturated_queue_answers_429() -> None:
+    render_api = RenderApi(CATALOG, queue=RenderQueue(max_pending=1))
+    server = FastAPI()
+    render_api.register(server)
+    render_api.queue.reserve("batch")
+
+    async with httpx.AsyncClient(
+        transport=httpx.ASGITransport(app=server), base_url="http://test"
+    ) as client:
+        response = await client.post("/api/render/pdf", json={"people": [PERSON]})
+
+    assert response.status_code == 429
+    assert int(response.headers["retry-after"]) >= 1
+
+
+async def test_client_limit_ignores_client_id_header() -> None:
+    render_api = RenderApi(CATALOG, queue=RenderQueue(per_client=1))
+    server = FastAPI()
+    render_api.register(server)
+    render_api.queue.reserve("127.0.0.1")
+
+    async with httpx.AsyncClient(
+        transport=httpx.ASGITransport(app=server), base_url="http://test"
+    ) as client:
+        response = await client.post(
+            "/api/render/pdf",
+            json={"people": [PERSON]},
+            headers={"X-Client-Id": "iemand-anders"},
+        )
+
+    assert response.status_code == 429
+
+
+@pytest.mark.usefixtures("user")  # runs the NiceGUI loop for background jobs
+async def test_waiting_job_is_not_running() -> None:
+    release = threading.Event()
+
+    class SlowGenerator:
+        def document(self, *args: object) -> bytes:
+            release.wait(5)
+            return b"%PDF-"
+
+    render_api = RenderApi(
+        CATALOG, generator=SlowGenerator(), queue=RenderQueue(workers=1)
+    )
+    server = FastAPI()
+    render_api.register(server)
+
+    async with httpx.AsyncClient(
+        transport=httpx.ASGITransport(app=server), base_url="http://test"
+    ) as client:
+        first, second = [
+            (await client.post("/api/jobs", json={"people": [PERSON]})).json()
+            for _ in range(2)
+        ]
+        for _ in range(100):
+            if render_api.jobs[first["id"]].status == "running":
+                break
+            await asyncio.sleep(0.01)
+
+        assert render_api.jobs[first["id"]].status == "running"
+        assert render_api.jobs[second["id"]].status == "queued"
+        release.set()
+        for _ in range(200):
+            if render_api.jobs[second["id"]].status == "done":
+                break
+            await asyncio.sleep(0.01)
+
+    assert render_api.jobs[second["id"]].status == "done"
+
+
+def test_queue_limits_each_client() -> None:
+    queue = RenderQueue(workers=1, max_pending=3, per_client=2)
+    queue.reserve("batch")
+    queue.reserve("batch")
+
+    with pytest.raises(RenderQueueFull):
+        queue.reserve("batch")
+    queue.reserve("teacher")
+    assert queue.pending == 3
+
+
+async def test_render_stats_show_scheduler_waits(
+    user: User, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    await user.http_client.post("/api/render/png", json={"person": PERSON})
+    hidden = await user.http_client.get("/api/render/stats")
+    assert hidden.status_code == 404
+    monkeypatch.setenv("JUFDEA_ADMIN_TOKEN", "geheim")
+
+    stats = (
+        await user.http_client.get(
+            "/api/render/stats", headers={"X-Admin-Token": "geheim"}
+        )
+    ).json()
+
+    assert stats["concurrency"] >= 1
+    assert any(session.startswith("api:") for session in stats["sessions"])
+
+
+async def test_documents_answer_conditional_requests(user: User) -> None:
+    client = user.http_client
+
+    rendered = await client.post("/api/render/pdf", json={"people": [PERSON]})
+    etag = rendered.headers["etag"]
+    key = etag.strip('"')
+    cached = await client.get(f"/api/documents/{key}")
+    unchanged = await client.get(
+        f"/api/documents/{key}", headers={"If-None-Match": etag}
+    )
+    rerender = await client.post(
+        "/api/render/pdf",
+        json={"people": [PERSON]},
+        headers={"If-None-Match": etag},
+    )
+
+    assert cached.content == rendered.content
+    assert cached.headers["etag"] == etag
+    assert unchanged.status_code == 304
+    assert rerender.status_code == 304
+
+
+async def test_render_images_returns_a_zip(user: User) -> None:
+    client = user.http_client
+
+    response = await client.post(
+        "/api/render/images",
+        json={"people": [PERSON], "format": "jpeg", "dpi": 30, "pages": "1,3"},
+    )
+    invalid = await client.post(
+        "/api/render/images", json={"people": [PERSON], "format": "gif"}
+    )
+
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/zip"
+    with zipfile.ZipFile(io.BytesIO(response.content)) as archive:
+        assert archive.namelist() == ["pagina-001.jpg", "pagina-003.jpg"]
+    assert invalid.status_code == 422
+
+
+async def test_render_images_limits_pages_times_dpi(user: User) -> None:
+    response = await user.http_client.post(
+        "/api/render/images", json={"people": [PERSON] * 30, "dpi": 600}
+    )
+    bad_pages = await user.http_client.post(
+        "/api/render/images", json={"people": [PERSON], "pages": "90"}
+    )
+
+    assert response.status_code == 422
+    assert "pages x dpi" in response.json()["detail"]
+    assert bad_pages.status_code == 422
@@ -0,0 +1,124 @@
+import subprocess
+import sys
+import zipfile
+from pathlib import Path
+
+import fitz
+import pytest
+
+import pdf_utils
+from batch import find_sources, load_project_file, main, run_batch
+from models import ImageCatalog
+from pdf_utils import PdfGenerator, encode_project, load_layout, load_pdf_project
+
+ROOT = Path(__file__).parents[1]
+CATALOG = ImageCatalog(ROOT / "GUI" / "images" / "ontwerpen")
+
+
+def _write_sources(directory: Path) -> None:
+    person = CATALOG.new_person()
+    person.name = "Ada"
+    (directory / "klas-1a.json").write_bytes(encode_project([person], load_layout()))
+    (directory / "klas-1b.csv").write_text(
+        "Voornaam,Familienaam,Geboortedatum\nGrace,Hopper,09-12-2013\n",
+        encoding="utf-8",
+    )
+    (directory / "klas-2a.pdf").write_bytes(PdfGenerator().document([person], CATALOG))
+    (directory / "kapot.json").write_text("{", encoding="utf-8")
+    (directory / "notities.txt").write_text("negeren", encoding="utf-8")
+
+
+def test_batch_renders_folder_and_reports_failures(tmp_path: Path) -> None:
+    _write_sources(tmp_path)
+    output = tmp_path / "uit"
+
+    results = run_batch(find_sources(tmp_path), output, workers=2)
+
+    assert [result.source.name for result in results] == [
+        "kapot.json",
+        "klas-1a.json",
+        "klas-1b.csv",
+        "klas-2a.pdf",
+    ]
+    assert results[0].error
+    assert all(result.error is None for result in results[1:])
+    restored = load_pdf_project((output / "klas-1b.pdf").read_bytes(), CATALOG)
+    assert restored.people[0].full_name == "Grace Hopper"
+
+
+def test_legacy_pdf_is_read_without_a_page_pool(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    monkeypatch.setattr(pdf_utils, "LEGACY_PARALLEL_PAGES", 1)
+    people = [CATALOG.new_person() for _ in range(2)]
+    with fitz.open(
+        stream=PdfGenerator().document(people, CATALOG), filetype="pdf"
+    ) as document:
+        document.embfile_del("jufdea-project.json")
+        document.save(tmp_path / "oud.pdf")
+
+    def no_pool(*args: object) -> None:
+        raise AssertionError("legacy pages were read in a process pool")
+
+    monkeypatch.setattr(pdf_utils, "_read_person_pages_parallel", no_pool)
+
+    assert load_project_file(tmp_path / "oud.pdf", CATALOG).people == people
+
+
+def test_batch_writes_single_zip(tmp_path: Path, capsys) -> None:
+    _write_sources(tmp_path)
+    (tmp_path / "kapot.json").unlink()
+    archive = tmp_path / "naamkaartjes.zip"
+
+    assert main([str(tmp_path), str(archive), "--zip", "--workers", "2"]) == 0
+
+    with zipfile.ZipFile(archive) as file:
+        assert sorted(file.namelist()) == ["klas-1a.pdf", "klas-1b.pdf", "klas-2a.pdf"]
+        with fitz.open(stream=file.read("klas-1a.pdf"), filetype="pdf") as document:
+            assert "jufdea-project.json" in document.embfile_names()
+    assert "3 van 3 bestanden gelukt" in capsys.readouterr().out
+
+
+def test_broken_worker_pool_still_reports_every_file(tmp_path: Path, capsys) -> None:
+    _write_sources(tmp_path)
+    (tmp_path / "kapot.json").unlink()
+    # The worker initializer fails without designs, which breaks the pool.
+    images = tmp_path / "leeg"
+    images.mkdir()
+    archive = tmp_path / "naamkaartjes.zip"
+
+    assert main([str(tmp_path), str(archive), "--zip", "--images", str(images)]) == 1
+
+    out = capsys.readouterr().out
+    assert out.count("onverwacht gestopt") == 3
+    assert "0 van 3 bestanden gelukt" in out
+    with zipfile.ZipFile(archive) as file:
+        assert file.namelist() == []
+
+
+def test_batch_optimizes_output(tmp_path: Path) -> None:
+    _write_sources(tmp_path)
+    (tmp_path / "kapot.json").unlink()
+
+    run_batch(find_sources(tmp_path), tmp_path / "snel", workers=2)
+    run_batch(
+        find_sources(tmp_path), tmp_path / "klein", workers=2, optimize="smallest"
+    )
+
+    fast = (tmp_path / "snel" / "klas-1a.pdf").read_bytes()
+    small = (tmp_path / "klein" / "klas-1a.pdf").read_bytes()
+    assert len(small) < len(fast)
+    assert load_pdf_project(small, CATALOG).people[0].name == "Ada"
+
+
+def test_cli_defers_pdf_libraries() -> None:
+    code = "import sys, batch; print(sorted({'fitz', 'fpdf'} & set(sys.modules)))"
+    result = subprocess.run(
+        [sys.executable, "-c", code],
+        cwd=ROOT,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+
+    assert result.stdout.strip() == "[]"
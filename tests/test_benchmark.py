@@ -0,0 +1,57 @@
+import json
+from pathlib import Path
+
+from benchmark import compare, main, run_suite, synthetic_class
+from models import ImageCatalog, validate_people
+
+ROOT = Path(__file__).parents[1]
+CATALOG = ImageCatalog(ROOT / "GUI" / "images" / "ontwerpen")
+
+
+def test_synthetic_class_is_valid_and_reproducible() -> None:
+    people = synthetic_class(CATALOG, 40)
+
+    assert validate_people(people, CATALOG) == []
+    assert len({person.full_name for person in people}) == 40
+    assert synthetic_class(CATALOG, 40) == people
+
+
+def test_suite_covers_hot_paths() -> None:
+    results = run_suite(sizes=[1, 3], load_size=3, import_size=3, runs=1)
+
+    assert set(results["benchmarks"]) == {
+        "catalog",
+        "preview",
+        "document[1]",
+        "document[3]",
+        "load[current]",
+        "load[table]",
+        "load[legacy]",
+        "import[3]",
+        "optimize[fast]",
+        "optimize[balanced]",
+        "optimize[smallest]",
+    }
+    sizes = results["optimize_sizes"]
+    assert sizes["fast"]["saved_bytes"] == 0
+    assert sizes["smallest"]["bytes"] <= sizes["balanced"]["bytes"]
+    preview = results["benchmarks"]["preview"]
+    assert 0 < preview["p50_seconds"] <= preview["p95_seconds"]
+    assert preview["peak_bytes"] > 0
+    json.dumps(results)
+
+
+def test_compare_flags_regressions_beyond_threshold(tmp_path: Path) -> None:
+    def results(p50: float, peak: int) -> dict:
+        return {"benchmarks": {"preview": {"p50_seconds": p50, "peak_bytes": peak}}}
+
+    assert compare(results(0.1, 1000), results(0.11, 1100), 0.2) == []
+    regressions = compare(results(0.1, 1000), results(0.2, 1000), 0.2)
+    assert len(regressions) == 1
+    assert regressions[0].startswith("preview p50_seconds")
+
+    baseline = tmp_path / "baseline.json"
+    current = tmp_path / "nu.json"
+    baseline.write_text(json.dumps(results(0.1, 1000)), encoding="utf-8")
+    current.write_text(json.dumps(results(0.1, 5000)), encoding="utf-8")
+    assert main(["compare", str(baseline), str(current)]) == 1
@@ -0,0 +1,63 @@
+from collections.abc import Sequence
+from pathlib import Path
+from typing import Any
+
+import pytest
+
+from equivalence import (
+    RENDERERS,
+    check_equivalence,
+    compare_pdfs,
+    main,
+    synthetic_cases,
+)
+from models import ImageCatalog, Person
+from pdf_utils import PdfGenerator
+
+ROOT = Path(__file__).parents[1]
+CATALOG = ImageCatalog(ROOT / "GUI" / "images" / "ontwerpen")
+CASES = synthetic_cases(CATALOG, sizes=[3])
+
+
+@pytest.mark.parametrize("candidate", ["warm", "preview", "cooperative"])
+def test_render_paths_match_reference(candidate: str) -> None:
+    results = check_equivalence(RENDERERS[candidate](), CASES, CATALOG)
+
+    assert {result.name: result.differences for result in results} == {
+        case.name: [] for case in CASES
+    }
+
+
+def test_changed_cards_are_reported() -> None:
+    def renamed(
+        people: Sequence[Person], catalog: ImageCatalog, layout: dict[str, Any]
+    ) -> bytes:
+        changed = [Person(**person.to_dict()) for person in people]
+        changed[0].name = "Iemand Anders"
+        return PdfGenerator().document(changed, catalog, layout)
+
+    [result] = check_equivalence(renamed, CASES[:1], CATALOG)
+
+    assert not result.equivalent
+    assert any("tekst" in difference for difference in result.differences)
+    assert any("pixels verschillen" in difference for difference in result.differences)
+
+
+def test_page_count_mismatch_is_reported() -> None:
+    person = CATALOG.new_person()
+    generator = PdfGenerator()
+
+    differences = compare_pdfs(
+        generator.document([person], CATALOG),
+        generator.preview(person, CATALOG),
+    )
+
+    assert differences == ["3 pagina's verwacht, 1."]
+
+
+def test_cli_reports_each_case(capsys: pytest.CaptureFixture[str]) -> None:
+    assert main(["--candidate", "warm", "--sizes", "1"]) == 0
+
+    output = capsys.readouterr().out
+    assert "ok       standaard-1" in output
+    assert "gevallen gelijk" in output
@@ -0,0 +1,138 @@
+import zipfile
+from io import BytesIO
+from pathlib import Path
+
+import pytest
+
+from importer import import_people
+from models import ImageCatalog, Person
+
+IMAGE_DIR = Path(__file__).parents[1] / "GUI" / "images" / "ontwerpen"
+CATALOG = ImageCatalog(IMAGE_DIR)
+
+
+def _xlsx(rows: list[list[str]]) -> bytes:
+    strings = [value for row in rows for value in row]
+    shared = "".join(f"<si><t>{value}</t></si>" for value in strings)
+    sheet_rows = "".join(
+        f'<row r="{row_number}">'
+        + "".join(
+            f'<c r="{chr(65 + column)}{row_number}" t="s">'
+            f"<v>{strings.index(value)}</v></c>"
+            for column, value in enumerate(row)
+        )
+        + "</row>"
+        for row_number, row in enumerate(rows, start=1)
+    )
+    namespace = "http://schemas.openxmlformats.org/spreadsheetml/2006/main"
+    buffer = BytesIO()
+    with zipfile.ZipFile(buffer, "w") as archive:
+        archive.writestr(
+            "xl/sharedStrings.xml", f'<sst xmlns="{namespace}">{shared}</sst>'
+        )
+        archive.writestr(
+            "xl/worksheets/sheet1.xml",
+            f'<worksheet xmlns="{namespace}"><sheetData>{sheet_rows}'
+            "</sheetData></worksheet>",
+        )
+    return buffer.getvalue()
+
+
+def test_csv_import_maps_columns_and_normalizes_values() -> None:
+    data = (
+        "\ufeffVoornaam;Familienaam;Geboortedatum;Kleur;Afbeelding;Groep\n"
+        "Ada;Lovelace;10/12/2014;Blauw;paraplu;K2\n"
+        "Grace;Hopper;2013-12-09;;;\n"
+    ).encode()
+
+    result = import_people(data, CATALOG, filename="klas.csv")
+
+    assert result.errors == []
+    assert result.people[0] == Person(
+        name="Ada",
+        family_name="Lovelace",
+        color="blauw",
+        scene="paraplu",
+        birth_date="10-12-2014",
+        group=2,
+    )
+    assert result.people[1].birth_date == "09-12-2013"
+    assert (result.people[1].scene, result.people[1].color) == (
+        CATALOG.new_person().scene,
+        CATALOG.new_person().color,
+    )
+
+
+def test_years_and_class_names_are_not_misread() -> None:
+    data = (
+        b"Voornaam,Familienaam,Geboortedatum,Klas\n"
+        b"Ada,Lovelace,2014,3A\n"
+        b"Grace,Hopper,43809,groep 1\n"
+        b"Alan,Turing,01-03-2019,3A\n"
+        b"Ida,Peeters,01-03-2020,3A\n"
+    )
+
+    result = import_people(data, CATALOG, filename="klas.csv")
+
+    assert result.people[0].birth_date == "2014"
+    assert result.people[1].birth_date == "10-12-2019"
+    assert [person.group for person in result.people] == [1, 1, 2, 1]
+
+
+def test_group_is_inferred_from_birth_year() -> None:
+    data = (
+        b"first name,last name,date of birth\n"
+        b"Ada,Lovelace,01-03-2020\n"
+        b"Grace,Hopper,01-03-2019\n"
+        b"Alan,Turing,05-11-2020\n"
+    )
+
+    result = import_people(data, CATALOG, filename="class.csv")
+
+    assert [person.group for person in result.people] == [1, 2, 1]
+
+
+def test_xlsx_import_reads_shared_strings() -> None:
+    data = _xlsx(
+        [
+            ["Voornaam", "Familienaam", "Geboortedatum"],
+            ["Ada", "Lovelace", "10-12-2014"],
+        ]
+    )
+
+    result = import_people(data, CATALOG, filename="klas.xlsx")
+
+    assert result.errors == []
+    assert result.people[0].full_name == "Ada Lovelace"
+
+
+def test_import_collects_every_error_at_once() -> None:
+    data = b"Naam kind,Geboortedatum,Kleur\n,31-02-2014,blauw\nGrace,09-12-2013,paars\n"
+
+    result = import_people(
+        data, CATALOG, filename="klas.csv", columns={"name": "Naam kind"}
+    )
+
+    assert result.errors == [
+        "Row 1: name is required.",
+        "Row 1: birth date must use dd-mm-yyyy.",
+        "Row 2: No image exists for scene 'bloem' and color 'paars'.",
+    ]
+
+
+def test_import_requires_a_name_column() -> None:
+    with pytest.raises(ValueError, match="Voornaam"):
+        import_people(b"Kleur\nblauw\n", CATALOG, filename="klas.csv")
+
+
+def test_large_import_keeps_every_row() -> None:
+    rows = "".join(
+        f"Kind {index},Familie,{index % 28 + 1:02d}-03-{2019 + index % 2}\n"
+        for index in range(5_000)
+    )
+    data = f"Voornaam,Familienaam,Geboortedatum\n{rows}".encode()
+
+    result = import_people(data, CATALOG, filename="school.csv")
+
+    assert len(result.people) == 5_000
+    assert result.errors == []
@@ -0,0 +1,74 @@
+import json
+from pathlib import Path
+
+import pytest
+
+import loadtest
+from loadtest import LoadTestConfig, main, run_load_test, summarize
+
+
+def test_summarize() -> None:
+    stats = summarize([float(value) for value in range(100, 0, -1)])
+    assert stats == {"count": 100, "p50": 51.0, "p95": 95.0, "p99": 99.0, "max": 100.0}
+    assert summarize([])["p95"] is None
+
+
+async def test_teachers_work_in_their_own_sessions() -> None:
+    report = await run_load_test(
+        LoadTestConfig(
+            teachers=2,
+            duration_seconds=4,
+            think_seconds=0.2,
+            keystroke_seconds=0.01,
+            class_size=3,
+        )
+    )
+
+    assert report["error_count"] == 0, report["errors"]
+    assert sum(report["actions"].values()) >= 4
+    assert report["preview_seconds"]["count"] > 0
+    assert report["event_loop_lag_seconds"]["count"] > 0
+    assert report["session_bytes"]["count"] == 2
+    assert report["session_bytes"]["p50"] > 0
+
+
+async def test_downloads_reach_the_teacher_who_asked(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    # Both teachers open the same class, so their documents share a key.
+    monkeypatch.setattr(loadtest, "ACTIONS", {"download": 1})
+    monkeypatch.setattr(loadtest, "ACTION_TIMEOUT", 10.0)
+
+    report = await run_load_test(
+        LoadTestConfig(teachers=3, duration_seconds=2, think_seconds=0.1, class_size=2)
+    )
+
+    assert report["error_count"] == 0, report["errors"]
+    assert report["download_seconds"]["count"] == report["actions"]["download"]
+
+
+def test_cli_fails_above_the_preview_limit(
+    tmp_path: Path, capsys: pytest.CaptureFixture[str]
+) -> None:
+    output = tmp_path / "rapport.json"
+    code = main(
+        [
+            "--teachers",
+            "1",
+            "--duration",
+            "2",
+            "--think",
+            "0.2",
+            "--class-size",
+            "2",
+            "--output",
+            str(output),
+            "--max-preview-p95",
+            "0",
+        ]
+    )
+
+    assert code == 1
+    assert "p95 preview" in capsys.readouterr().err
+    report = json.loads(output.read_text(encoding="utf-8"))
+    assert report["config"]["teachers"] == 1
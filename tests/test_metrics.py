@@ -0,0 +1,115 @@
+import asyncio
+from collections.abc import Iterator
+from pathlib import Path
+
+import pytest
+from nicegui.testing import User
+
+import app  # noqa: F401  # register the NiceGUI page
+import metrics as metrics_module
+from metrics import STAGE_SECONDS, Metrics, metrics
+from models import ImageCatalog
+from pdf_utils import (
+    DocumentCache,
+    PdfGenerator,
+    PdfProject,
+    load_pdf_project,
+    render_preview_png,
+)
+from scheduler import Priority, RenderScheduler
+
+ROOT = Path(__file__).parents[1]
+CATALOG = ImageCatalog(ROOT / "GUI" / "images" / "ontwerpen")
+
+
+@pytest.fixture
+def enabled_metrics() -> Iterator[Metrics]:
+    metrics.reset()
+    metrics.enabled = True
+    yield metrics
+    metrics.enabled = False
+    metrics.reset()
+
+
+def test_disabled_metrics_record_nothing() -> None:
+    registry = Metrics()
+
+    with registry.time(stage="output"):
+        pass
+    registry.increment(metrics_module.CACHE_REQUESTS, result="hit")
+
+    assert registry.time(stage="output") is registry.time(stage="new_pdf")
+    assert "jufdea_stage_seconds_count" not in registry.render()
+
+
+def test_histograms_use_prometheus_text_format() -> None:
+    registry = Metrics(enabled=True)
+
+    registry.observe(STAGE_SECONDS, 0.003, stage="output")
+    registry.observe(STAGE_SECONDS, 2.0, stage="output")
+    registry.increment(metrics_module.RENDERS_IN_FLIGHT)
+    text = registry.render()
+
+    assert "# TYPE jufdea_stage_seconds histogram" in text
+    assert 'jufdea_stage_seconds_bucket{stage="output",le="0.005"} 1' in text
+    assert 'jufdea_stage_seconds_bucket{stage="output",le="+Inf"} 2' in text
+    assert 'jufdea_stage_seconds_count{stage="output"} 2' in text
+    assert "jufdea_renders_in_flight 1" in text
+
+
+async def test_pipeline_stages_are_observed(enabled_metrics: Metrics) -> None:
+    generator = PdfGenerator(cache=DocumentCache())
+    scheduler = RenderScheduler(asyncio.to_thread)
+    people = [CATALOG.new_person()]
+
+    pdf = await scheduler.submit(
+        "a", Priority.DOWNLOAD, generator.document, people, CATALOG
+    )
+    generator.document(people, CATALOG)
+    render_preview_png(generator.preview(people[0], CATALOG))
+    load_pdf_project(pdf, CATALOG)
+    text = enabled_metrics.render()
+
+    for stage in (
+        "new_pdf",
+        "group_pages",
+        "output",
+        "preview_png",
+        "load_pdf_project",
+    ):
+        assert f'jufdea_stage_seconds_count{{stage="{stage}"}}' in text
+    assert 'layout="Fest",stage="draw_card"' in text
+    assert 'jufdea_document_cache_requests_total{result="hit"} 1' in text
+    assert 'jufdea_queue_wait_seconds_count{priority="DOWNLOAD"} 1' in text
+    assert "jufdea_renders_in_flight 0" in text
+
+
+async def test_sandboxed_loads_are_observed(
+    enabled_metrics: Metrics, monkeypatch: pytest.MonkeyPatch, tmp_path: Path
+) -> None:
+    loaded = PdfProject([CATALOG.new_person()], {})
+
+    class Pool:
+        async def load(self, path: Path, *, catalog: str | None = None) -> PdfProject:
+            return loaded
+
+    monkeypatch.setattr(app, "parse_pool", Pool())
+
+    project = await app._load_uploaded_project(tmp_path / "klas.pdf", CATALOG)
+
+    assert project is loaded
+    text = enabled_metrics.render()
+    assert 'jufdea_stage_seconds_count{stage="load_pdf_project"} 1' in text
+
+
+async def test_metrics_route_is_only_served_when_enabled(user: User) -> None:
+    assert (await user.http_client.get("/metrics")).status_code == 404
+
+    metrics.enabled = True
+    try:
+        response = await user.http_client.get("/metrics")
+    finally:
+        metrics.enabled = False
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    assert "# TYPE jufdea_stage_seconds histogram" in response.text
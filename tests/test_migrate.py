@@ -0,0 +1,99 @@
+import json
+import subprocess
+import sys
+from pathlib import Path
+
+import fitz
+import pytest
+from fpdf import FPDF
+
+import pdf_utils
+from migrate import main, migrate_directory, migrate_pdf
+from models import ImageCatalog
+from pdf_utils import PdfGenerator, load_pdf_project
+
+ROOT = Path(__file__).parents[1]
+CATALOG = ImageCatalog(ROOT / "GUI" / "images" / "ontwerpen")
+
+
+def _archive(directory: Path) -> list:
+    people = [CATALOG.new_person(), CATALOG.new_person()]
+    people[0].name = "Ada"
+    people[0].family_name = "Lovelace"
+    people[1].name = "Grace"
+    people[1].family_name = "Hopper"
+    people[1].group = 2
+    pdf = PdfGenerator().document(people, CATALOG)
+    with fitz.open(stream=pdf, filetype="pdf") as document:
+        document.embfile_del("jufdea-project.json")
+        legacy = document.tobytes()
+
+    (directory / "2019").mkdir(parents=True)
+    (directory / "2019" / "klas-a.pdf").write_bytes(legacy)
+    (directory / "klas-b.pdf").write_bytes(pdf)
+    plain = FPDF()
+    plain.add_page()
+    (directory / "brief.pdf").write_bytes(bytes(plain.output()))
+    return people
+
+
+def test_archive_is_migrated_into_output_folder(tmp_path: Path) -> None:
+    people = _archive(tmp_path / "archief")
+
+    results = migrate_directory(tmp_path / "archief", tmp_path / "uit", workers=2)
+
+    statuses = {Path(result.source).name: result.status for result in results}
+    assert statuses == {
+        "brief.pdf": "failed",
+        "klas-a.pdf": "migrated",
+        "klas-b.pdf": "current",
+    }
+    migrated = (tmp_path / "uit" / "2019" / "klas-a.pdf").read_bytes()
+    with fitz.open(stream=migrated, filetype="pdf") as document:
+        assert "jufdea-project.json" in document.embfile_names()
+        assert document.page_count == 4
+    assert load_pdf_project(migrated, CATALOG).people == people
+    assert (tmp_path / "uit" / "klas-b.pdf").exists()
+
+
+def test_legacy_pdf_is_migrated_without_a_page_pool(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    people = _archive(tmp_path)
+    monkeypatch.setattr(pdf_utils, "LEGACY_PARALLEL_PAGES", 1)
+
+    def no_pool(*args: object) -> None:
+        raise AssertionError("legacy pages were read in a process pool")
+
+    monkeypatch.setattr(pdf_utils, "_read_person_pages_parallel", no_pool)
+
+    migrated = migrate_pdf((tmp_path / "2019" / "klas-a.pdf").read_bytes(), CATALOG)
+
+    assert migrated is not None
+    assert migrated[1].people == people
+
+
+def test_in_place_migration_writes_report(tmp_path: Path) -> None:
+    _archive(tmp_path / "archief")
+    report = tmp_path / "rapport.json"
+
+    exit_code = main([str(tmp_path / "archief"), "--in-place", "--report", str(report)])
+
+    assert exit_code == 1
+    failures = [row for row in json.loads(report.read_text()) if row["error"]]
+    assert [Path(row["source"]).name for row in failures] == ["brief.pdf"]
+    with fitz.open(tmp_path / "archief" / "2019" / "klas-a.pdf") as document:
+        assert "jufdea-project.json" in document.embfile_names()
+
+
+def test_cli_defers_pdf_libraries() -> None:
+    code = "import sys, migrate; print(sorted({'fitz', 'fpdf'} & set(sys.modules)))"
+    result = subprocess.run(
+        [sys.executable, "-c", code],
+        cwd=ROOT,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+
+    assert result.stdout.strip() == "[]"
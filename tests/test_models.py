@@ -1,6 +1,18 @@
+import os
+import shutil
 from pathlib import Path
+from typing import Any
 
-from models import ImageCatalog, Person, validate_people
+import pytest
+
+import models
+from models import (
+    DESIGN_MANIFEST,
+    CatalogWatcher,
+    ImageCatalog,
+    Person,
+    validate_people,
+)
 
 IMAGE_DIR = Path(__file__).parents[1] / "GUI" / "images" / "ontwerpen"
 
@@ -52,3 +64,93 @@ def test_catalog_identifies_extracted_image_bytes() -> None:
     image = (IMAGE_DIR / "zonnebril-11.jpg").read_bytes()
 
     assert catalog.selection_for_image(image) == ("zonnebril", "groen")
+
+
+def test_manifest_catalog_fetches_designs_lazily(tmp_path: Path) -> None:
+    catalog = ImageCatalog(IMAGE_DIR)
+    published = tmp_path / "site"
+    catalog.write_manifest(published)
+    lazy_dir = tmp_path / "browser"
+    lazy_dir.mkdir()
+    shutil.copy(published / DESIGN_MANIFEST, lazy_dir)
+
+    lazy = ImageCatalog(lazy_dir)
+
+    assert (lazy.scenes, lazy.colors) == (catalog.scenes, catalog.colors)
+    assert lazy.fingerprint == catalog.fingerprint
+    image = (IMAGE_DIR / "zonnebril-11.jpg").read_bytes()
+    assert lazy.selection_for_image(image) == ("zonnebril", "groen")
+
+    person = Person(scene="zonnebril", color="groen")
+    [missing] = lazy.missing_images([person, person])
+    assert missing.parent == lazy_dir
+    assert (published / missing.name).read_bytes() == image
+
+    shutil.copy(published / missing.name, missing)
+    assert lazy.missing_images([person]) == []
+    assert lazy.image_for(person) == missing
+
+
+def _design_dir(tmp_path: Path, *names: str) -> Path:
+    directory = tmp_path / "ontwerpen"
+    directory.mkdir()
+    for name in names:
+        shutil.copy(IMAGE_DIR / name, directory / name)
+    return directory
+
+
+def test_refresh_hashes_only_changed_designs(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    directory = _design_dir(tmp_path, "bloem-25.jpg", "bloem-26.jpg")
+    catalog = ImageCatalog(directory)
+    assert catalog.refreshed() is catalog
+
+    shutil.copy(IMAGE_DIR / "paraplu-01.jpg", directory)
+    hashed: list[int] = []
+    original_sha256 = models.sha256
+
+    def counting_sha256(data: bytes = b"") -> Any:
+        hashed.append(len(data))
+        return original_sha256(data)
+
+    monkeypatch.setattr(models, "sha256", counting_sha256)
+    refreshed = catalog.refreshed()
+
+    assert refreshed.version == catalog.version + 1
+    assert refreshed.scenes == ["bloem", "paraplu"]
+    assert catalog.scenes == ["bloem"]
+    assert hashed[0] == (directory / "paraplu-01.jpg").stat().st_size
+    assert refreshed.fingerprint == ImageCatalog(directory).fingerprint
+
+
+def test_refresh_replaces_and_retires_designs(tmp_path: Path) -> None:
+    directory = _design_dir(tmp_path, "bloem-25.jpg", "paraplu-01.jpg")
+    catalog = ImageCatalog(directory)
+    replacement = (IMAGE_DIR / "sjaal-13.jpg").read_bytes()
+    (directory / "bloem-25.jpg").write_bytes(replacement)
+    os.utime(directory / "bloem-25.jpg", ns=(1, 1))
+    (directory / "paraplu-01.jpg").unlink()
+
+    refreshed = catalog.refreshed()
+
+    assert refreshed.selections == {("bloem", "geel")}
+    assert refreshed.selection_for_image(replacement) == ("bloem", "geel")
+    with pytest.raises(ValueError):
+        refreshed.selection_for_image((IMAGE_DIR / "bloem-25.jpg").read_bytes())
+
+
+def test_watcher_keeps_the_current_version_on_duplicates(tmp_path: Path) -> None:
+    directory = _design_dir(tmp_path, "bloem-25.jpg")
+    watcher = CatalogWatcher(ImageCatalog(directory))
+    first = watcher.current
+    assert watcher.poll() is False
+
+    shutil.copy(IMAGE_DIR / "bloem-25.jpg", directory / "bloem-geel.jpg")
+    with pytest.raises(ValueError, match="Duplicate design"):
+        watcher.poll()
+    assert watcher.current is first
+
+    (directory / "bloem-geel.jpg").rename(directory / "bloem-oranje.jpg")
+    assert watcher.poll() is True
+    assert watcher.current.colors == ["geel", "oranje"]
@@ -1,15 +1,26 @@
+import asyncio
+import inspect
 import json
+import subprocess
+import sys
 from pathlib import Path
 
 import fitz
 import pytest
 from fpdf import FPDF
 
+import pdf_utils
 from models import ImageCatalog
 from pdf_utils import (
+    DocumentCache,
     PdfGenerator,
+    RenderProgress,
+    finish_steps,
     load_layout,
     load_pdf_project,
+    optimize_pdf,
+    probe_pdf,
+    render_cooperatively,
     render_preview_png,
     validate_layout,
 )
@@ -93,3 +104,259 @@ def test_attachment_free_generated_pdf_is_reconstructed() -> None:
     restored = load_pdf_project(old_pdf, CATALOG)
 
     assert restored.people == people
+
+
+def test_documents_are_deterministic_and_cached() -> None:
+    people = [CATALOG.new_person(), CATALOG.new_person()]
+    people[1].name = "Grace"
+    cache = DocumentCache()
+    generator = PdfGenerator(cache=cache)
+
+    first = PdfGenerator().document(people, CATALOG)
+    second = generator.document(people, CATALOG)
+    third = generator.document(people, CATALOG)
+
+    assert first == second
+    assert third is second
+    assert (cache.hits, cache.misses) == (1, 1)
+    key = generator.document_key(people, CATALOG)
+    assert f"/ID [<{key[:32].upper()}>".encode() in first
+
+
+@pytest.mark.parametrize("mode", pdf_utils.OPTIMIZE_MODES)
+def test_optimize_keeps_project_data(mode: str) -> None:
+    people = [CATALOG.new_person(), CATALOG.new_person()]
+    people[0].name = "Ada"
+    original = PdfGenerator().document(people, CATALOG)
+
+    optimized, report = optimize_pdf(original, mode)
+
+    assert report.mode == mode
+    assert report.original_bytes == len(original)
+    assert report.optimized_bytes == len(optimized) <= len(original)
+    assert report.saved_bytes == len(original) - len(optimized)
+    assert report.seconds >= 0
+    assert load_pdf_project(optimized, CATALOG).people == people
+    assert optimize_pdf(original, mode)[0] == optimized
+    if mode == "fast":
+        assert optimized is original
+
+
+def test_smallest_mode_resamples_designs() -> None:
+    original = PdfGenerator().document([CATALOG.new_person()], CATALOG)
+    balanced, _ = optimize_pdf(original, "balanced")
+    smallest, report = optimize_pdf(original, "smallest")
+
+    assert len(smallest) < len(balanced)
+    assert report.saved_bytes > len(original) // 2
+    with fitz.open(stream=smallest, filetype="pdf") as document:
+        width = max(image[2] for image in document.get_page_images(1))
+        page_width_inch = document[1].rect.width / 72
+    assert width <= page_width_inch * pdf_utils.OPTIMIZE_DPI
+
+
+def test_generator_optimizes_and_caches_per_mode() -> None:
+    people = [CATALOG.new_person()]
+    cache = DocumentCache()
+    fast = PdfGenerator(cache=cache)
+    small = PdfGenerator(cache=cache, optimize="smallest")
+
+    assert fast.document_key(people, CATALOG) != small.document_key(people, CATALOG)
+    assert len(small.document(people, CATALOG)) < len(fast.document(people, CATALOG))
+    assert cache.misses == 2
+    with pytest.raises(ValueError, match="Onbekende optimalisatie"):
+        PdfGenerator(optimize="extreem")
+
+
+def test_document_cache_evicts_least_recently_used() -> None:
+    cache = DocumentCache(max_bytes=10)
+    cache.put("a", b"12345")
+    cache.put("b", b"12345")
+    assert cache.get("a") == b"12345"
+
+    cache.put("c", b"123")
+
+    assert cache.get("b") is None
+    assert len(cache) == 2
+    assert cache.size == 8
+
+
+def test_held_documents_survive_eviction() -> None:
+    cache = DocumentCache(max_bytes=10)
+    cache.hold("sessie", "groot", b"te groot voor de cache")
+    cache.put("groot", b"te groot voor de cache")
+    cache.put("a", b"1234567890")
+
+    assert cache.get("groot") == b"te groot voor de cache"
+    cache.hold("sessie", "nieuw", b"123")
+    assert cache.get("groot") is None
+    cache.release("sessie")
+    assert cache.get("nieuw") is None
+
+
+def test_document_key_does_not_depend_on_the_install_path(tmp_path: Path) -> None:
+    font = tmp_path / "elders.ttf"
+    font.write_bytes(pdf_utils.DEFAULT_FONT_PATH.read_bytes())
+    people = [CATALOG.new_person()]
+
+    assert PdfGenerator(font_path=font).document_key(
+        people, CATALOG
+    ) == PdfGenerator().document_key(people, CATALOG)
+
+
+def test_large_legacy_pdf_is_reconstructed_in_parallel(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    monkeypatch.setattr(pdf_utils, "LEGACY_PARALLEL_PAGES", 1)
+    people = [CATALOG.new_person() for _ in range(4)]
+    for person, (name, family_name) in zip(
+        people,
+        [("Ada", "Lovelace"), ("Ada", "Byron"), ("Anne Marie", "Smit"), ("An", "Ng")],
+        strict=True,
+    ):
+        person.name = name
+        person.family_name = family_name
+    people[1].group = 2
+    people[3].scene = "zonnebril"
+    people[3].color = "groen"
+    pdf = PdfGenerator().document(people, CATALOG)
+    with fitz.open(stream=pdf, filetype="pdf") as document:
+        document.embfile_del("jufdea-project.json")
+        old_pdf = document.tobytes()
+
+    restored = load_pdf_project(old_pdf, CATALOG)
+
+    assert restored.people == people
+
+
+def test_legacy_pdf_can_be_reconstructed_without_a_pool(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    monkeypatch.setattr(pdf_utils, "LEGACY_PARALLEL_PAGES", 1)
+    people = [CATALOG.new_person() for _ in range(2)]
+    pdf = PdfGenerator().document(people, CATALOG)
+    with fitz.open(stream=pdf, filetype="pdf") as document:
+        document.embfile_del("jufdea-project.json")
+        old_pdf = document.tobytes()
+
+    def no_pool(*args: object) -> None:
+        raise AssertionError("legacy pages were read in a process pool")
+
+    monkeypatch.setattr(pdf_utils, "_read_person_pages_parallel", no_pool)
+
+    restored = load_pdf_project(old_pdf, CATALOG, parallel=False)
+
+    assert restored.people == people
+
+
+def test_pdf_is_probed_before_parsing(tmp_path: Path) -> None:
+    person = CATALOG.new_person()
+    current = PdfGenerator().document([person], CATALOG)
+    path = tmp_path / "klas.pdf"
+    path.write_bytes(current)
+    plain = FPDF()
+    plain.add_page(orientation="L")
+    plain.add_page(orientation="P")
+
+    assert probe_pdf(path) == "current"
+    assert load_pdf_project(path, CATALOG).people == [person]
+    assert load_pdf_project(current + b"\0" * 4096, CATALOG).people == [person]
+    with pytest.raises(ValueError, match="geen geldige JufDea-PDF"):
+        probe_pdf(b"GIF89a" + b"\0" * 2048 + current)
+    with pytest.raises(ValueError, match="geen geldige JufDea-PDF"):
+        probe_pdf(b"%PDF-1.7\n" + b"0" * 4096)
+    with pytest.raises(ValueError, match="geen herkenbare"):
+        probe_pdf(bytes(plain.output()))
+
+
+def test_pymupdf_is_imported_on_first_use() -> None:
+    code = (
+        "import sys, pdf_utils\n"
+        "from models import DEFAULT_IMAGE_DIR, ImageCatalog\n"
+        "catalog = ImageCatalog(DEFAULT_IMAGE_DIR)\n"
+        "pdf = pdf_utils.PdfGenerator().preview(catalog.new_person(), catalog)\n"
+        "print('fitz' in sys.modules)\n"
+        "pdf_utils.render_preview_png(pdf)\n"
+        "print('fitz' in sys.modules)\n"
+    )
+    result = subprocess.run(
+        [sys.executable, "-c", code],
+        cwd=ROOT,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+
+    lines = result.stdout.splitlines()
+    assert (lines[0], lines[-1]) == ("False", "True")
+
+
+def test_static_build_does_not_preload_pymupdf() -> None:
+    config = (ROOT / "static" / "pyscript.toml").read_text(encoding="utf-8")
+
+    assert "PyMuPDF" not in config
+
+
+def test_stepwise_render_matches_document() -> None:
+    people = [CATALOG.new_person() for _ in range(3)]
+    generator = PdfGenerator()
+    steps = generator.document_steps(people, CATALOG)
+
+    progress = []
+    while True:
+        try:
+            progress.append(next(steps))
+        except StopIteration as finished:
+            pdf = finished.value
+            break
+
+    assert [step.done for step in progress] == [1, 2, 3, 4]
+    assert {step.total for step in progress} == {5}
+    assert pdf == generator.document(people, CATALOG)
+
+
+async def test_cooperative_render_leaves_room_for_the_event_loop() -> None:
+    # Simulates the single-threaded browser: the render and the "UI" share one
+    # event loop, and the UI must get a turn between every render step.
+    person = CATALOG.new_person()
+    generator = PdfGenerator()
+    steps: list[RenderProgress] = []
+    ui_turns: list[int] = []
+
+    async def ui() -> None:
+        while True:
+            ui_turns.append(len(steps))
+            await asyncio.sleep(0)
+
+    ticker = asyncio.create_task(ui())
+    pdf = await render_cooperatively(
+        generator.preview_steps(person, CATALOG), on_progress=steps.append
+    )
+    ticker.cancel()
+
+    assert pdf == generator.preview(person, CATALOG)
+    assert [step.done for step in steps] == list(range(1, steps[0].total))
+    assert set(range(1, len(steps))) <= set(ui_turns)
+
+
+async def test_cancelled_cooperative_render_stops_between_steps() -> None:
+    people = [CATALOG.new_person() for _ in range(10)]
+    steps = PdfGenerator().document_steps(people, CATALOG)
+    seen: list[RenderProgress] = []
+
+    with pytest.raises(asyncio.CancelledError):
+        await render_cooperatively(
+            steps, on_progress=seen.append, cancelled=lambda: len(seen) == 3
+        )
+
+    assert len(seen) == 3
+    assert inspect.getgeneratorstate(steps) == inspect.GEN_CLOSED
+
+
+def test_cached_document_takes_no_steps() -> None:
+    generator = PdfGenerator(cache=DocumentCache())
+    people = [CATALOG.new_person()]
+    pdf = generator.document(people, CATALOG)
+
+    assert finish_steps(generator.document_steps(people, CATALOG)) == pdf
+    assert list(generator.document_steps(people, CATALOG)) == []
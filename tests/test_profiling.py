@@ -0,0 +1,111 @@
+import pstats
+from pathlib import Path
+
+import pytest
+from nicegui.testing import User
+
+import app  # noqa: F401  # register the NiceGUI page
+from models import ImageCatalog
+from pdf_utils import PdfGenerator, decode_project, load_layout
+from profiling import RenderProfiler, render_profiler
+
+ROOT = Path(__file__).parents[1]
+CATALOG = ImageCatalog(ROOT / "GUI" / "images" / "ontwerpen")
+
+
+def _render(profiler: RenderProfiler, name: str) -> None:
+    person = CATALOG.new_person()
+    person.name = name
+    with profiler.profile("preview", [person], load_layout()):
+        PdfGenerator().preview(person, CATALOG)
+
+
+def test_disabled_profiler_saves_nothing(tmp_path: Path) -> None:
+    profiler = RenderProfiler(tmp_path, threshold_seconds=0)
+
+    _render(profiler, "Ada")
+
+    assert profiler.slowest == []
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_slow_renders_are_saved_with_reproducible_payload(tmp_path: Path) -> None:
+    profiler = RenderProfiler(tmp_path, threshold_seconds=0, enabled=True)
+
+    _render(profiler, "Ada")
+
+    [record] = profiler.slowest
+    assert record.kind == "preview"
+    assert record.rows == 1
+    stats = pstats.Stats(str(record.profile_path))
+    assert any(function == "_draw_card" for _, _, function in stats.stats)
+    project = decode_project(record.payload_path.read_bytes())
+    assert project.people[0].name == "Ada"
+
+
+def test_only_the_slowest_renders_are_kept(tmp_path: Path) -> None:
+    profiler = RenderProfiler(
+        tmp_path, threshold_seconds=0, enabled=True, max_records=2
+    )
+
+    for name in ("Ada", "Grace", "Linus"):
+        _render(profiler, name)
+
+    records = profiler.slowest
+    assert len(records) == 2
+    assert records[0].seconds >= records[1].seconds
+    assert sorted(tmp_path.iterdir()) == sorted(
+        path
+        for record in records
+        for path in (record.profile_path, record.payload_path)
+    )
+
+
+def test_failed_save_does_not_fail_the_render(
+    tmp_path: Path, caplog: pytest.LogCaptureFixture
+) -> None:
+    blocked = tmp_path / "bestand"
+    blocked.write_text("")
+    profiler = RenderProfiler(blocked / "profiles", threshold_seconds=0, enabled=True)
+
+    _render(profiler, "Ada")
+
+    assert profiler.slowest == []
+    assert "Could not save the profile" in caplog.text
+
+
+def test_fast_renders_stay_below_threshold(tmp_path: Path) -> None:
+    profiler = RenderProfiler(tmp_path, threshold_seconds=60, enabled=True)
+
+    _render(profiler, "Ada")
+
+    assert profiler.slowest == []
+
+
+async def test_admin_page_requires_token(
+    user: User, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    response = await user.http_client.get("/admin/profiles")
+    assert response.status_code == 404
+
+    monkeypatch.setenv("JUFDEA_ADMIN_TOKEN", "geheim")
+    wrong = await user.http_client.get(
+        "/admin/profiles", headers={"X-Admin-Token": "fout"}
+    )
+    assert wrong.status_code == 404
+    # The token is not accepted in the URL, where logs and history keep it.
+    assert (
+        await user.http_client.get("/admin/profiles?token=geheim")
+    ).status_code == 404
+    refused = await user.http_client.post("/admin/login", data={"token": "fout"})
+    assert refused.status_code == 403
+    login = await user.http_client.post(
+        "/admin/login", data={"token": "geheim", "next": "/admin/profiles"}
+    )
+    assert login.status_code == 303
+    assert login.headers["location"] == "/admin/profiles"
+    assert "httponly" in login.headers["set-cookie"].lower()
+    await user.open("/admin/profiles")
+    await user.should_see("Trage renders")
+    await user.should_see("Profileren")
+    assert render_profiler.enabled is False
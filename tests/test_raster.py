@@ -0,0 +1,85 @@
+import io
+import zipfile
+from pathlib import Path
+
+import fitz
+import pytest
+from PIL import Image
+
+from models import ImageCatalog
+from pdf_utils import PdfGenerator
+from raster import main, parse_pages, rasterize_to_zip
+
+ROOT = Path(__file__).parents[1]
+CATALOG = ImageCatalog(ROOT / "GUI" / "images" / "ontwerpen")
+
+
+@pytest.fixture(scope="module")
+def document() -> bytes:
+    people = [CATALOG.new_person() for _ in range(3)]
+    return PdfGenerator().document(people, CATALOG)
+
+
+def test_parse_pages() -> None:
+    assert parse_pages(None, 3) == [0, 1, 2]
+    assert parse_pages("3, 1-2,2", 5) == [2, 0, 1]
+    with pytest.raises(ValueError, match="buiten 1-5"):
+        parse_pages("4-6", 5)
+    with pytest.raises(ValueError, match="Ongeldige paginaselectie"):
+        parse_pages("een", 5)
+
+
+@pytest.mark.parametrize("image_format", ["png", "jpeg", "webp"])
+def test_all_pages_in_every_format(document: bytes, image_format: str) -> None:
+    output = io.BytesIO()
+
+    names = rasterize_to_zip(document, output, image_format=image_format, dpi=30)
+
+    with fitz.open(stream=document, filetype="pdf") as pdf:
+        page_count = pdf.page_count
+        first_page = pdf[0].rect
+    assert len(names) == page_count
+    with zipfile.ZipFile(output) as archive:
+        assert archive.namelist() == names
+        with Image.open(io.BytesIO(archive.read(names[0]))) as image:
+            assert image.format == {"png": "PNG", "jpeg": "JPEG"}.get(
+                image_format, "WEBP"
+            )
+            assert abs(image.width - first_page.width / 72 * 30) <= 1
+
+
+def test_process_pool_matches_single_process(document: bytes, tmp_path: Path) -> None:
+    source = tmp_path / "naamkaartjes.pdf"
+    source.write_bytes(document)
+    parallel = tmp_path / "parallel.zip"
+    single = tmp_path / "enkel.zip"
+
+    names = rasterize_to_zip(source, parallel, pages="2-4,1", dpi=40, workers=3)
+    rasterize_to_zip(source, single, pages="2-4,1", dpi=40, workers=1)
+
+    assert names == [
+        "pagina-002.png",
+        "pagina-003.png",
+        "pagina-004.png",
+        "pagina-001.png",
+    ]
+    with zipfile.ZipFile(parallel) as first, zipfile.ZipFile(single) as second:
+        assert [first.read(name) for name in names] == [
+            second.read(name) for name in names
+        ]
+
+
+def test_cli(document: bytes, tmp_path: Path, capsys) -> None:
+    source = tmp_path / "naamkaartjes.pdf"
+    source.write_bytes(document)
+    output = tmp_path / "scherm.zip"
+
+    assert main([str(source), str(output), "--format", "webp", "--pages", "1"]) == 0
+
+    with zipfile.ZipFile(output) as archive:
+        assert archive.namelist() == ["pagina-001.webp"]
+    assert "1 pagina's" in capsys.readouterr().out
+    with pytest.raises(SystemExit):
+        main([str(source), str(output), "--dpi", "2000"])
+    with pytest.raises(SystemExit):
+        main([str(source), str(output), "--format", "jpeg", "--quality", "0"])
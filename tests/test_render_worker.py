@@ -0,0 +1,222 @@
+import asyncio
+import os
+import subprocess
+import sys
+from collections.abc import Iterator
+from pathlib import Path
+
+import pytest
+
+from models import ImageCatalog, Person
+from pdf_utils import PdfGenerator, load_layout, render_preview_png
+from render_worker import RenderWorkerPool, WorkerError
+
+ROOT = Path(__file__).parents[1]
+CATALOG = ImageCatalog(ROOT / "GUI" / "images" / "ontwerpen")
+TOKEN = "geheim"
+
+
+def _start_worker(address: str, token: str) -> subprocess.Popen[str]:
+    process = subprocess.Popen(
+        [sys.executable, str(ROOT / "render_worker.py"), "--listen", address],
+        cwd=ROOT,
+        env={**os.environ, "JUFDEA_WORKER_TOKEN": token},
+        stdout=subprocess.PIPE,
+        text=True,
+    )
+    assert process.stdout is not None
+    for line in process.stdout:
+        if "luistert" in line:
+            return process
+    raise RuntimeError(f"Render worker on {address} did not start")
+
+
+@pytest.fixture(scope="module")
+def workers(tmp_path_factory: pytest.TempPathFactory) -> Iterator[list[str]]:
+    directory = tmp_path_factory.mktemp("workers")
+    addresses = [f"unix:{directory / f'worker-{index}.sock'}" for index in range(2)]
+    processes = [_start_worker(address, TOKEN) for address in addresses]
+    yield addresses
+    for process in processes:
+        process.kill()
+        process.wait()
+
+
+def _people() -> list[Person]:
+    person = CATALOG.new_person()
+    person.name = "Ada"
+    return [person, CATALOG.new_person()]
+
+
+async def test_worker_output_matches_local_rendering(workers: list[str]) -> None:
+    pool = RenderWorkerPool(workers, token=TOKEN)
+    people = _people()
+    layout = load_layout()
+    generator = PdfGenerator()
+    try:
+        png = await pool.preview_png(people[0], layout)
+        pdf = await pool.document(people, layout)
+    finally:
+        await pool.close()
+
+    local_preview = generator.preview(people[0], CATALOG, layout)
+    assert png == render_preview_png(local_preview)
+    assert pdf == generator.document(people, CATALOG, layout)
+
+
+async def test_load_round_trip(workers: list[str], tmp_path: Path) -> None:
+    pool = RenderWorkerPool(workers, token=TOKEN)
+    people = _people()
+    path = tmp_path / "project.pdf"
+    path.write_bytes(PdfGenerator().document(people, CATALOG, load_layout()))
+    try:
+        project = await pool.load(path)
+    finally:
+        await pool.close()
+
+    assert [person.to_dict() for person in project.people] == [
+        person.to_dict() for person in people
+    ]
+
+
+async def test_concurrent_jobs_spread_over_workers(workers: list[str]) -> None:
+    pool = RenderWorkerPool(workers, token=TOKEN)
+    person = _people()[0]
+    try:
+        await asyncio.gather(*(pool.preview_png(person) for _ in range(4)))
+        health = await pool.check()
+        used = [bool(endpoint.idle) for endpoint in pool.endpoints]
+    finally:
+        await pool.close()
+
+    assert health == dict.fromkeys(workers, True)
+    assert used == [True, True]
+
+
+async def test_unreachable_worker_is_skipped(
+    workers: list[str], tmp_path: Path
+) -> None:
+    missing = f"unix:{tmp_path / 'weg.sock'}"
+    pool = RenderWorkerPool([missing, workers[0]], token=TOKEN)
+    # Make the missing worker the least busy so it is tried first.
+    pool.endpoints[1].reported_load = 5
+    try:
+        png = await pool.preview_png(_people()[0])
+        health = await pool.check()
+    finally:
+        await pool.close()
+
+    assert png.startswith(b"\x89PNG")
+    assert health == {missing: False, workers[0]: True}
+    assert pool.endpoints[0].failures >= 1
+    assert not pool.endpoints[0].healthy
+
+
+async def test_killed_worker_falls_back_to_the_other(tmp_path: Path) -> None:
+    addresses = [f"unix:{tmp_path / f'kort-{index}.sock'}" for index in range(2)]
+    processes = [_start_worker(address, "") for address in addresses]
+    pool = RenderWorkerPool(addresses)
+    person = _people()[0]
+    try:
+        await pool.check()
+        processes[0].kill()
+        processes[0].wait()
+        pngs = await asyncio.gather(*(pool.preview_png(person) for _ in range(3)))
+    finally:
+        await pool.close()
+        for process in processes:
+            process.kill()
+            process.wait()
+
+    assert all(png.startswith(b"\x89PNG") for png in pngs)
+    assert not pool.endpoints[0].healthy
+    assert pool.endpoints[1].healthy
+
+
+async def test_no_reachable_worker(tmp_path: Path) -> None:
+    pool = RenderWorkerPool([f"unix:{tmp_path / 'weg.sock'}"])
+    with pytest.raises(WorkerError, match="geen renderserver"):
+        await pool.preview_png(_people()[0])
+
+
+async def test_invalid_jobs_are_not_retried(workers: list[str], tmp_path: Path) -> None:
+    path = tmp_path / "kapot.pdf"
+    path.write_bytes(b"geen pdf")
+    pool = RenderWorkerPool(workers, token=TOKEN)
+    try:
+        with pytest.raises(ValueError):
+            await pool.load(path)
+        health = await pool.check()
+    finally:
+        await pool.close()
+
+    assert health == dict.fromkeys(workers, True)
+    assert all(endpoint.failures == 0 for endpoint in pool.endpoints)
+
+
+async def test_wrong_token_is_refused(workers: list[str]) -> None:
+    pool = RenderWorkerPool(workers, token="fout")
+    try:
+        with pytest.raises(WorkerError, match="Ongeldig token"):
+            await pool.preview_png(_people()[0])
+    finally:
+        await pool.close()
+
+
+async def test_jobs_carry_the_optimize_mode(workers: list[str]) -> None:
+    pool = RenderWorkerPool(workers, token=TOKEN)
+    people = _people()
+    try:
+        pdf = await pool.document(people, optimize="smallest")
+    finally:
+        await pool.close()
+
+    local = PdfGenerator(optimize="smallest").document(people, CATALOG, load_layout())
+    assert pdf == local
+
+
+async def test_workers_with_other_designs_are_not_used(workers: list[str]) -> None:
+    pool = RenderWorkerPool(workers, token=TOKEN)
+    pool.catalog = "andere ontwerpen"
+    try:
+        health = await pool.check()
+        pool.endpoints[0].retry_at = pool.endpoints[1].retry_at = 0
+        with pytest.raises(WorkerError, match="geen renderserver"):
+            await pool.preview_png(_people()[0])
+        pool.catalog = CATALOG.fingerprint
+        recovered = await pool.check()
+        png = await pool.preview_png(_people()[0])
+    finally:
+        await pool.close()
+
+    assert health == dict.fromkeys(workers, False)
+    assert recovered == dict.fromkeys(workers, True)
+    assert png.startswith(b"\x89PNG")
+
+
+async def test_slow_job_is_not_retried_elsewhere(workers: list[str]) -> None:
+    pool = RenderWorkerPool(workers, token=TOKEN, timeout=0.001)
+    try:
+        with pytest.raises(WorkerError, match="te lang"):
+            await pool.document([CATALOG.new_person()] * 30)
+    finally:
+        await pool.close()
+
+    assert all(endpoint.healthy for endpoint in pool.endpoints)
+    assert sum(endpoint.failures for endpoint in pool.endpoints) == 0
+    assert pool.capacity == 4
+
+
+def test_pool_reads_addresses_from_env(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.delenv("JUFDEA_RENDER_WORKERS", raising=False)
+    assert RenderWorkerPool.from_env() is None
+
+    monkeypatch.setenv("JUFDEA_RENDER_WORKERS", "unix:/tmp/a.sock, 10.0.0.2:7070")
+    monkeypatch.setenv("JUFDEA_WORKER_TOKEN", TOKEN)
+    pool = RenderWorkerPool.from_env()
+    assert pool is not None
+    assert [endpoint.address for endpoint in pool.endpoints] == [
+        "unix:/tmp/a.sock",
+        "10.0.0.2:7070",
+    ]
+    assert pool.token == TOKEN
@@ -0,0 +1,104 @@
+import asyncio
+import shutil
+from pathlib import Path
+
+import pytest
+
+import app  # noqa: F401  # register the NiceGUI page
+from models import CatalogWatcher, ImageCatalog, Person
+from pdf_utils import PdfGenerator, PdfProject
+from sandbox import ParseLimits, ParseWorkerPool, ProjectTooComplexError
+
+IMAGE_DIR = Path(__file__).parents[1] / "GUI" / "images" / "ontwerpen"
+CATALOG = ImageCatalog(IMAGE_DIR)
+
+
+async def test_worker_loads_projects_and_reports_errors(tmp_path: Path) -> None:
+    person = CATALOG.new_person()
+    path = tmp_path / "klas.pdf"
+    path.write_bytes(PdfGenerator().document([person], CATALOG))
+    invalid = tmp_path / "kapot.pdf"
+    invalid.write_bytes(b"geen pdf")
+    pool = ParseWorkerPool(IMAGE_DIR, workers=1)
+    try:
+        project = await pool.load(path)
+        with pytest.raises(ValueError, match="geen geldige JufDea-PDF"):
+            await pool.load(invalid)
+        assert (await pool.load(path)).people == [person]
+    finally:
+        await pool.close()
+
+    assert project.people == [person]
+    assert pool.restarts == 0
+
+
+async def test_worker_picks_up_new_designs(tmp_path: Path) -> None:
+    directory = tmp_path / "ontwerpen"
+    directory.mkdir()
+    shutil.copy(IMAGE_DIR / "bloem-25.jpg", directory)
+    watcher = CatalogWatcher(ImageCatalog(directory))
+    path = tmp_path / "klas.pdf"
+    path.write_bytes(
+        PdfGenerator().document([watcher.current.new_person()], watcher.current)
+    )
+    pool = ParseWorkerPool(directory, workers=1)
+    try:
+        await pool.load(path, catalog=watcher.current.fingerprint)
+        shutil.copy(IMAGE_DIR / "paraplu-01.jpg", directory)
+        assert watcher.poll()
+        person = Person(scene="paraplu", color="geel")
+        path.write_bytes(PdfGenerator().document([person], watcher.current))
+        project = await pool.load(path, catalog=watcher.current.fingerprint)
+    finally:
+        await pool.close()
+
+    assert project.people == [person]
+    assert pool.restarts == 0
+
+
+async def test_designs_removed_since_the_worker_loaded_are_rejected(
+    monkeypatch: pytest.MonkeyPatch, tmp_path: Path
+) -> None:
+    class Pool:
+        async def load(self, path: Path, *, catalog: str | None = None) -> PdfProject:
+            return PdfProject([Person(scene="verwijderd", color="geel")], {})
+
+    monkeypatch.setattr(app, "parse_pool", Pool())
+
+    with pytest.raises(ValueError, match="De opgeslagen gegevens zijn ongeldig"):
+        await app._load_uploaded_project(tmp_path / "klas.pdf", CATALOG)
+
+
+async def test_worker_over_its_limits_is_replaced(tmp_path: Path) -> None:
+    path = tmp_path / "klas.pdf"
+    path.write_bytes(PdfGenerator().document([CATALOG.new_person()] * 20, CATALOG))
+    pool = ParseWorkerPool(IMAGE_DIR, ParseLimits(wall_seconds=0), workers=1)
+    try:
+        with pytest.raises(ProjectTooComplexError):
+            await pool.load(path)
+        pool.limits = ParseLimits()
+        project = await pool.load(path)
+    finally:
+        await pool.close()
+
+    assert len(project.people) == 20
+    assert pool.restarts == 1
+
+
+async def test_cancelled_load_does_not_leak_the_worker(tmp_path: Path) -> None:
+    path = tmp_path / "klas.pdf"
+    path.write_bytes(PdfGenerator().document([CATALOG.new_person()] * 20, CATALOG))
+    pool = ParseWorkerPool(IMAGE_DIR, workers=1)
+    try:
+        await pool.load(path)
+        [worker] = pool._idle
+        task = asyncio.create_task(pool.load(path))
+        await asyncio.sleep(0)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+    finally:
+        await pool.close()
+
+    assert worker.process.returncode is not None
+    assert pool.restarts == 1
@@ -0,0 +1,116 @@
+import asyncio
+from typing import Any
+
+import pytest
+
+from scheduler import Priority, RenderScheduler
+
+
+async def _inline(function: Any, *args: Any) -> Any:
+    await asyncio.sleep(0)
+    return function(*args)
+
+
+async def test_sessions_take_turns_and_previews_go_first() -> None:
+    order: list[str] = []
+    gate = asyncio.Event()
+
+    async def runner(function: Any, *args: Any) -> Any:
+        await gate.wait()
+        return function(*args)
+
+    scheduler = RenderScheduler(runner, concurrency=1)
+    blocker = asyncio.create_task(
+        scheduler.submit("busy", Priority.PREVIEW, order.append, "blocker")
+    )
+    await asyncio.sleep(0)
+    tasks = [
+        asyncio.create_task(
+            scheduler.submit("busy", Priority.PREVIEW, order.append, f"busy-{index}")
+        )
+        for index in range(3)
+    ]
+    tasks.append(
+        asyncio.create_task(
+            scheduler.submit("other", Priority.DOWNLOAD, order.append, "download")
+        )
+    )
+    tasks.append(
+        asyncio.create_task(
+            scheduler.submit("other", Priority.PREVIEW, order.append, "other")
+        )
+    )
+    await asyncio.sleep(0)
+    gate.set()
+    await asyncio.gather(blocker, *tasks)
+
+    assert order == ["blocker", "busy-0", "other", "busy-1", "busy-2", "download"]
+
+
+async def test_concurrency_cap_and_wait_times() -> None:
+    active = 0
+    peak = 0
+
+    async def runner(function: Any, *args: Any) -> Any:
+        nonlocal active, peak
+        active += 1
+        peak = max(peak, active)
+        await asyncio.sleep(0.01)
+        active -= 1
+        return function(*args)
+
+    scheduler = RenderScheduler(runner, concurrency=2)
+    results = await asyncio.gather(
+        *(
+            scheduler.submit(f"session-{index % 3}", Priority.PREVIEW, abs, -index)
+            for index in range(9)
+        )
+    )
+
+    assert results == list(range(9))
+    assert peak == 2
+    waits = scheduler.wait_times()
+    assert waits["session-0"].jobs == 3
+    assert waits["session-2"].max_seconds > 0
+    assert scheduler.running == scheduler.queued == 0
+
+
+async def test_errors_reach_the_caller_and_forget_cancels() -> None:
+    scheduler = RenderScheduler(_inline, concurrency=1)
+
+    with pytest.raises(ZeroDivisionError):
+        await scheduler.submit("teacher", Priority.PREVIEW, divmod, 1, 0)
+
+    scheduler.forget("teacher")
+    assert "teacher" not in scheduler.wait_times()
+
+
+async def test_stopped_cooperative_render_cancels_and_frees_its_slot() -> None:
+    async def runner(function: Any, *args: Any) -> Any:
+        return await function(*args)
+
+    async def stops() -> None:
+        await asyncio.sleep(0)
+        raise asyncio.CancelledError
+
+    async def renders() -> str:
+        return "pdf"
+
+    scheduler = RenderScheduler(runner, concurrency=1)
+
+    with pytest.raises(asyncio.CancelledError):
+        await scheduler.submit("a", Priority.DOWNLOAD, stops)
+    assert await scheduler.submit("a", Priority.DOWNLOAD, renders) == "pdf"
+    assert scheduler.running == 0
+
+
+async def test_idle_api_statistics_expire() -> None:
+    scheduler = RenderScheduler(_inline)
+    await scheduler.submit("api:10.0.0.1", Priority.DOWNLOAD, str)
+    await scheduler.submit("api:10.0.0.2", Priority.DOWNLOAD, str)
+    await scheduler.submit("teacher", Priority.DOWNLOAD, str)
+    scheduler.wait_times()["api:10.0.0.1"].last_active -= 120
+    scheduler.wait_times()["teacher"].last_active -= 120
+
+    assert scheduler.expire("api:", 60) == ["api:10.0.0.1"]
+    assert set(scheduler.wait_times()) == {"api:10.0.0.2", "teacher"}
@@ -0,0 +1,162 @@
+import asyncio
+import time
+from dataclasses import dataclass, field
+
+import pytest
+from nicegui.testing import User
+
+import app  # noqa: F401  # register the NiceGUI page
+from models import ImageCatalog, Person
+from scheduler import Priority
+from sessions import SessionInfo, SessionRegistry, estimate_bytes, session_registry
+
+
+@dataclass
+class FakeSession:
+    session_id: str
+    closed: int = 0
+    people: list[str] = field(default_factory=list)
+
+    def memory_usage(self) -> dict[str, int]:
+        return {"rijen": estimate_bytes(self.people)}
+
+    def close(self) -> None:
+        self.closed += 1
+
+
+def test_idle_sessions_are_evicted() -> None:
+    registry = SessionRegistry(idle_seconds=60)
+    active, idle = FakeSession("actief"), FakeSession("inactief")
+    registry.register(active)
+    registry.register(idle)
+    for info in registry.sessions():
+        if info.session is idle:
+            info.last_active = time.monotonic() - 61
+
+    assert registry.evict_idle() == ["inactief"]
+    assert (active.closed, idle.closed) == (0, 1)
+    assert [info.session for info in registry.sessions()] == [active]
+    assert registry.evicted == 1
+
+
+def test_touch_keeps_a_session_alive() -> None:
+    registry = SessionRegistry(idle_seconds=60)
+    session = FakeSession("a")
+    registry.register(session)
+    [info] = registry.sessions()
+    info.last_active -= 120
+
+    registry.touch("a")
+
+    assert registry.evict_idle() == []
+    assert session.closed == 0
+
+
+def test_closing_twice_closes_once() -> None:
+    registry = SessionRegistry()
+    session = FakeSession("a")
+    registry.register(session)
+
+    registry.close("a")
+    registry.close("a")
+
+    assert session.closed == 1
+    assert len(registry) == 0
+
+
+def test_idle_timeout_comes_from_environment(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setenv("JUFDEA_SESSION_IDLE_MINUTES", "15")
+
+    assert SessionRegistry.from_env().idle_seconds == 900
+
+
+def test_estimate_grows_with_retained_rows() -> None:
+    catalog = ImageCatalog(app.IMAGE_DIR)
+    person = catalog.new_person()
+    one = estimate_bytes([person])
+    many = [Person(**person.to_dict()) for _ in range(30)]
+    for number, copy in enumerate(many):
+        copy.name = f"Leerling {number}"
+
+    assert one > estimate_bytes(person.name)
+    assert estimate_bytes(many) > 20 * estimate_bytes(person.name)
+    # Values shared between rows are counted once.
+    assert estimate_bytes([person, person]) < 2 * one
+
+
+async def _open_editor(user: User) -> SessionInfo:
+    before = {info.session.session_id for info in session_registry.sessions()}
+    await user.open("/")
+    [info] = [
+        info
+        for info in session_registry.sessions()
+        if info.session.session_id not in before
+    ]
+    return info
+
+
+async def test_editor_session_is_released_with_its_client(user: User) -> None:
+    info = await _open_editor(user)
+    editor = info.session
+    usage = editor.memory_usage()
+    assert usage["rijen"] > 0
+    assert usage["elementen"] > 0
+
+    user.client.delete()
+
+    assert info not in session_registry.sessions()
+    assert editor.people == []
+
+
+async def test_idle_open_tab_is_evicted_and_told_to_reload(user: User) -> None:
+    info = await _open_editor(user)
+    editor = info.session
+    info.last_active -= session_registry.idle_seconds + 1
+
+    assert editor.connected
+    assert editor.session_id in session_registry.evict_idle()
+    assert info not in session_registry.sessions()
+    assert editor.people == []
+    assert not user.client.is_deleted
+    await user.should_see("Deze sessie was te lang inactief")
+    await user.should_see("Opnieuw laden")
+    await user.should_not_see("Naamkaartjes")
+
+
+async def test_disconnect_keeps_queued_downloads(
+    user: User, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    info = await _open_editor(user)
+    editor = info.session
+    # The page runs from the app loaded as the main file, not ``app``.
+    scheduler = type(editor).close.__globals__["render_scheduler"]
+    # No free slot, so the download stays queued.
+    monkeypatch.setattr(scheduler, "concurrency", 0)
+    download = asyncio.ensure_future(
+        scheduler.submit(editor.session_id, Priority.DOWNLOAD, str)
+    )
+    await asyncio.sleep(0)
+
+    for handler in user.client.disconnect_handlers:
+        user.client.safe_invoke(handler)
+    await asyncio.sleep(0)
+
+    assert not download.done()
+    assert scheduler.queued == 1
+    user.client.delete()
+    with pytest.raises(asyncio.CancelledError):
+        await download
+
+
+async def test_admin_sessions_page_requires_token(
+    user: User, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    response = await user.http_client.get("/admin/sessions")
+    assert response.status_code == 404
+
+    monkeypatch.setenv("JUFDEA_ADMIN_TOKEN", "geheim")
+    await _open_editor(user)
+    user.http_client.cookies.set("jufdea_admin", "geheim")
+    await user.open("/admin/sessions")
+    await user.should_see("open, samen ongeveer")
+    await user.should_see("Elementen")
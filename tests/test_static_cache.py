@@ -0,0 +1,63 @@
+import gzip
+import json
+import os
+import re
+from pathlib import Path
+
+import pytest
+
+from scripts.static_cache import SERVICE_WORKER, precompress, write_service_worker
+
+
+@pytest.fixture
+def site(tmp_path: Path) -> Path:
+    (tmp_path / "index.html").write_text(
+        "<html><body><div id='loading'></div></body></html>", encoding="utf-8"
+    )
+    (tmp_path / "app-abc123.py").write_text("print('hallo')\n" * 200)
+    (tmp_path / "app-assets-abc123.zip").write_bytes(os.urandom(4096))
+    designs = tmp_path / "GUI" / "images" / "ontwerpen"
+    designs.mkdir(parents=True)
+    (designs / "0123456789abcdef.jpg").write_bytes(os.urandom(512))
+    return tmp_path
+
+
+def test_service_worker_precaches_the_build(site: Path) -> None:
+    worker = write_service_worker(site, "abc123").read_text(encoding="utf-8")
+
+    assert 'const CACHE = "jufdea-abc123";' in worker
+    # Designs are cached when a card first needs them.
+    precache = json.loads(re.search(r"PRECACHE = (\[.*?\]);", worker, re.S)[1])
+    assert precache == [
+        "./",
+        "./app-abc123.py",
+        "./app-assets-abc123.zip",
+        "./index.html",
+    ]
+    assert "if (response.ok) {" in worker
+    assert 'response.type === "opaque"' not in worker
+    html = (site / "index.html").read_text(encoding="utf-8")
+    assert f'navigator.serviceWorker.register("./{SERVICE_WORKER}")' in html
+
+
+def test_only_files_that_shrink_are_precompressed(site: Path) -> None:
+    written = precompress(site, encodings=["gzip"])
+
+    assert [path.name for path in written] == ["app-abc123.py.gz"]
+    source = site / "app-abc123.py"
+    assert gzip.decompress((site / "app-abc123.py.gz").read_bytes()) == (
+        source.read_bytes()
+    )
+    # Rebuilding unchanged files produces identical archives.
+    first = (site / "app-abc123.py.gz").read_bytes()
+    precompress(site, encodings=["gzip"])
+    assert (site / "app-abc123.py.gz").read_bytes() == first
+
+
+def test_brotli_copies(site: Path) -> None:
+    brotli = pytest.importorskip("brotli")
+
+    precompress(site, encodings=["br"])
+
+    packed = (site / "app-abc123.py.br").read_bytes()
+    assert brotli.decompress(packed) == (site / "app-abc123.py").read_bytes()
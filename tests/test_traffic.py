@@ -0,0 +1,111 @@
+import asyncio
+
+import pytest
+from nicegui.testing import User
+
+import app  # noqa: F401  # register the NiceGUI page
+from metrics import metrics
+from sessions import session_registry
+from traffic import TrafficMonitor, TrafficStats, describe, traffic
+
+
+def test_traffic_is_attributed_to_the_last_action(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    monkeypatch.setattr(metrics, "enabled", True)
+    metrics.reset()
+    monitor = TrafficMonitor(enabled=True)
+
+    monitor.record("a", "update", {"1": {"text": "x"}})
+    monitor.action("a", "type")
+    monitor.record("a", "update", {"1": {"text": "xy"}})
+    monitor.record("a", "update", {"1": {"text": "xyz"}})
+    monitor.action("b", "preview")
+    monitor.record("b", "update", {"2": {"source": "data:" + "A" * 1000}})
+
+    assert monitor.session("a") == {
+        "type": TrafficStats(2, 39),
+        "load": TrafficStats(1, 18),
+    }
+    assert list(monitor.session("b")) == ["preview"]
+    rendered = metrics.render()
+    assert 'jufdea_ws_messages_total{action="type",type="update"} 2' in rendered
+    assert 'jufdea_ws_bytes_total{action="preview"}' in rendered
+
+    monitor.forget("a")
+    assert monitor.session("a") == {}
+    metrics.reset()
+
+
+def test_attributed_elements_keep_the_current_action() -> None:
+    monitor = TrafficMonitor(enabled=True)
+    monitor.attribute("a", 7, "overlay")
+    monitor.action("a", "download")
+
+    monitor.record("a", "update", {7: {"text": "1.0 kB"}, 8: {"text": "PDF"}})
+    monitor.record("a", "download", {"src": "/api/documents/abc"})
+
+    actions = monitor.session("a")
+    assert set(actions) == {"download", "overlay"}
+    assert actions["download"].messages == 2
+    assert actions["overlay"] == TrafficStats(1, len('{"7":{"text":"1.0 kB"}}'))
+
+
+def test_disabled_monitor_leaves_the_outbox_alone() -> None:
+    class Outbox:
+        async def _emit(self, message: object) -> None:
+            pass
+
+    class Client:
+        outbox = Outbox()
+
+    original = Client.outbox._emit
+    TrafficMonitor().attach("a", Client)
+
+    assert Client.outbox._emit == original
+    assert TrafficMonitor(overlay=True).enabled
+
+
+def test_describe() -> None:
+    assert describe({}) == "0.0 kB"
+    assert (
+        describe({"preview": TrafficStats(2, 9100), "type": TrafficStats(5, 1200)})
+        == "10.3 kB · preview 9.1 kB (2) · type 1.2 kB (5)"
+    )
+
+
+async def test_editor_actions_are_counted(
+    user: User, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    monkeypatch.setattr(traffic, "enabled", True)
+    before = {info.session.session_id for info in session_registry.sessions()}
+    await user.open("/")
+    # Let the simulated socket connect so updates are flushed right away.
+    await asyncio.sleep(0.3)
+    [session_id] = [
+        info.session.session_id
+        for info in session_registry.sessions()
+        if info.session.session_id not in before
+    ]
+
+    user.find("Rij toevoegen").click()
+    await asyncio.sleep(0.2)
+    user.find(marker="name-0").type("Ada")
+    await asyncio.sleep(0.2)
+
+    actions = traffic.session(session_id)
+    assert actions["add_row"].bytes > 0
+    assert actions["type"].messages > 0
+    await user.should_see("Rij 1: NaamAda")
+
+
+async def test_overlay_shows_session_traffic(
+    user: User, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    monkeypatch.setattr(traffic, "enabled", True)
+    monkeypatch.setattr(traffic, "overlay", True)
+    await user.open("/")
+    await asyncio.sleep(0.3)
+
+    user.find("Rij toevoegen").click()
+    await user.should_see("add_row", retries=30)
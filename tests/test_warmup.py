@@ -0,0 +1,52 @@
+from pathlib import Path
+
+import pytest
+from nicegui.testing import User
+
+import app  # noqa: F401  # register the NiceGUI page
+from models import ImageCatalog
+from warmup import WarmUp, warm_up
+
+ROOT = Path(__file__).parents[1]
+CATALOG = ImageCatalog(ROOT / "GUI" / "images" / "ontwerpen")
+
+
+def test_warm_up_renders_a_preview() -> None:
+    state = WarmUp()
+    assert state.status() == (503, {"status": "starting"})
+
+    state.run(lambda: CATALOG)
+
+    status_code, payload = state.status()
+    assert status_code == 200
+    assert payload["status"] == "ready"
+    assert payload["warm_up_seconds"] > 0
+
+
+def test_failed_warm_up_is_not_ready() -> None:
+    def missing_catalog() -> ImageCatalog:
+        return ImageCatalog(ROOT / "bestaat-niet")
+
+    state = WarmUp()
+    state.run(missing_catalog)
+
+    status_code, payload = state.status()
+    assert status_code == 503
+    assert payload["status"] == "failed"
+    assert "No card designs found" in payload["error"]
+
+
+async def test_ready_route_waits_for_warm_up(
+    user: User, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    monkeypatch.setattr(warm_up, "ready", False)
+    monkeypatch.setattr(warm_up, "seconds", None)
+
+    response = await user.http_client.get("/ready")
+    assert response.status_code == 503
+    assert response.json()["status"] == "starting"
+
+    warm_up.run(lambda: CATALOG)
+    response = await user.http_client.get("/ready")
+    assert response.status_code == 200
+    assert response.json()["status"] == "ready"
@@ -0,0 +1,158 @@
+"""Attribute outgoing websocket traffic to editor sessions and UI actions.
+
+NiceGUI collects element updates and sends them from a per-client outbox
+right after an event handler returns. ``TrafficMonitor.attach`` wraps that
+outbox, the same way ``nicegui.testing.User`` does, and counts every message
+and the size of its JSON payload under the session and the action the session
+marked last with ``action()`` (``add_row``, ``type``, ``select``, ``preview``,
+...). Updates sent before any action are counted as ``load``.
+
+Counting costs an extra JSON encoding per message, so it is only on with
+``JUFDEA_METRICS`` (totals per action on ``/metrics``) or
+``JUFDEA_TRAFFIC_OVERLAY`` (a live overlay with this session's traffic in
+the editor).
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import os
+import threading
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass
+from typing import Any
+
+from metrics import WS_BYTES, WS_MESSAGES, metrics
+
+log = logging.getLogger(__name__)
+
+INITIAL_ACTION = "load"
+
+
+@dataclass(slots=True)
+class TrafficStats:
+    messages: int = 0
+    bytes: int = 0
+
+
+class TrafficMonitor:
+    """Websocket messages and bytes per session and action."""
+
+    def __init__(self, *, enabled: bool = False, overlay: bool = False) -> None:
+        self.enabled = enabled or overlay
+        self.overlay = overlay
+        self._actions: dict[str, str] = {}
+        self._elements: dict[str, dict[str, str]] = {}
+        self._sessions: dict[str, dict[str, TrafficStats]] = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls) -> TrafficMonitor:
+        return cls(
+            enabled=metrics.enabled,
+            overlay=os.environ.get("JUFDEA_TRAFFIC_OVERLAY", "") not in {"", "0"},
+        )
+
+    def attach(self, session_id: str, client: Any) -> None:
+        """Count the messages ``client`` is sent from now on for ``session_id``."""
+
+        if not self.enabled:
+            return
+        outbox = client.outbox
+        emit: Callable[[Any], Awaitable[None]] | None = getattr(outbox, "_emit", None)
+        if emit is None:
+            log.warning("NiceGUI outbox has no _emit; traffic is not counted")
+            return
+
+        async def counted_emit(message: Any) -> None:
+            _, message_type, payload = message
+            self.record(session_id, message_type, payload)
+            await emit(message)
+
+        outbox._emit = counted_emit
+
+    def action(self, session_id: str, action: str) -> None:
+        """Attribute the following traffic of ``session_id`` to ``action``."""
+
+        if self.enabled:
+            self._actions[session_id] = action
+
+    def attribute(self, session_id: str, element_id: int, action: str) -> None:
+        """Count updates of one element as ``action``, whatever happens around it.
+
+        The current action of the session is left alone, so the element's own
+        updates neither take over nor hide the traffic of the user's action.
+        """
+
+        if self.enabled:
+            self._elements.setdefault(session_id, {})[str(element_id)] = action
+
+    def record(self, session_id: str, message_type: str, payload: Any) -> None:
+        action = self._actions.get(session_id, INITIAL_ACTION)
+        elements = self._elements.get(session_id)
+        if message_type != "update" or not elements or not isinstance(payload, dict):
+            self._count(session_id, action, message_type, payload)
+            return
+        # One update message carries every pending element; split it up.
+        parts: dict[str, dict[Any, Any]] = {}
+        for element_id, data in payload.items():
+            owner = elements.get(str(element_id), action)
+            parts.setdefault(owner, {})[element_id] = data
+        for owner, part in parts.items():
+            self._count(session_id, owner, message_type, part)
+
+    def _count(
+        self, session_id: str, action: str, message_type: str, payload: Any
+    ) -> None:
+        size = len(
+            json.dumps(payload, separators=(",", ":"), default=str).encode("utf-8")
+        )
+        with self._lock:
+            stats = self._sessions.setdefault(session_id, {}).setdefault(
+                action, TrafficStats()
+            )
+            stats.messages += 1
+            stats.bytes += size
+        metrics.increment(WS_MESSAGES, action=action, type=message_type)
+        metrics.increment(WS_BYTES, size, action=action)
+
+    def session(self, session_id: str) -> dict[str, TrafficStats]:
+        """Traffic of one session per action, largest first."""
+
+        with self._lock:
+            actions = self._sessions.get(session_id, {})
+            return dict(
+                sorted(
+                    (
+                        (action, TrafficStats(stats.messages, stats.bytes))
+                        for action, stats in actions.items()
+                    ),
+                    key=lambda item: item[1].bytes,
+                    reverse=True,
+                )
+            )
+
+    def forget(self, session_id: str) -> None:
+        with self._lock:
+            self._sessions.pop(session_id, None)
+        self._actions.pop(session_id, None)
+        self._elements.pop(session_id, None)
+
+
+def describe(actions: dict[str, TrafficStats]) -> str:
+    """One line for the overlay, e.g. ``12.3 kB · preview 9.1 kB (2) · ...``."""
+
+    total = sum(stats.bytes for stats in actions.values())
+    parts = [_kilobytes(total)] + [
+        f"{action} {_kilobytes(stats.bytes)} ({stats.messages})"
+        for action, stats in actions.items()
+    ]
+    return " · ".join(parts)
+
+
+def _kilobytes(size: int) -> str:
+    return f"{size / 1000:.1f} kB"
+
+
+traffic = TrafficMonitor.from_env()
@@ -0,0 +1,62 @@
+"""Warm the server up before the first teacher opens the editor.
+
+A fresh process pays for hashing the catalog images, parsing the font and the
+first render through fpdf2 and PyMuPDF. ``main()`` runs this once in the
+background at startup; ``/ready`` reports success only after it finished.
+"""
+
+from __future__ import annotations
+
+import logging
+from collections.abc import Callable
+from dataclasses import dataclass
+from time import perf_counter
+from typing import Any
+
+from models import ImageCatalog
+from pdf_utils import PdfGenerator, load_layout, render_preview_png, validate_layout
+
+log = logging.getLogger(__name__)
+
+
+@dataclass(slots=True)
+class WarmUp:
+    ready: bool = False
+    seconds: float | None = None
+    error: str | None = None
+
+    def run(
+        self,
+        catalog: Callable[[], ImageCatalog],
+        generator: PdfGenerator | None = None,
+    ) -> None:
+        """Build the shared catalog and render one throwaway preview."""
+
+        start = perf_counter()
+        try:
+            shared_catalog = catalog()
+            layout = load_layout()
+            validate_layout(layout)
+            pdf = (generator or PdfGenerator()).preview(
+                shared_catalog.new_person(), shared_catalog, layout
+            )
+            render_preview_png(pdf)
+        except Exception as error:
+            log.exception("Warm-up failed")
+            self.error = str(error)
+            return
+        self.seconds = perf_counter() - start
+        self.error = None
+        self.ready = True
+
+    def status(self) -> tuple[int, dict[str, Any]]:
+        """Return the HTTP status and body for the readiness route."""
+
+        if self.ready:
+            return 200, {"status": "ready", "warm_up_seconds": self.seconds}
+        if self.error is not None:
+            return 503, {"status": "failed", "error": self.error}
+        return 503, {"status": "starting"}
+
+
+warm_up = WarmUp()